@@ -1,11 +1,18 @@
 import argparse
 import csv
 import glob
+import hashlib
+import heapq
+import itertools
+import json
 import logging
+import multiprocessing
 import os
 import random
 import sys
+import time
 
+from collections import OrderedDict
 from shutil import copyfile
 
 import openpyxl
@@ -35,6 +42,92 @@ logging.basicConfig(
     datefmt="%Y-%m-%d %H:%M:%S",
 )
 
+# AutoBreak object used in the worker processes, inherited through fork
+WORKER_AUTOBREAK = None
+
+
+def solve_group_samples(sample_args):
+    """Create group solution samples for an oligo group, one random seed per sample"""
+    group_index, sample_seeds = sample_args
+
+    # Get the oligo group
+    oligo_group = WORKER_AUTOBREAK.origami.oligo_groups[group_index]
+
+    # Cache counts before the task
+    solution_cache = WORKER_AUTOBREAK.solution_cache
+    num_hits = solution_cache.num_hits
+    num_misses = solution_cache.num_misses
+
+    group_solutions = []
+    for sample_seed in sample_seeds:
+        # Every sample starts from the same oligo order
+        oligo_group.reset_oligo_order()
+
+        # Create group solution
+        random.seed(sample_seed)
+        group_solutions.append(
+            oligo_group.create_stepwise_group_solution(
+                WORKER_AUTOBREAK.NUM_OLIGO_SOLUTIONS,
+                WORKER_AUTOBREAK.optim_pick_method,
+                WORKER_AUTOBREAK.optim_shuffle_oligos,
+                verbose=WORKER_AUTOBREAK.verbose_output,
+            )
+        )
+
+    return (
+        WORKER_AUTOBREAK.pack_group_solutions(group_solutions),
+        solution_cache.num_hits - num_hits,
+        solution_cache.num_misses - num_misses,
+    )
+
+
+def solve_offsets(offsets):
+    """Run autobreak at each sequence offset, one random seed per offset"""
+    # Cache counts before the task
+    solution_cache = WORKER_AUTOBREAK.solution_cache
+    num_hits = solution_cache.num_hits
+    num_misses = solution_cache.num_misses
+
+    packed_solutions = []
+    for offset in offsets:
+        WORKER_AUTOBREAK.solve_offset(offset)
+
+        # Pack the complete solution for the offset
+        complete_solution = WORKER_AUTOBREAK.complete_solutions.pop(offset, None)
+        if complete_solution:
+            complete_solution = WORKER_AUTOBREAK.pack_complete_solution(
+                complete_solution
+            )
+        packed_solutions.append((offset, complete_solution))
+
+    return (
+        packed_solutions,
+        solution_cache.num_hits - num_hits,
+        solution_cache.num_misses - num_misses,
+    )
+
+
+def score_readonly_offsets(offsets):
+    """Determine readonly scores at each sequence offset"""
+    readonly_scores = []
+    for offset in offsets:
+        WORKER_AUTOBREAK.shift_scaffold_sequence(offset)
+        WORKER_AUTOBREAK.determine_readonly_scores()
+
+        # Keep the totals of the solution
+        complete_solution = WORKER_AUTOBREAK.complete_solutions.pop(offset)
+        readonly_scores.append(
+            (
+                offset,
+                complete_solution.total_prob,
+                complete_solution.total_score,
+                complete_solution.total_dsDNA_length,
+            )
+        )
+
+    return readonly_scores
+
+
 """
 When an instance of OligoBreakSolution is created , it sets up the necessary attributes
 to manage break points and edges for the staple strands
@@ -63,6 +156,10 @@ class OligoBreakSolution:
         self.breaks = None  # This stores the breaking points of the staple
         self.edges = None  # This stores the edges [connection ] between the breaks
         self.dsDNA_length = 0  # This stores the double-stranded DNA length
+        self.path_key = None  # Break ids of the breaks
+        self.break_ids = None  # Set of the break ids of the breaks
+        self.neighbor_breaks = None  # Breaks with a neighbor, last break excluded
+        self.neighbor_ids = None  # Break ids of the neighbors of neighbor_breaks
 
     def get_csv_rows(self):
         """
@@ -110,7 +207,7 @@ class OligoBreakSolution:
         self.dsDNA_length = 0
         for edge in self.edges:
             if edge is not None:
-                self.dsDNA_length += sum(edge.dsDNA_length_list)
+                self.dsDNA_length += edge.dsDNA_length
         logging.info(f"dsDNA length: {self.dsDNA_length}")
         return self.dsDNA_length
 
@@ -210,17 +307,11 @@ class OligoBreakSolution:
         Calculate self penalty score
         """
         self.self_penalty = 0
-        for new_break in self.breaks[:-1]:
-
-            # Get neighbor break
-            if new_break.neighbor_break:
+        for neighbor_id in self.neighbor_ids:
 
-                neighbor_break = new_break.neighbor_break
-
-                if neighbor_break and neighbor_break in self.breaks:
-
-                    # Update total penalty score
-                    self.self_penalty += 1
+            # Update total penalty score
+            if neighbor_id in self.break_ids:
+                self.self_penalty += 1
 
         # Divide penalty by 2
         self.self_penalty = int(1.0 * self.self_penalty / 2)
@@ -235,41 +326,64 @@ class OligoBreakSolution:
         Prepare the lists
         """
         self.breaks = [break_path.break_node for break_path in self.break_paths[::-1]]
-        for break_path in self.break_paths[::-1]:
-            print(break_path)
 
-        self.edges = [break_path.break_edge for break_path in self.break_paths[::-1]]
+        # Get the edge views from the edge table
+        edge_table = self.origami.autobreak.edge_table
+        self.edges = [
+            (
+                edge_table.get_edge(break_path.edge_id)
+                if break_path.edge_id is not None
+                else None
+            )
+            for break_path in self.break_paths[::-1]
+        ]
         self.scores = [break_path.score for break_path in self.break_paths[::-1]]
         logging.info(f"Initialized with breaks: {self.breaks} and edges: {self.edges}")
 
+        # Index the break ids
+        self.index_break_ids()
+
+    def index_break_ids(self):
+        """Index the break ids of the breaks and their neighbors for penalty checks"""
+        self.path_key = tuple(current_break.break_id for current_break in self.breaks)
+        self.break_ids = frozenset(self.path_key)
+        self.neighbor_breaks = [
+            current_break
+            for current_break in self.breaks[:-1]
+            if current_break.neighbor_break
+        ]
+        self.neighbor_ids = np.array(
+            [
+                current_break.neighbor_break.break_id
+                for current_break in self.neighbor_breaks
+            ],
+            dtype=int,
+        )
+
+    def get_path_key(self):
+        """Return the break ids of the solution path"""
+        return self.path_key
+
+    def get_rotation_key(self):
+        """Return the sorted break ids of a circular solution, same for all rotations"""
+        return tuple(
+            sorted(current_break.break_id for current_break in self.breaks[:-1])
+        )
+
     def is_identical(self, other_solution, max_index=None):
         """
         Compares the break paths between two solutions, determines if the current solution
         is identical to another solution of a OligoBreakSolution
 
 
-        Compare the baths between two solutions
+        Compare the break ids of the paths between two solutions
         """
         # Determine maximum index
         max_i = len(self.breaks) - 1
         if max_index:
             max_i = max_index
 
-        # Identical variable
-        identical = True
-
-        # Breaks for the current path
-        current_breaks = self.breaks[:max_i]
-
-        # Other breaks
-        other_breaks = other_solution.breaks[:max_i]
-
-        if not len(current_breaks) == len(other_breaks):
-            return False
-
-        # Pairwise comparison of elements
-        for i in range(max_i):
-            identical *= current_breaks[i] == other_breaks[i]
+        identical = self.path_key[:max_i] == other_solution.path_key[:max_i]
         logging.info(f"Solution identical: {identical}")
 
         return identical
@@ -339,6 +453,13 @@ class GroupBreaksolution:
         self.total_dsDNA_length = 0
         self.complete = True
 
+        # Mark the breaks of the solutions
+        num_breaks = len(self.origami.autobreak.edge_table.breaks)
+        chosen_breaks = np.zeros(num_breaks, dtype=bool)
+        for break_solution in self.break_solutions.values():
+            if break_solution:
+                chosen_breaks[list(break_solution.break_ids)] = True
+
         # Iterate over each solution
         for key in self.break_solutions:
             # Get break solution
@@ -359,28 +480,14 @@ class GroupBreaksolution:
             # Update total dsDNA length
             self.total_dsDNA_length += break_solution.calculate_dsDNA_length()
 
-            # Initialize the bad break list
-            break_solution.bad_list = []
-
-            # Iterate over breaks in breaks list
-            for new_break in break_solution.breaks[:-1]:
-
-                # Get neighbor key
-                if new_break.neighbor_break:
-                    neighbor_break = new_break.neighbor_break
-                    neighbor_oligo_key = neighbor_break.oligo.key
-
-                    # Get the neighbor information
-                    if (
-                        neighbor_oligo_key in self.break_solutions
-                        and self.break_solutions[neighbor_oligo_key]
-                        and neighbor_break
-                        in self.break_solutions[neighbor_oligo_key].breaks
-                    ):
-                        break_solution.bad_list.append(new_break)
+            # Get the breaks whose neighbors are in the solutions
+            bad_breaks = np.flatnonzero(chosen_breaks[break_solution.neighbor_ids])
+            break_solution.bad_list = [
+                break_solution.neighbor_breaks[i] for i in bad_breaks
+            ]
 
-                        # Update total penalty score
-                        self.total_penalty += 1
+            # Update total penalty score
+            self.total_penalty += len(bad_breaks)
 
         # Divide penalty score by 2
         self.total_penalty = int(self.total_penalty / 2)
@@ -390,6 +497,217 @@ class GroupBreaksolution:
             )
 
 
+class GroupSolutionRefiner:
+    """
+    Simulated annealing over the oligo solutions of a group solution
+
+    A move replaces the solution of one oligo with another of its k-best paths.
+    Score and neighbor conflict counts are updated from the changed oligo only.
+    """
+
+    def __init__(self):
+        self.origami = None
+        self.oligo_keys = []  # Keys of the oligos in the group solution
+        self.candidates = []  # Candidate solutions for each oligo
+        self.candidate_breaks = []  # Inner and all break ids of the candidates
+        self.chosen = []  # Chosen candidate index for each oligo
+        self.inner_counts = {}  # Chosen solutions that break at each break id
+        self.break_counts = {}  # Chosen solutions that include each break id
+        self.neighbor_ids = {}  # Neighbor break id for each break id
+        self.reverse_neighbor_ids = {}  # Break ids that have each break id as neighbor
+        self.total_score = 0
+        self.conflict_count = 0  # Neighbor conflicts counted from both sides
+        self.max_penalty = 0  # Penalty of the initial group solution
+
+    def initialize(self, oligo_group, group_solution, num_oligo_solutions=100):
+        """Prepare candidate solutions from the k-best paths of the oligos"""
+        self.origami = group_solution.origami
+
+        # 1. Neighbor maps of the group breaks
+        for current_break in oligo_group.breaks:
+            if current_break.neighbor_break:
+                neighbor_id = current_break.neighbor_break.break_id
+                self.neighbor_ids[current_break.break_id] = neighbor_id
+                self.reverse_neighbor_ids.setdefault(neighbor_id, []).append(
+                    current_break.break_id
+                )
+
+        # 2. Candidate solutions without temporary constraints
+        oligo_group.reset_temp_neighbor_constraints()
+        oligos = {oligo.key: oligo for oligo in oligo_group.oligos}
+        for oligo_key, chosen_solution in group_solution.break_solutions.items():
+            oligo = oligos[oligo_key]
+            oligo.generate_shortest_paths(num_oligo_solutions)
+            oligo.remove_penalized_solutions()
+
+            # Keep the chosen solution as the first candidate
+            candidates = [chosen_solution]
+            path_keys = {chosen_solution.get_path_key()}
+            for break_solution in oligo.break_solutions:
+                path_key = break_solution.get_path_key()
+                if (
+                    path_key not in path_keys
+                    and break_solution.score > -utilities.INFINITY
+                ):
+                    path_keys.add(path_key)
+                    candidates.append(break_solution)
+
+            self.oligo_keys.append(oligo_key)
+            self.candidates.append(candidates)
+            self.candidate_breaks.append(
+                [
+                    (
+                        frozenset(break_solution.path_key[:-1]),
+                        break_solution.break_ids,
+                    )
+                    for break_solution in candidates
+                ]
+            )
+            self.chosen.append(0)
+
+        # 3. Add the initial solutions
+        for i in range(len(self.chosen)):
+            self.add_candidate(i, 0)
+            self.total_score += self.candidates[i][0].score
+
+        self.conflict_count = 0
+        for i in range(len(self.chosen)):
+            inner_ids, break_ids = self.candidate_breaks[i][0]
+            for break_id in inner_ids:
+                if self.neighbor_ids.get(break_id) in self.break_counts:
+                    self.conflict_count += 1
+        self.max_penalty = int(self.conflict_count / 2)
+
+    def add_candidate(self, i, j):
+        """Add the breaks of a candidate to the chosen breaks"""
+        inner_ids, break_ids = self.candidate_breaks[i][j]
+        for break_id in inner_ids:
+            self.inner_counts[break_id] = self.inner_counts.get(break_id, 0) + 1
+        for break_id in break_ids:
+            self.break_counts[break_id] = self.break_counts.get(break_id, 0) + 1
+
+    def remove_candidate(self, i, j):
+        """Remove the breaks of a candidate from the chosen breaks"""
+        inner_ids, break_ids = self.candidate_breaks[i][j]
+        for break_id in inner_ids:
+            self.inner_counts[break_id] -= 1
+            if self.inner_counts[break_id] == 0:
+                del self.inner_counts[break_id]
+        for break_id in break_ids:
+            self.break_counts[break_id] -= 1
+            if self.break_counts[break_id] == 0:
+                del self.break_counts[break_id]
+
+    def get_conflict_count(self, i, j):
+        """Conflicts of a candidate with the other chosen solutions and itself"""
+        inner_ids, break_ids = self.candidate_breaks[i][j]
+        conflict_count = 0
+
+        # Candidate breaks next to the breaks of chosen solutions or itself
+        for break_id in inner_ids:
+            neighbor_id = self.neighbor_ids.get(break_id)
+            if neighbor_id in self.break_counts or neighbor_id in break_ids:
+                conflict_count += 1
+
+        # Breaks of the other chosen solutions next to the candidate
+        for break_id in break_ids:
+            for neighbor_id in self.reverse_neighbor_ids.get(break_id, []):
+                if neighbor_id in self.inner_counts:
+                    conflict_count += 1
+
+        return conflict_count
+
+    def get_temperature_scale(self):
+        """Mean score spread of the candidates, used as the initial temperature"""
+        score_spreads = [
+            candidates[0].score - min(x.score for x in candidates)
+            for candidates in self.candidates
+            if len(candidates) > 1
+        ]
+        score_spreads += [
+            max(x.score for x in candidates) - candidates[0].score
+            for candidates in self.candidates
+            if len(candidates) > 1
+        ]
+        temperature = float(np.mean(score_spreads)) if score_spreads else 0
+        return temperature if temperature > 0 else 1.0
+
+    def refine(self, num_moves=1000, max_seconds=0):
+        """
+        Run simulated annealing for a number of moves, return the best group solution
+        found. The wall-clock limit only guards against slow machines, 0 disables it.
+        """
+        # Oligos with alternative solutions
+        movable = [i for i in range(len(self.chosen)) if len(self.candidates[i]) > 1]
+        if len(movable) == 0:
+            return None
+
+        best_score = self.total_score
+        best_chosen = list(self.chosen)
+        initial_temperature = self.get_temperature_scale()
+
+        start_time = time.monotonic()
+        for move in range(num_moves):
+            if max_seconds > 0 and time.monotonic() - start_time >= max_seconds:
+                logging.warning(
+                    f"Refinement stopped by the time limit after {move} of {num_moves} moves"
+                )
+                break
+
+            # 1. Pick a move
+            i = random.choice(movable)
+            old_j = self.chosen[i]
+            new_j = random.randint(0, len(self.candidates[i]) - 2)
+            if new_j >= old_j:
+                new_j += 1
+
+            # 2. Score and conflict deltas
+            delta_score = (
+                self.candidates[i][new_j].score - self.candidates[i][old_j].score
+            )
+            self.remove_candidate(i, old_j)
+            conflict_count = (
+                self.conflict_count
+                - self.get_conflict_count(i, old_j)
+                + self.get_conflict_count(i, new_j)
+            )
+
+            # 3. Accept or reject the move
+            temperature = initial_temperature * 1e-3 ** (move / num_moves)
+            if int(conflict_count / 2) <= self.max_penalty and (
+                delta_score >= 0 or random.random() < np.exp(delta_score / temperature)
+            ):
+                self.add_candidate(i, new_j)
+                self.chosen[i] = new_j
+                self.total_score += delta_score
+                self.conflict_count = conflict_count
+
+                # Keep the best solution
+                if self.total_score > best_score:
+                    best_score = self.total_score
+                    best_chosen = list(self.chosen)
+            else:
+                self.add_candidate(i, old_j)
+
+        return self.create_group_solution(best_chosen)
+
+    def create_group_solution(self, chosen):
+        """Make a group solution from the chosen candidate indexes"""
+        new_group_solution = GroupBreaksolution()
+        new_group_solution.break_solutions = {}
+        new_group_solution.origami = self.origami
+
+        for i, oligo_key in enumerate(self.oligo_keys):
+            new_group_solution.break_solutions[oligo_key] = self.candidates[i][
+                chosen[i]
+            ]
+
+        # Calculate the penalties for the group solution
+        new_group_solution.calculate_penalty()
+
+        return new_group_solution
+
+
 class CompleteBreakSolution:
     """Complete break solution class"""
 
@@ -578,6 +896,146 @@ class CompleteBreakSolution:
         # writer.close()
 
 
+class OligoSolutionCache:
+    def __init__(self, max_size=4096):
+        """Least recently used cache for the path solutions of the oligos"""
+        self.max_size = max_size  # Maximum number of cached oligo solution lists, 0 disables the cache
+        self.solutions = OrderedDict()  # Solutions by oligo and constraints
+        self.num_hits = 0  # Number of searches skipped
+        self.num_misses = 0  # Number of searches made
+
+    def get_key(self, oligo, num_solutions):
+        """Cache key from the oligo key and the breaks with temporary constraints"""
+        constrained_breaks = frozenset(
+            current_break.break_id
+            for current_break in oligo.breaks
+            if current_break.dont_break_temp
+        )
+        return (oligo.key, num_solutions, constrained_breaks)
+
+    def get_solutions(self, cache_key):
+        """Get the cached solutions, None if they are not in the cache"""
+        if cache_key not in self.solutions:
+            self.num_misses += 1
+            return None
+
+        self.num_hits += 1
+        self.solutions.move_to_end(cache_key)
+        return list(self.solutions[cache_key])
+
+    def add_solutions(self, cache_key, break_solutions):
+        """Add solutions to the cache, remove the least recently used ones"""
+        if self.max_size <= 0:
+            return
+
+        self.solutions[cache_key] = list(break_solutions)
+        self.solutions.move_to_end(cache_key)
+        while len(self.solutions) > self.max_size:
+            self.solutions.popitem(last=False)
+
+    def clear(self):
+        """Clear the cached solutions, counters are kept"""
+        self.solutions.clear()
+
+    def get_summary(self):
+        """Get cache hit and miss summary"""
+        num_searches = self.num_hits + self.num_misses
+        hit_rate = 100.0 * self.num_hits / num_searches if num_searches > 0 else 0.0
+        return "Oligo path cache - Hits:%d Misses:%d HitRate:%.1f%%" % (
+            self.num_hits,
+            self.num_misses,
+            hit_rate,
+        )
+
+
+class DesignCache:
+    VERSION = 1
+
+    def __init__(self, cache_dir=None, max_megabytes=512):
+        """Least recently used disk cache for the edge tables of prepared designs"""
+        self.cache_dir = cache_dir  # Cache directory, None disables the cache
+        self.max_megabytes = max_megabytes  # Maximum total size of the cache files
+
+    def get_key(self, autobreak):
+        """Cache key from the design, sequence, break rule and length bounds"""
+        if self.cache_dir is None:
+            return None
+
+        origami = autobreak.origami
+        key_hash = hashlib.sha256()
+        with open(origami.json_input, "rb") as f:
+            key_hash.update(f.read())
+
+        # Settings the edges depend on, the break keys guard the break ids
+        key_parts = (
+            self.VERSION,
+            origami.scaffold_sequence,
+            origami.sequence_offset,
+            autobreak.break_rule,
+            autobreak.LOWER_BOUND,
+            autobreak.UPPER_BOUND,
+            autobreak.optim_temperature_kelvin,
+            [current_break.key for current_break in autobreak.edge_table.breaks],
+        )
+        for key_part in key_parts:
+            key_hash.update(repr(key_part).encode())
+
+        return key_hash.hexdigest()
+
+    def get_path(self, cache_key):
+        """Get the cache file for a key"""
+        return os.path.join(self.cache_dir, cache_key + ".npz")
+
+    def load(self, cache_key):
+        """Load the cached arrays, None if they are not in the cache"""
+        if cache_key is None or not os.path.isfile(self.get_path(cache_key)):
+            return None
+
+        cache_file = self.get_path(cache_key)
+        try:
+            with np.load(cache_file) as cached_arrays:
+                arrays = {name: cached_arrays[name] for name in cached_arrays.files}
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipped unreadable design cache file {cache_file}: {e}")
+            return None
+
+        # Mark the file as recently used
+        os.utime(cache_file)
+
+        return arrays
+
+    def save(self, cache_key, arrays):
+        """Save the arrays to the cache, remove the least recently used files"""
+        if cache_key is None:
+            return
+
+        # Write to a temporary file first so readers never see a partial file
+        os.makedirs(self.cache_dir, exist_ok=True)
+        cache_file = self.get_path(cache_key)
+        temp_file = "%s.%d.tmp" % (cache_file, os.getpid())
+        with open(temp_file, "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(temp_file, cache_file)
+
+        self.evict()
+
+    def evict(self):
+        """Remove the least recently used files until the cache fits its size"""
+        cache_files = []
+        for cache_file in glob.glob(os.path.join(self.cache_dir, "*.npz")):
+            file_stat = os.stat(cache_file)
+            cache_files.append((file_stat.st_mtime, file_stat.st_size, cache_file))
+
+        total_size = sum(file_size for _, file_size, _ in cache_files)
+        max_size = self.max_megabytes * 1024 * 1024
+        for _, file_size, cache_file in sorted(cache_files):
+            if total_size <= max_size:
+                break
+            os.remove(cache_file)
+            total_size -= file_size
+            logging.info(f"Removed design cache file {cache_file}")
+
+
 class AutoStaple:
     def __init__(self):
         """Auto staple class"""
@@ -610,6 +1068,28 @@ class AutoBreak:
         # k-shortest path parameter
         self.k_select = "best"
 
+        # Start breaks for circular oligos: all or window
+        self.circular_solver = "all"
+
+        # Group solver: stepwise or milp
+        self.group_solver = "stepwise"
+
+        # Annealing moves for the refinement of the group solutions
+        self.refine_moves = 0
+        self.REFINE_MOVES_PER_SECOND = 5000  # Moves per second of a time limit
+
+        # Wall-clock limit for the refinement of the group solutions, 0 disables
+        self.refine_seconds = 0
+
+        # Number of offsets kept after the readonly prescreen, 0 disables it
+        self.prescreen_num = 0
+        self.prescreen_metric = "TotalScore"
+
+        # Number of best offsets kept exact by bound pruning, 0 disables it
+        self.prune_num = 0
+        self.prune_scores = []
+        self.offset_bounds = {}
+
         # Break rule
         self.break_rule = ["xstap", "all3"]
 
@@ -693,10 +1173,31 @@ class AutoBreak:
         # Verbose output
         self.verbose_output = False
 
+        # Parallel parameters
+        self.num_jobs = 1
+        self.random_seed = 0
+
+        # Oligo path solution cache
+        self.solution_cache = OligoSolutionCache()
+
+        # Disk cache for the edge tables of prepared designs
+        self.design_cache = DesignCache()
+
+        # Break edge table
+        self.edge_table = None
+        self.sequence_stale = False
+
         # Solutions containers
         self.complete_solutions = {}
         self.best_complete_solution = None
 
+        # Readonly scores of the staples at each offset
+        self.readonly_score_frame = None
+
+        # Checkpoint of the finished offsets
+        self.resume = False
+        self.checkpoint_file = None
+
         # Sequence parameter
         self.best_sequence_offset = 0
 
@@ -868,6 +1369,8 @@ class AutoBreak:
     def write_best_result(self):
         """Write best result"""
         if not self.write_all_results:
+            # Make sure edges are scored and sequenced at the best offset
+            self.refresh_scaffold_sequence(self.best_complete_solution.sequence_offset)
             self.best_complete_solution.export_staples(self.results_excel_file)
 
     def create_results_excel_file(self):
@@ -958,10 +1461,12 @@ class AutoBreak:
         # Get the number extensions
         number_extensions = [int(x[-4:]) for x in potential_directories]
 
-        # Get the counter
+        # Get the counter, reuse the last directory to resume a run
         self.output_counter = 1
         if len(number_extensions) > 0:
             self.output_counter = max(number_extensions) + 1
+            if self.resume:
+                self.output_counter = max(number_extensions)
 
         # Check the output directory
         if output_directory is None:
@@ -1258,6 +1763,13 @@ class AutoBreak:
         outdir = self.output_directory
 
         self.autobreak_log = os.path.join(outdir, "intermediates", name + ".log")
+
+        # Checkpoint files are shared by the runs in the output directory,
+        # they are only written for resumed and permutation runs
+        if self.resume or self.permute_sequence:
+            self.checkpoint_file = os.path.join(
+                outdir, "intermediates", root + "_checkpoint.jsonl"
+            )
         logging.basicConfig(
             filename=self.autobreak_log,
             encoding="utf-8",
@@ -1344,6 +1856,69 @@ class AutoBreak:
         """Set k-select value"""
         self.k_select = k_parameter
 
+    def set_num_jobs(self, num_jobs=1):
+        """Set number of worker processes"""
+        self.num_jobs = num_jobs
+
+    def set_random_seed(self, random_seed=0):
+        """Set random seed"""
+        self.random_seed = random_seed
+
+    def set_solution_cache_size(self, max_size=4096):
+        """Set maximum number of oligo solution lists in the cache"""
+        self.solution_cache.max_size = max_size
+
+    def set_design_cache(self, cache_dir=None, max_megabytes=512):
+        """Set design cache directory and its maximum size"""
+        self.design_cache.cache_dir = cache_dir
+        self.design_cache.max_megabytes = max_megabytes
+
+    def use_solution_cache(self):
+        """Oligo solutions are cached only if the path search is deterministic"""
+        return self.solution_cache.max_size > 0 and (
+            self.k_select == "best" or self.NUM_OLIGO_SOLUTIONS <= 1
+        )
+
+    def report_solution_cache(self):
+        """Report cache hit and miss counts"""
+        if not self.use_solution_cache():
+            return
+
+        summary = self.solution_cache.get_summary()
+        print(summary)
+        logging.info(summary)
+
+    def set_circular_solver(self, circular_solver="all"):
+        """Set circular oligo solver"""
+        self.circular_solver = circular_solver
+
+    def set_group_solver(self, group_solver="stepwise"):
+        """Set oligo group solver"""
+        self.group_solver = group_solver
+
+    def set_refine_moves(self, refine_moves=0, refine_seconds=0):
+        """
+        Set the refinement moves and time limit, without moves the moves are
+        derived once from the time limit
+        """
+        self.refine_seconds = refine_seconds
+        self.refine_moves = refine_moves
+        if refine_moves == 0 and refine_seconds > 0:
+            self.refine_moves = int(refine_seconds * self.REFINE_MOVES_PER_SECOND)
+
+    def set_prune(self, prune_num=0):
+        """Set number of best offsets kept exact by bound pruning"""
+        self.prune_num = prune_num
+
+    def set_resume(self, resume=False):
+        """Set resume parameter"""
+        self.resume = resume
+
+    def set_prescreen(self, prescreen_num=0, prescreen_metric="TotalScore"):
+        """Set number of offsets kept after the prescreen and the prescreen metric"""
+        self.prescreen_num = prescreen_num
+        self.prescreen_metric = prescreen_metric
+
     def set_break_rule(self, new_break_rule=["xstap", "all2"]):
         """Set break rule"""
         self.break_rule = [rule for rule in new_break_rule]
@@ -1369,8 +1944,34 @@ class AutoBreak:
             # Update graph edge weights
             self.update_edge_weights()
 
-    def permute_scaffold_sequence_autobreak(self, nitr=100):
-        """Permute scaffold sequence"""
+        # Strand sequences match the edge parameters
+        self.sequence_stale = False
+
+    def rescore_scaffold_offset(self, offset=0):
+        """
+        Update edge weights for a new sequence offset from the edge table
+        Strand sequences are not updated and are refreshed before export
+        """
+        # Get edge parameters and weights for the offset
+        edge_params = self.edge_table.get_offset_params(
+            [offset], self.optim_temperature_kelvin
+        )
+        edge_weights = self.optimize(edge_params)
+
+        # Assign the parameters to the edges
+        self.edge_table.assign_offset_params(edge_params, edge_weights, 0)
+
+        # Set the current offset
+        self.origami.sequence_offset = offset
+        self.sequence_stale = True
+
+    def refresh_scaffold_sequence(self, offset=0):
+        """Apply the sequence at offset if the strand sequences are not up to date"""
+        if self.sequence_stale or self.origami.sequence_offset != offset:
+            self.shift_scaffold_sequence(offset)
+
+    def get_permutation_offsets(self, nitr=100):
+        """Get the sequence offsets of the permutation iterations"""
         # Set start offset
         start_offset = self.origami.sequence_offset
 
@@ -1382,178 +1983,952 @@ class AutoBreak:
             if nitr < final_itr:
                 final_itr = nitr
 
-        for itr in range(0, final_itr):
+        return [
+            (start_offset + itr) % self.origami.scaffolds[0].length()
+            for itr in range(0, final_itr)
+        ]
+
+    def permute_scaffold_sequence_autobreak(self, nitr=100):
+        """Permute scaffold sequence"""
+        offsets = self.get_permutation_offsets(nitr)
+
+        # Keep the most promising offsets from the readonly model
+        if 0 < self.prescreen_num < len(offsets):
+            offsets = self.prescreen_offsets(offsets)
+
+        # Skip the offsets completed in an earlier run
+        completed_offsets = self.load_checkpoint()
+        offsets = [offset for offset in offsets if offset not in completed_offsets]
+
+        # Bound the offsets and solve the most promising ones first
+        num_offsets = len(offsets)
+        if self.prune_num > 0:
+            offsets = self.prepare_offset_pruning(offsets)
+
+        # Shard the offsets over worker processes
+        if self.num_jobs > 1 and len(offsets) > 1 and self.use_offset_workers():
+            self.permute_offsets_parallel(offsets)
+            if self.prune_num > 0:
+                self.report_pruned_offsets(offsets, num_offsets)
+            return
+
+        for current_offset in offsets:
 
             # for itr in tqdm(range(0, final_itr), desc='Permutation loop', leave=False,
             #                 dynamic_ncols=True, bar_format='{desc}: {percentage:3.2f}%|'+'{bar}',
             #                 file=self.origami.tqdm_output_file):
 
-            # Set the current offset
-            current_offset = (start_offset + itr) % self.origami.scaffolds[0].length()
-
-            # Shift the sequence to the offset
-            self.shift_scaffold_sequence(current_offset)
-
-            # Run autobreak
-            self.run_autobreak()
+            # Run autobreak at the offset
+            self.solve_offset(current_offset)
 
             # Write results
             if self.write_all_results:
                 self.write_results(current_offset)
 
+            # Save the offset to the checkpoint
+            self.write_checkpoint(current_offset)
+
+        # Report the pruned offsets
+        if self.prune_num > 0:
+            self.report_pruned_offsets(offsets, num_offsets)
+
     def permute_scaffold_sequence_readonly(self, nitr=100):
         """Permute scaffold sequence"""
-        # Set start offset
-        start_offset = self.origami.sequence_offset
+        offsets = self.get_permutation_offsets(nitr)
 
-        # Set final offset
-        final_itr = 1
-        if self.permute_sequence:
-            final_itr = len(self.origami.scaffold_sequence)
-            # Check the number of permutation iterations allowed
-            if nitr < final_itr:
-                final_itr = nitr
+        # Score all offsets at once from the scaffold ranges if possible
+        self.readonly_score_frame, best_offset = self.get_readonly_score_frame(offsets)
+        if self.readonly_score_frame is not None:
+            logging.info(f"Best readonly offset: {best_offset}")
+            self.add_readonly_solutions(self.readonly_score_frame)
+            return
 
-        for itr in range(0, final_itr):
+        # Shard the offsets over worker processes
+        if self.num_jobs > 1 and len(offsets) > 1 and self.use_offset_workers():
+            self.permute_readonly_offsets_parallel(offsets)
+            return
+
+        for current_offset in offsets:
             # for itr in tqdm(range(0, final_itr), desc='Permutation loop', leave=False,
             #                 dynamic_ncols=True, bar_format='{desc}: {percentage:3.2f}%|'+'{bar}',
             #                 file=self.origami.tqdm_output_file):
 
-            # Set the current offset
-            current_offset = (start_offset + itr) % self.origami.scaffolds[0].length()
-
             # Shift the sequence to the offset
             self.shift_scaffold_sequence(current_offset)
 
             # Determine scores and add the solution to solutions list
             self.determine_readonly_scores()
 
-    def run_autobreak(self):
-        """Run basic autobreak protocol"""
-
-        # Create stepwise group solutions
-        self.create_stepwise_group_solutions()
-
-        # Sort and print group solutions
-        self.sort_group_solutions()
+    def build_end_to_end_table(self):
+        """Edge table with one end to end edge for each staple oligo"""
+        end_to_end_table = BreakEdgeTable()
+        end_to_end_table.initialize(self, self.origami)
 
-        # Combine group solutions
-        self.combine_group_solutions()
+        for oligo in self.origami.oligos["staple"]:
+            # Make the connection
+            if oligo.circular:
+                start_break = oligo.breaks[0]
+                final_break = oligo.breaks[0]
+            else:
+                start_break = oligo.start_break
+                final_break = oligo.final_break
 
-    def determine_oligo_scores(self):
-        """Determine oligo scores from design"""
-        # Make break-break graph
-        self.origami.prepare_origami()
+            end_to_end_table.add_edge(
+                start_break, final_break, start_break.get_break_distance(final_break)
+            )
 
-        # Determine initial scores
-        self.determine_initial_scores()
+        end_to_end_table.finalize()
+        return end_to_end_table
 
-    def create_independent_group_solutions(self):
+    def get_readonly_score_frame(self, offsets, chunk_size=256):
         """
-        Create independent group solution
-        No temporary neighbor constraints are imposed during run
+        Readonly scores of the staples at each offset from the scaffold ranges
+
+        Returns a data frame indexed by sequence offset with (parameter, oligo key)
+        columns for LogProbFold, Tf, dGtotal and EdgeWeight, the totals under
+        (Total, TotalScore/TotalNormScore/TotalProb), and the best offset.
+        Returns None if the edges can't be rescored from the scaffold ranges.
         """
+        end_to_end_table = self.build_end_to_end_table()
+        if not end_to_end_table.offset_rescoring:
+            return None, None
+
+        # 1. Score the end to end edges for chunks of offsets
+        num_offsets = len(offsets)
+        score_matrices = {
+            "LogProbFold": np.zeros((num_offsets, end_to_end_table.num_edges)),
+            "Tf": np.zeros((num_offsets, end_to_end_table.num_edges)),
+            "dGtotal": np.zeros((num_offsets, end_to_end_table.num_edges)),
+            "EdgeWeight": np.zeros((num_offsets, end_to_end_table.num_edges)),
+        }
+        for start in range(0, num_offsets, chunk_size):
+            end = start + chunk_size
+            edge_params = end_to_end_table.get_offset_params(
+                offsets[start:end], self.optim_temperature_kelvin
+            )
+            score_matrices["LogProbFold"][start:end] = edge_params.edge_logprob
+            score_matrices["Tf"][start:end] = edge_params.edge_Tf
+            score_matrices["dGtotal"][start:end] = edge_params.dG_total
+            score_matrices["EdgeWeight"][start:end] = self.optimize(edge_params)
+
+        # 2. Totals for each offset
+        total_scores = np.sum(score_matrices["EdgeWeight"], axis=1)
+        total_dsDNA_length = np.sum(end_to_end_table.dsDNA_length)
+        totals = {
+            "TotalScore": total_scores,
+            "TotalNormScore": total_scores / total_dsDNA_length,
+            "TotalProb": np.exp(np.sum(score_matrices["LogProbFold"], axis=1)),
+            "TotalDsDNALength": np.full(num_offsets, total_dsDNA_length),
+        }
 
-        # Break oligos
-        self.create_oligo_solutions()
+        # 3. Make the data frame
+        oligo_keys = ["%d.%d.%d" % oligo.key for oligo in self.origami.oligos["staple"]]
+        offset_index = pd.Index(offsets, name="SequenceOffset")
+        score_frame = pd.concat(
+            [
+                pd.DataFrame(
+                    score_matrices[param], index=offset_index, columns=oligo_keys
+                )
+                for param in score_matrices
+            ]
+            + [pd.DataFrame(totals, index=offset_index)],
+            axis=1,
+            keys=list(score_matrices) + ["Total"],
+        )
 
-        # Create group solutions
-        self.combine_oligo_solutions()
+        # Best offset by total score
+        best_offset = offsets[int(np.argmax(total_scores))]
 
-    def create_stepwise_group_solutions(self):
-        """Main function for solution determination"""
+        return score_frame, best_offset
 
-        for oligo_group in self.origami.oligo_groups:
+    def get_readonly_offset_scores(self, offsets):
+        """Readonly total scores and normalized total scores at each offset"""
+        score_frame, best_offset = self.get_readonly_score_frame(offsets)
+        if score_frame is not None:
+            return (
+                score_frame[("Total", "TotalScore")].to_numpy(),
+                score_frame[("Total", "TotalNormScore")].to_numpy(),
+            )
 
-            # for oligo_group in tqdm(self.origami.oligo_groups, desc='Main loop ',
-            #                         dynamic_ncols=True, bar_format='{l_bar}{bar}',
-            #                         file=self.origami.tqdm_output_file):
+        # Score one offset at a time if the edges can't be rescored
+        end_to_end_table = self.build_end_to_end_table()
+        total_dsDNA_length = np.sum(end_to_end_table.dsDNA_length)
+        total_scores = []
+        for offset in offsets:
+            self.origami.apply_sequence(offset)
+            self.origami.assign_strands_dna()
+            self.origami.update_sequences_dna()
+            end_to_end_table.update_edges()
+            total_scores.append(np.sum(end_to_end_table.edge_weight))
+
+        # Strand sequences don't match the edge parameters
+        self.sequence_stale = True
+
+        total_scores = np.array(total_scores)
+        return total_scores, total_scores / total_dsDNA_length
+
+    def prescreen_offsets(self, offsets):
+        """Keep the offsets with the best readonly scores, in sweep order"""
+        total_scores, total_norm_scores = self.get_readonly_offset_scores(offsets)
+
+        # Get the prescreen metric, higher is better
+        if self.prescreen_metric == "TotalNormScore":
+            metric = total_norm_scores
+        else:
+            metric = total_scores
 
-            # Sort oligos by length
-            oligo_group.sort_oligos_by_length(reverse=True)
+        best_indices = np.sort(np.argsort(-metric, kind="stable")[: self.prescreen_num])
+        prescreened_offsets = [offsets[i] for i in best_indices]
 
-            # Create solutions via stepwise approach
-            oligo_group.create_stepwise_oligo_solutions(
-                self.NUM_OLIGO_SOLUTIONS,
-                self.NUM_GLOBAL_SOLUTIONS,
-                self.optim_pick_method,
-                self.optim_shuffle_oligos,
-                verbose=self.verbose_output,
-            )
+        message = "Prescreen: kept %d of %d offsets by %s" % (
+            len(prescreened_offsets),
+            len(offsets),
+            self.prescreen_metric,
+        )
+        print(message)
+        logging.info(message)
+        logging.info(f"Prescreened offsets: {prescreened_offsets}")
 
-            # Remove incomplete solutions
-            oligo_group.remove_incomplete_solutions()
+        return prescreened_offsets
 
-    def update_edge_weights(self):
-        """Update edge weights"""
-        for oligo in self.origami.oligos["staple"]:
-            # Visit each break object
-            for current_break in oligo.breaks:
-                # Iterate over the break edges
-                for break_edge in current_break.break_edges:
-                    # Update edge weights
-                    break_edge.update_connection()
+    def solve_offset(self, offset):
+        """
+        Run autobreak at a sequence offset with the random seed of the offset
+        unless its score bound is pruned
+        """
+        # Skip the offset before the shift if its bound is known
+        score_bound = self.offset_bounds.get(offset)
+        if score_bound is not None and self.is_offset_pruned(score_bound):
+            logging.info(f"Pruned offset {offset} with score bound {score_bound}")
+            return
 
-    def initialize(self):
-        """Initialize the connectivity maps"""
+        # Shift the sequence to the offset, rescore edges directly if possible
+        if self.edge_table.offset_rescoring and not self.write_all_results:
+            self.rescore_scaffold_offset(offset)
+        else:
+            self.shift_scaffold_sequence(offset)
 
-        for oligo in self.origami.oligos["staple"]:
-            # Check oligo length, if the length is within length limits dont break it
-            if oligo.length < self.LOWER_BOUND:
-                oligo.dont_break = True
+        # Bound the scores with the edge weights at the offset
+        if self.prune_num > 0 and score_bound is None:
+            score_bound = float(self.get_score_bound())
+            if self.is_offset_pruned(score_bound):
+                logging.info(f"Pruned offset {offset} with score bound {score_bound}")
+                return
 
-            # Visit each break object
-            for current_break in oligo.breaks:
-                # Initialize the break edges
-                current_break.break_edges = []
+        # Every offset starts from the same oligo order and the seed of the
+        # offset, so the solution doesn't depend on the order offsets are solved
+        for oligo_group in self.origami.oligo_groups:
+            oligo_group.reset_oligo_order()
+        random.seed(self.get_offset_seed(offset))
 
-                # Get next break
-                next_break = current_break.next_break
-                # Iterate over the breaks
-                while next_break:
+        # Run autobreak
+        self.run_autobreak()
 
-                    # Determine break to break distance
-                    break_distance = current_break.get_break_distance(next_break)
+        # Keep the scores of the best offsets
+        if self.prune_num > 0 and offset in self.complete_solutions:
+            self.add_prune_score(self.complete_solutions[offset].total_score)
 
-                    if (
-                        break_distance >= self.LOWER_BOUND
-                        and break_distance <= self.UPPER_BOUND
-                    ):
-                        # Create break
-                        new_edge = BreakEdge()
+    def get_score_bound(self, edge_weights=None):
+        """
+        Upper bound for the total score of the solutions from the best paths of
+        the oligos, edge weights can be an edges x offsets array
+        """
+        score_bound = 0
+        for oligo_group in self.origami.oligo_groups:
+            for oligo in oligo_group.oligos:
+                if oligo.dont_break:
+                    continue
 
-                        # Assign origami
-                        new_edge.origami = self.origami
+                # Only complete solutions are kept, so every oligo needs a path
+                score_bound = score_bound + oligo.get_score_bound(edge_weights)
 
-                        # Assign autobreak
-                        new_edge.autobreak = self
+        return score_bound
 
-                        # Assign edge length
-                        new_edge.edge_length = break_distance
+    def get_offset_bounds(self, offsets, chunk_size=64):
+        """Score bounds for the offsets from the edge table, empty if not possible"""
+        # Bounds have to use the edge weights the offsets are solved with
+        if not self.edge_table.offset_rescoring or self.write_all_results:
+            return {}
 
-                        # Make the connection
-                        new_edge.make_connection(current_break, next_break)
+        offset_bounds = {}
+        for chunk_start in range(0, len(offsets), chunk_size):
+            chunk_offsets = offsets[chunk_start : chunk_start + chunk_size]
+            edge_params = self.edge_table.get_offset_params(
+                chunk_offsets, self.optim_temperature_kelvin
+            )
 
-                        # Make loop edge
-                        new_edge.make_loop_edge()
+            # Edge rows for the path scores
+            edge_weights = np.ascontiguousarray(
+                np.broadcast_to(
+                    self.optimize(edge_params),
+                    (len(chunk_offsets), self.edge_table.num_edges),
+                ).T
+            )
+            score_bounds = np.broadcast_to(
+                self.get_score_bound(edge_weights), len(chunk_offsets)
+            )
+            offset_bounds.update(zip(chunk_offsets, score_bounds.tolist()))
 
-                        # Set edge weight
-                        new_edge.edge_weight = self.optimize(new_edge)
+        return offset_bounds
 
-                        # Add directed edge to current break's edges
-                        current_break.break_edges.append(new_edge)
+    def prepare_offset_pruning(self, offsets):
+        """Bound the offsets and sort them by decreasing score bound"""
+        # Start from the offsets of an earlier run
+        self.prune_scores = []
+        for complete_solution in self.complete_solutions.values():
+            self.add_prune_score(complete_solution.total_score)
 
-                        # Add break edge to edge map
-                        self.origami.break_edge_map[
-                            current_break.key + next_break.key
-                        ] = new_edge
+        self.offset_bounds = self.get_offset_bounds(offsets)
+        return sorted(
+            offsets, key=lambda offset: -self.offset_bounds.get(offset, np.inf)
+        )
 
-                    # Stop criteria
-                    if break_distance > self.UPPER_BOUND or next_break == current_break:
+    def add_prune_score(self, total_score):
+        """Add a total score to the best scores used for pruning"""
+        if len(self.prune_scores) < self.prune_num:
+            heapq.heappush(self.prune_scores, total_score)
+        else:
+            heapq.heappushpop(self.prune_scores, total_score)
+
+    def is_offset_pruned(self, score_bound):
+        """Check if the score bound can't reach the best scores"""
+        if self.prune_num <= 0 or len(self.prune_scores) < self.prune_num:
+            return False
+
+        # Leave room for rounding in the path scores
+        worst_score = self.prune_scores[0]
+        return score_bound < worst_score - 1e-9 * max(1.0, abs(worst_score))
+
+    def report_pruned_offsets(self, offsets, num_offsets):
+        """Report the number of offsets pruned by their score bounds"""
+        num_pruned = sum(offset not in self.complete_solutions for offset in offsets)
+        message = "Pruning: %d of %d offsets pruned or incomplete" % (
+            num_pruned,
+            num_offsets,
+        )
+        print(message)
+        logging.info(message)
+
+    def use_offset_workers(self):
+        """Check if worker processes can be forked for the offset sweep"""
+        if "fork" in multiprocessing.get_all_start_methods():
+            return True
+
+        logging.warning("Fork is not available, offsets are processed serially")
+        return False
+
+    def get_offset_seed(self, offset):
+        """Random seed for a sequence offset from the random seed"""
+        seed_sequence = np.random.SeedSequence([self.random_seed, offset])
+        return int(seed_sequence.generate_state(1)[0])
+
+    def map_offsets(self, worker_function, offsets):
+        """
+        Map a worker function over shards of offsets in forked worker processes
+        Every worker owns a copy of the prepared design
+        """
+        global WORKER_AUTOBREAK
+
+        # Contiguous shards, several per worker to balance the load
+        num_shards = min(len(offsets), 4 * self.num_jobs)
+        offset_shards = [
+            shard.tolist() for shard in np.array_split(offsets, num_shards)
+        ]
+
+        # Offsets are solved serially within the workers, shard results are
+        # yielded in order as they finish
+        WORKER_AUTOBREAK = self
+        num_jobs = self.num_jobs
+        self.num_jobs = 1
+        try:
+            with multiprocessing.get_context("fork").Pool(num_jobs) as pool:
+                yield from pool.imap(worker_function, offset_shards, chunksize=1)
+        finally:
+            self.num_jobs = num_jobs
+            WORKER_AUTOBREAK = None
+
+    def permute_offsets_parallel(self, offsets):
+        """
+        Run autobreak for the offsets in worker processes
+
+        Each offset is solved with its own random seed, so the solutions don't
+        depend on the number of jobs.
+        """
+        for packed_solutions, num_hits, num_misses in self.map_offsets(
+            solve_offsets, offsets
+        ):
+            for offset, packed_solution in packed_solutions:
+                if packed_solution:
+                    self.complete_solutions[offset] = self.unpack_complete_solution(
+                        packed_solution
+                    )
+
+                # Save the offset to the checkpoint
+                self.write_checkpoint(offset)
+
+            # Add the cache counts of the worker processes
+            self.solution_cache.num_hits += num_hits
+            self.solution_cache.num_misses += num_misses
+
+        # Write results, edges are rescored at each offset
+        if self.write_all_results:
+            for current_offset in offsets:
+                if current_offset in self.complete_solutions:
+                    self.refresh_scaffold_sequence(current_offset)
+                    self.write_results(current_offset)
+
+    def permute_readonly_offsets_parallel(self, offsets):
+        """Determine readonly scores for the offsets in worker processes"""
+        for readonly_scores in self.map_offsets(score_readonly_offsets, offsets):
+            for offset, total_prob, total_score, total_dsDNA_length in readonly_scores:
+                # Create a Complete Break Solution object
+                new_complete_solution = CompleteBreakSolution()
+                new_complete_solution.total_prob = total_prob
+                new_complete_solution.total_score = total_score
+                new_complete_solution.sequence_offset = offset
+                new_complete_solution.total_dsDNA_length = total_dsDNA_length
+                new_complete_solution.total_norm_score = (
+                    1.0 * total_score / total_dsDNA_length
+                )
+                self.complete_solutions[offset] = new_complete_solution
+
+    def add_readonly_solutions(self, score_frame):
+        """Add complete solutions with the totals of the readonly score frame"""
+        totals = score_frame["Total"]
+        for offset, total_prob, total_score, total_dsDNA_length in zip(
+            totals.index,
+            totals["TotalProb"],
+            totals["TotalScore"],
+            totals["TotalDsDNALength"],
+        ):
+            # Create a Complete Break Solution object
+            new_complete_solution = CompleteBreakSolution()
+            new_complete_solution.total_prob = total_prob
+            new_complete_solution.total_score = total_score
+            new_complete_solution.sequence_offset = int(offset)
+            new_complete_solution.total_dsDNA_length = total_dsDNA_length
+            new_complete_solution.total_norm_score = (
+                1.0 * total_score / total_dsDNA_length
+            )
+            self.complete_solutions[int(offset)] = new_complete_solution
+
+    def load_checkpoint(self):
+        """
+        Load the offsets of the checkpoint if the run is resumed, otherwise start
+        a new checkpoint. Returns the completed offsets. Offsets are solved with
+        their own random seeds, so only the solutions are restored.
+        """
+        completed_offsets = set()
+        if self.checkpoint_file is None:
+            return completed_offsets
+
+        # Start a new checkpoint
+        if not self.resume or not os.path.isfile(self.checkpoint_file):
+            with open(self.checkpoint_file, "w") as f:
+                f.write(json.dumps({"args": self.get_checkpoint_args()}) + "\n")
+            return completed_offsets
+
+        with open(self.checkpoint_file) as f:
+            checkpoint_args = None
+            for line in f:
+                # Skip a partially written last line
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning("Skipped a broken checkpoint line")
+                    continue
+
+                # Solutions of other arguments can't be mixed with this run
+                if "args" in record:
+                    checkpoint_args = record["args"]
+                    if checkpoint_args != self.get_checkpoint_args():
+                        sys.exit(
+                            "Checkpoint %s was written with different arguments, "
+                            "run without --resume to start a new checkpoint"
+                            % (self.checkpoint_file)
+                        )
+                    continue
+                if checkpoint_args is None:
+                    sys.exit(
+                        "Checkpoint %s has no arguments, "
+                        "run without --resume to start a new checkpoint"
+                        % (self.checkpoint_file)
+                    )
+
+                # Restore the complete solution
+                offset = record["offset"]
+                if record["solution"]:
+                    self.complete_solutions[offset] = self.unpack_complete_solution(
+                        self.unpack_checkpoint_solution(offset, record["solution"])
+                    )
+                completed_offsets.add(offset)
+
+        message = "Resumed %d offsets from checkpoint" % (len(completed_offsets))
+        print(message)
+        logging.info(message)
+
+        return completed_offsets
+
+    def get_checkpoint_args(self):
+        """Arguments that change the solutions, output paths excluded"""
+        args_dict = getattr(self, "args_dict", {})
+        excluded_keys = (
+            "input",
+            "output",
+            "verbose",
+            "csv",
+            "writeall",
+            "resume",
+            "jobs",
+            "designcache",
+            "designcachemb",
+        )
+        return {
+            key: value for key, value in args_dict.items() if key not in excluded_keys
+        }
+
+    def write_checkpoint(self, offset):
+        """Append a finished offset to the checkpoint"""
+        if self.checkpoint_file is None:
+            return
+
+        # Chosen break keys and scores of the complete solution
+        checkpoint_solution = None
+        if offset in self.complete_solutions:
+            checkpoint_solution = self.pack_checkpoint_solution(
+                self.complete_solutions[offset]
+            )
+
+        with open(self.checkpoint_file, "a") as f:
+            f.write(
+                json.dumps({"offset": int(offset), "solution": checkpoint_solution})
+                + "\n"
+            )
+
+    def pack_checkpoint_solution(self, complete_solution):
+        """
+        Packed complete solution with break keys instead of break ids
+        Keys are converted to ints, numpy integers can't be written to json
+        """
+        breaks = self.edge_table.breaks
+
+        sequence_offset, packed_groups = self.pack_complete_solution(complete_solution)
+        checkpoint_groups = []
+        for group_key, packed_solution in packed_groups:
+            checkpoint_solution = None
+            if packed_solution:
+                checkpoint_solution = []
+                for oligo_key, break_solution in packed_solution:
+                    if break_solution:
+                        break_ids, edge_ids, scores, self_penalty = break_solution
+                        break_solution = {
+                            "breaks": [
+                                [int(x) for x in breaks[break_id].key]
+                                for break_id in break_ids
+                            ],
+                            "scores": [float(score) for score in scores],
+                            "self_penalty": int(self_penalty),
+                        }
+                    checkpoint_solution.append(
+                        ([int(x) for x in oligo_key], break_solution)
+                    )
+            checkpoint_groups.append((int(group_key), checkpoint_solution))
+
+        return checkpoint_groups
+
+    def unpack_checkpoint_solution(self, offset, checkpoint_groups):
+        """
+        Packed complete solution from the break keys of a checkpoint solution
+        Breaks at the ends of neighbor oligos share keys, so breaks are found by
+        oligo key and break key
+        """
+        break_ids = {
+            (current_break.oligo.key, current_break.key): current_break.break_id
+            for current_break in self.edge_table.breaks
+        }
+
+        packed_groups = []
+        for group_key, checkpoint_solution in checkpoint_groups:
+            packed_solution = None
+            if checkpoint_solution:
+                packed_solution = []
+                for oligo_key, break_solution in checkpoint_solution:
+                    oligo_key = tuple(oligo_key)
+                    if break_solution:
+                        break_solution = self.get_packed_path(
+                            [
+                                break_ids[(oligo_key, tuple(key))]
+                                for key in break_solution["breaks"]
+                            ],
+                            break_solution["scores"],
+                            break_solution["self_penalty"],
+                        )
+                    packed_solution.append((oligo_key, break_solution))
+            packed_groups.append((group_key, packed_solution))
+
+        return (offset, packed_groups)
+
+    def get_packed_path(self, path_break_ids, scores, self_penalty):
+        """Packed oligo solution with the edge ids between consecutive breaks"""
+        edge_ids = [
+            self.edge_table.get_edge_id(from_break_id, to_break_id)
+            for from_break_id, to_break_id in zip(
+                path_break_ids[:-1], path_break_ids[1:]
+            )
+        ]
+        return (path_break_ids, edge_ids, scores, self_penalty)
+
+    def pack_complete_solution(self, complete_solution):
+        """Pack a complete solution as its offset and packed group solutions"""
+        packed_groups = []
+        for group_key, group_solution in complete_solution.group_solutions.items():
+            if group_solution:
+                group_solution = self.pack_group_solutions([group_solution])[0]
+            packed_groups.append((group_key, group_solution))
+
+        return (complete_solution.sequence_offset, packed_groups)
+
+    def unpack_complete_solution(self, packed_solution):
+        """Make a complete solution from a packed complete solution"""
+        sequence_offset, packed_groups = packed_solution
+
+        # Make new complete solution
+        new_complete_solution = CompleteBreakSolution()
+        new_complete_solution.group_solutions = {}
+        new_complete_solution.sequence_offset = sequence_offset
+
+        for group_key, group_solution in packed_groups:
+            if group_solution:
+                group_solution = self.unpack_group_solutions([group_solution])[0]
+            new_complete_solution.group_solutions[group_key] = group_solution
+
+        # Calculate the total score and penalty for the complete solution
+        new_complete_solution.calculate_total_score()
+
+        return new_complete_solution
+
+    def run_autobreak(self):
+        """Run basic autobreak protocol"""
+        # Cached solutions are only valid for the current edge weights
+        self.solution_cache.clear()
+
+        # Create group solutions
+        if self.group_solver == "milp":
+            self.create_milp_group_solutions()
+        else:
+            self.create_stepwise_group_solutions()
+
+        # Sort and print group solutions
+        self.sort_group_solutions()
+
+        # Refine the best group solutions
+        if self.refine_moves > 0:
+            self.refine_group_solutions()
+
+        # Combine group solutions
+        self.combine_group_solutions()
+
+    def determine_oligo_scores(self):
+        """Determine oligo scores from design"""
+        # Make break-break graph
+        self.origami.prepare_origami()
+
+        # Determine initial scores
+        self.determine_initial_scores()
+
+    def create_independent_group_solutions(self):
+        """
+        Create independent group solution
+        No temporary neighbor constraints are imposed during run
+        """
+
+        # Break oligos
+        self.create_oligo_solutions()
+
+        # Create group solutions
+        self.combine_oligo_solutions()
+
+    def create_stepwise_group_solutions(self):
+        """Main function for solution determination"""
+        # Farm the oligo groups out to worker processes
+        if self.num_jobs > 1:
+            self.create_parallel_group_solutions()
+            return
+
+        for oligo_group in self.origami.oligo_groups:
+
+            # for oligo_group in tqdm(self.origami.oligo_groups, desc='Main loop ',
+            #                         dynamic_ncols=True, bar_format='{l_bar}{bar}',
+            #                         file=self.origami.tqdm_output_file):
+
+            self.create_group_solutions(oligo_group)
+
+    def create_milp_group_solutions(self):
+        """
+        Create the best group solutions by mixed-integer programming
+        Groups without a conflict free solution are solved stepwise
+        """
+        for oligo_group in self.origami.oligo_groups:
+            new_group_solution = oligo_group.create_milp_group_solution(
+                self.NUM_OLIGO_SOLUTIONS, verbose=self.verbose_output
+            )
+
+            if new_group_solution is None:
+                self.create_group_solutions(oligo_group)
+                continue
+
+            oligo_group.group_solutions = [new_group_solution]
+
+            # Remove incomplete solutions
+            oligo_group.remove_incomplete_solutions()
+
+    def create_group_solutions(self, oligo_group):
+        """
+        Create stepwise solutions for an oligo group
+        The samples are seeded as in the worker processes, so the solutions
+        don't depend on the number of jobs
+        """
+        # Create solutions via stepwise approach
+        oligo_group.create_stepwise_oligo_solutions(
+            self.NUM_OLIGO_SOLUTIONS,
+            self.NUM_GLOBAL_SOLUTIONS,
+            self.optim_pick_method,
+            self.optim_shuffle_oligos,
+            verbose=self.verbose_output,
+            sample_seeds=self.get_sample_seeds(oligo_group),
+        )
+
+        # Restore the oligo order
+        oligo_group.reset_oligo_order()
+
+        # Remove incomplete solutions
+        oligo_group.remove_incomplete_solutions()
+
+    def get_sample_seed(self, oligo_group, sample_index):
+        """Random seed for a group solution sample from the random seed, sequence offset and group key"""
+        seed_sequence = np.random.SeedSequence(
+            [
+                self.random_seed,
+                self.origami.sequence_offset,
+                oligo_group.key,
+                sample_index,
+            ]
+        )
+        return int(seed_sequence.generate_state(1)[0])
+
+    def get_sample_seeds(self, oligo_group):
+        """Random seeds for all group solution samples of an oligo group"""
+        return [
+            self.get_sample_seed(oligo_group, sample_index)
+            for sample_index in range(self.NUM_GLOBAL_SOLUTIONS)
+        ]
+
+    def create_parallel_group_solutions(self):
+        """
+        Create stepwise group solutions in worker processes
+
+        Every group solution sample starts from the same oligo order with its own
+        random seed, so the solutions don't depend on the number of jobs. The samples
+        of large groups are split over the workers, the other groups are solved by a
+        single worker. Groups are processed in the current process if fork is not
+        available.
+        """
+        global WORKER_AUTOBREAK
+
+        # Start the largest groups first
+        oligo_groups = self.origami.oligo_groups
+        group_order = sorted(
+            range(len(oligo_groups)),
+            key=lambda i: len(oligo_groups[i].breaks),
+            reverse=True,
+        )
+        total_breaks = sum(len(oligo_group.breaks) for oligo_group in oligo_groups)
+
+        # 1. Split the samples into tasks
+        sample_args = []
+        for i in group_order:
+            sample_seeds = self.get_sample_seeds(oligo_groups[i])
+
+            # Split the samples of the groups that would hold up a single worker
+            num_chunks = 1
+            if len(oligo_groups[i].breaks) * self.num_jobs >= total_breaks:
+                num_chunks = min(self.num_jobs, len(sample_seeds))
+
+            for chunk_seeds in np.array_split(sample_seeds, max(num_chunks, 1)):
+                sample_args.append((i, chunk_seeds.tolist()))
+
+        # 2. Create the samples
+        WORKER_AUTOBREAK = self
+        use_fork = "fork" in multiprocessing.get_all_start_methods()
+        try:
+            if use_fork:
+                with multiprocessing.get_context("fork").Pool(self.num_jobs) as pool:
+                    sample_results = pool.map(
+                        solve_group_samples, sample_args, chunksize=1
+                    )
+            else:
+                logging.warning(
+                    "Fork is not available, oligo groups are solved serially"
+                )
+                sample_results = [solve_group_samples(args) for args in sample_args]
+        finally:
+            WORKER_AUTOBREAK = None
+
+        # 3. Restore the group solutions in sample order
+        for oligo_group in oligo_groups:
+            oligo_group.group_solutions = []
+
+        for (i, chunk_seeds), sample_result in zip(sample_args, sample_results):
+            packed_solutions, num_hits, num_misses = sample_result
+            oligo_groups[i].group_solutions += self.unpack_group_solutions(
+                packed_solutions
+            )
+
+            # Add the cache counts of the worker processes
+            if use_fork:
+                self.solution_cache.num_hits += num_hits
+                self.solution_cache.num_misses += num_misses
+
+        # 4. Remove incomplete solutions
+        for oligo_group in oligo_groups:
+            oligo_group.reset_oligo_order()
+            oligo_group.remove_incomplete_solutions()
+
+    def pack_group_solutions(self, group_solutions):
+        """
+        Pack group solutions as break ids, edge ids and scores
+        Each group solution is a list of (oligo key, oligo solution) pairs
+        """
+        packed_solutions = []
+        for group_solution in group_solutions:
+            packed_solution = []
+            for oligo_key, break_solution in group_solution.break_solutions.items():
+                if break_solution:
+                    break_solution = (
+                        [
+                            current_break.break_id
+                            for current_break in break_solution.breaks
+                        ],
+                        [edge.edge_id for edge in break_solution.edges[:-1]],
+                        break_solution.scores,
+                        break_solution.self_penalty,
+                    )
+                packed_solution.append((oligo_key, break_solution))
+            packed_solutions.append(packed_solution)
+
+        return packed_solutions
+
+    def unpack_group_solutions(self, packed_solutions):
+        """Make group solutions from packed group solutions"""
+        breaks = self.edge_table.breaks
+
+        group_solutions = []
+        for packed_solution in packed_solutions:
+            # Initialize group break solution
+            new_group_solution = GroupBreaksolution()
+            new_group_solution.break_solutions = {}
+            new_group_solution.origami = self.origami
+
+            for oligo_key, break_solution in packed_solution:
+                if break_solution:
+                    break_ids, edge_ids, scores, self_penalty = break_solution
+                    path_breaks = [breaks[break_id] for break_id in break_ids]
+                    break_solution = path_breaks[0].create_break_solution(
+                        path_breaks[-1], path_breaks[:-1], edge_ids, scores[:-1]
+                    )
+                    break_solution.self_penalty = self_penalty
+
+                new_group_solution.break_solutions[oligo_key] = break_solution
+
+            # Calculate the penalties for each group solution
+            new_group_solution.calculate_penalty()
+
+            group_solutions.append(new_group_solution)
+
+        return group_solutions
+
+    def update_edge_weights(self):
+        """Update edge weights"""
+        # Rescore the edges from the scaffold ranges if possible
+        if self.edge_table.offset_rescoring:
+            self.rescore_scaffold_offset(self.origami.sequence_offset)
+        else:
+            self.edge_table.update_edges()
+
+    def initialize(self):
+        """Initialize the connectivity maps"""
+        # Initialize edge table
+        self.edge_table = BreakEdgeTable()
+        self.edge_table.initialize(self, self.origami)
+
+        # Get the edge table of an earlier run from the design cache
+        cache_key = self.design_cache.get_key(self)
+        cached_arrays = self.design_cache.load(cache_key)
+
+        for oligo in self.origami.oligos["staple"]:
+            # Check oligo length, if the length is within length limits dont break it
+            if oligo.length < self.LOWER_BOUND:
+                oligo.dont_break = True
+
+            # Edges are loaded from the cache
+            if cached_arrays is not None:
+                continue
+
+            # Visit each break object
+            for current_break in oligo.breaks:
+                # Initialize the edge end points
+                next_breaks = []
+                edge_lengths = []
+
+                # Get next break
+                next_break = current_break.next_break
+                # Iterate over the breaks
+                while next_break:
+
+                    # Determine break to break distance
+                    break_distance = current_break.get_break_distance(next_break)
+
+                    if (
+                        break_distance >= self.LOWER_BOUND
+                        and break_distance <= self.UPPER_BOUND
+                    ):
+                        # Add edge end point
+                        next_breaks.append(next_break)
+                        edge_lengths.append(break_distance)
+
+                    # Stop criteria
+                    if break_distance > self.UPPER_BOUND or next_break == current_break:
                         break
 
                     next_break = next_break.next_break
 
+                # Add directed edges to the edge table
+                self.edge_table.add_break_edges(
+                    current_break, next_breaks, edge_lengths
+                )
+
+        # Restore the edge table from the cache, weights depend on the run settings
+        if cached_arrays is not None:
+            self.edge_table.set_arrays(cached_arrays)
+            self.edge_table.edge_weight = np.array(
+                np.broadcast_to(
+                    self.optimize(self.edge_table), self.edge_table.num_edges
+                ),
+                dtype=float,
+            )
+            message = "Loaded %d break edges from the design cache" % (
+                self.edge_table.num_edges
+            )
+            print(message)
+            logging.info(message)
+            return
+
+        # Make the edge table columns
+        self.edge_table.finalize()
+
+        # Save the edge table to the design cache
+        self.design_cache.save(cache_key, self.edge_table.get_arrays())
+
     def reset_temp_neighbor_constraints(self):
         """Reset temporary neighbor constraints"""
         for oligo in self.origami.oligos["staple"]:
@@ -1750,6 +3125,36 @@ class AutoBreak:
             if self.verbose_output:
                 oligo_group.print_solutions()
 
+    def refine_group_solutions(self):
+        """
+        Refine the best score group solutions by simulated annealing
+        The moves and time limit are shared by the groups in proportion to their
+        break numbers
+        """
+        oligo_groups = [
+            oligo_group
+            for oligo_group in self.origami.oligo_groups
+            if oligo_group.best_score_solution
+        ]
+        total_breaks = sum(len(oligo_group.breaks) for oligo_group in oligo_groups)
+
+        for oligo_group in oligo_groups:
+            # Refine the best score solution
+            group_refiner = GroupSolutionRefiner()
+            group_refiner.initialize(
+                oligo_group, oligo_group.best_score_solution, self.NUM_OLIGO_SOLUTIONS
+            )
+            break_share = len(oligo_group.breaks) / total_breaks
+            refined_solution = group_refiner.refine(
+                max(int(self.refine_moves * break_share), 1),
+                self.refine_seconds * break_share,
+            )
+
+            # Add the refined solution and sort the solutions again
+            if refined_solution:
+                oligo_group.group_solutions.append(refined_solution)
+                oligo_group.sort_solutions()
+
     def combine_group_solutions(self):
         """Combine group solutions"""
 
@@ -1910,13 +3315,15 @@ class AutoBreak:
     def optimize(self, edge):
         """final optimization function"""
         score = 0
-        # Get the score for each function type
-        score_list = np.array([func(edge) for func in self.optimize_func_list])
+        # Get the score for each function type, edge parameters can be arrays
+        score_list = np.array(
+            np.broadcast_arrays(*[func(edge) for func in self.optimize_func_list])
+        )
 
         if "sum" in self.optim_score_functions:
-            score += np.sum(score_list)
+            score += np.sum(score_list, axis=0)
         if len(score_list) > 1 and "product" in self.optim_score_functions:
-            score += np.product(score_list)
+            score += np.prod(score_list, axis=0)
         return score
 
     def _optimize_structure(self, edge):
@@ -1941,7 +3348,7 @@ class AutoBreak:
 
     def _optimize_maxseq(self, edge):
         """Optimization function for N"""
-        return int(edge.edge_maxseq >= self.optim_params_dict["maxseq"][0])
+        return 1 * (edge.edge_maxseq >= self.optim_params_dict["maxseq"][0])
 
     def _optimize_Tm(self, edge):
         """Optimization function Tm"""
@@ -1996,54 +3403,633 @@ class AutoBreak:
         )
 
 
-class BreakEdge:
+class BreakEdgeArrays:
     def __init__(self):
-        """Break edge class"""
-        self.autobreak = None
-        self.origami = None
-        self.current_break = None
-        self.next_break = None
-        self.edge_weight = None
+        """Break edge parameters stored as arrays, scored with AutoBreak.optimize"""
         self.edge_length = None
         self.edge_maxseq = None
-        self.edge_Tm = None
-        self.LOW_TM = 60
-
-        # state parameters
-        self.active = True
-        self.valid = True
-
-        # Length parameters
         self.edge_has14 = None
-        self.edge_num14 = None
-
         self.edge_has16 = None
-        self.edge_num16 = None
-
-        # Tm parameters
-        self.edge_hasTm = None
+        self.edge_structure = None
+
+        # Sequence dependent parameters
+        self.dG_total = None
+        self.dH_total = None
+        self.dS_total = None
+        self.edge_prob = None
+        self.edge_logprob = None
+        self.edge_Tf = None
+        self.edge_maxTm = None
         self.edge_numTm = None
+        self.edge_hasTm = None
 
-        self.sequence_list = None
+        # Segment parameters
+        self.segment_dG = None
+        self.segment_dH = None
+        self.segment_dS = None
+        self.segment_Tm = None
+
+
+class BreakEdgeTable:
+    # Per-edge parameters stored as table columns
+    EDGE_COLUMNS = (
+        "edge_length",
+        "edge_maxseq",
+        "edge_has14",
+        "edge_has16",
+        "edge_structure",
+        "dsDNA_length",
+        "dG_total",
+        "dH_total",
+        "dS_total",
+        "edge_prob",
+        "edge_logprob",
+        "edge_Tf",
+        "edge_maxTm",
+        "edge_numTm",
+        "edge_hasTm",
+        "edge_weight",
+        "valid",
+        "isloop",
+    )
 
-        # Loop parameter
-        self.isloop = False
+    # Edge structure and offset independent energies kept in the design cache
+    CACHE_COLUMNS = (
+        "from_break_ids",
+        "to_break_ids",
+        "break_edge_starts",
+        "break_edge_ends",
+        "dG_inter",
+        "dS_inter",
+        "dG_conc",
+        "dS_conc",
+    )
 
-        # Output/plot parameters
-        self.csv_params = {}
+    def __init__(self):
+        """
+        Parallel arrays over all break edges
 
-    def create_csv_params(self):
+        The table is the only store of the break edges. Edge parameters are kept
+        as columns, edges leaving a break are a contiguous id range, and BreakEdgeView
+        objects are only created for edges that end up in solutions.
+
+        All edges are evaluated together from their dsDNA segments, without creating
+        per-edge objects. The segments are stored as scaffold ranges so that edge
+        energies for any sequence offset are computed from the scaffold thermodynamic
+        table in a single vectorized pass, with the loop and concentration terms that
+        only depend on scaffold positions kept from the edge evaluation.
         """
-        Create params dictionary from thermodynamic parameters
+        self.autobreak = None
+        self.origami = None
+        self.num_edges = 0
+
+        # Break nodes by break id
+        self.breaks = []
+
+        # Edge end points and the edge ids leaving each break
+        self.from_break_ids = None
+        self.to_break_ids = None
+        self.break_edge_starts = None
+        self.break_edge_ends = None
+
+        # Edge state
+        self.active = None
+
+        # Edge views created for solutions
+        self.edge_views = {}
+
+        # Offset rescoring is possible only if every edge has scaffold ranges
+        self.offset_rescoring = False
+
+        # Segments of edge i are [segment_ptr[i], segment_ptr[i+1])
+        self.segment_ptr = None
+        self.segment_starts = None
+        self.segment_lengths = None
+
+        # Offset independent energies
+        self.dG_inter = None
+        self.dS_inter = None
+        self.dG_conc = None
+        self.dS_conc = None
+
+        # Row lists used while the table is built
+        self.rows = None
+
+        # Edge parameter columns
+        for column in self.EDGE_COLUMNS:
+            setattr(self, column, None)
+
+    def initialize(self, autobreak, origami):
+        """Initialize an empty table for the origami break nodes"""
+        self.autobreak = autobreak
+        self.origami = origami
+        self.num_edges = 0
+        self.edge_views = {}
+
+        # Break nodes by break id
+        self.breaks = sorted(origami.breaks, key=lambda x: x.break_id)
+        self.break_edge_starts = np.zeros(len(self.breaks), dtype=np.int64)
+        self.break_edge_ends = np.zeros(len(self.breaks), dtype=np.int64)
+
+        # Row lists
+        self.rows = {
+            column: [] for column in ("from_break_ids", "to_break_ids", "edge_length")
+        }
 
-        COLUMNS
-         1.  Oligo key
-         2.  Oligo Group key
-         3.  Break 1 key
-         4.  Break 1 type
-         5.  Break 1 location
-         6.  Break 2 key
-         7.  Break 2 type
+    def create_edge(self, from_break, to_break, edge_length):
+        """Create and evaluate a single break edge, used for the edge details"""
+        new_edge = BreakEdge()
+
+        # Assign origami and autobreak
+        new_edge.origami = self.origami
+        new_edge.autobreak = self.autobreak
+
+        # Assign edge length
+        new_edge.edge_length = edge_length
+
+        # Make the connection
+        new_edge.make_connection(from_break, to_break)
+
+        return new_edge
+
+    def add_break_edges(self, from_break, to_breaks, edge_lengths):
+        """Add the edges leaving a break"""
+        from_break.loop_edge_id = None
+        self.break_edge_starts[from_break.break_id] = self.num_edges
+
+        for to_break, edge_length in zip(to_breaks, edge_lengths):
+            # Set loop edge
+            if to_break == from_break:
+                from_break.loop_edge_id = self.num_edges
+
+            self.add_edge(from_break, to_break, edge_length)
+
+        self.break_edge_ends[from_break.break_id] = self.num_edges
+
+    def add_edge(self, from_break, to_break, edge_length):
+        """Add an edge to the row lists"""
+        self.rows["from_break_ids"].append(from_break.break_id)
+        self.rows["to_break_ids"].append(to_break.break_id)
+        self.rows["edge_length"].append(edge_length)
+
+        self.num_edges += 1
+
+    def finalize(self):
+        """Convert the row lists to table columns and evaluate the edges"""
+        self.from_break_ids = np.array(self.rows["from_break_ids"], dtype=np.int64)
+        self.to_break_ids = np.array(self.rows["to_break_ids"], dtype=np.int64)
+        self.edge_length = np.array(self.rows["edge_length"], dtype=float)
+        self.isloop = self.from_break_ids == self.to_break_ids
+        self.active = np.ones(self.num_edges, dtype=bool)
+
+        # Release the row lists
+        self.rows = None
+
+        # Evaluate the edge columns
+        self.evaluate_edges()
+
+    def evaluate_edges(self):
+        """Evaluate the edge columns for the current strand sequences in one pass"""
+        # Get the temperature parameter for dG optimization
+        temperature_kelvin = self.autobreak.optim_temperature_kelvin
+        thermo_table = self.origami.thermo_table
+
+        # Segment lists, segments of an edge are contiguous
+        segment_edge_ids = []
+        segment_sequences = []
+        segment_in_table = []
+        table_starts = []
+        table_lengths = []
+        position_edge_ids = []
+        mean_positions = []
+        self.offset_rescoring = thermo_table is not None
+
+        # 1. Get the dsDNA segments of all edges
+        for edge_id in range(self.num_edges):
+            from_break = self.breaks[self.from_break_ids[edge_id]]
+            to_break = self.breaks[self.to_break_ids[edge_id]]
+            (
+                _,
+                _,
+                dsDNA_seq_list,
+                dsDNA_pos_list,
+            ) = from_break.get_segment_lists(to_break)
+
+            # Get the scaffold ranges of the dsDNA segments
+            scaffold_starts = None
+            if thermo_table is not None:
+                scaffold_starts, scaffold_lengths = thermo_table.get_segment_ranges(
+                    dsDNA_seq_list, dsDNA_pos_list
+                )
+            if scaffold_starts is None:
+                self.offset_rescoring = False
+            else:
+                table_starts.extend(scaffold_starts)
+                table_lengths.extend(scaffold_lengths)
+
+            segment_edge_ids.extend([edge_id] * len(dsDNA_seq_list))
+            segment_sequences.extend(dsDNA_seq_list)
+            segment_in_table.extend([scaffold_starts is not None] * len(dsDNA_seq_list))
+
+            # Mean values for the positions
+            position_edge_ids.extend([edge_id] * len(dsDNA_pos_list))
+            mean_positions.extend([np.round(np.mean(x)) for x in dsDNA_pos_list])
+
+        segment_edge_ids = np.array(segment_edge_ids, dtype=np.int64)
+        segment_in_table = np.array(segment_in_table, dtype=bool)
+        segment_lengths = np.array([len(dna) for dna in segment_sequences], dtype=float)
+        num_segments = np.bincount(segment_edge_ids, minlength=self.num_edges)
+
+        # 2. Determine Tm and intrinsic free energies for all segments at once
+        segment_dG = np.zeros(len(segment_sequences))
+        segment_dH = np.zeros(len(segment_sequences))
+        segment_dS = np.zeros(len(segment_sequences))
+        segment_Tm = np.zeros(len(segment_sequences))
+        if np.any(segment_in_table):
+            (
+                segment_dG[segment_in_table],
+                segment_dH[segment_in_table],
+                segment_dS[segment_in_table],
+                segment_Tm[segment_in_table],
+            ) = thermo_table.get_dG_dH_dS_Tm(
+                np.array(table_starts, dtype=np.int64),
+                np.array(table_lengths, dtype=np.int64),
+                self.origami.sequence_offset,
+                temperature_kelvin,
+            )
+        if not np.all(segment_in_table):
+            (
+                segment_dG[~segment_in_table],
+                segment_dH[~segment_in_table],
+                segment_dS[~segment_in_table],
+                segment_Tm[~segment_in_table],
+            ) = utilities.sequences_to_dG_dH_dS_Tm(
+                [
+                    dna
+                    for dna, in_table in zip(segment_sequences, segment_in_table)
+                    if not in_table
+                ],
+                temperature_kelvin,
+            )
+
+        # Get scaffold parameters
+        scaffold_length = self.origami.oligos["scaffold"][0].length
+        is_scaffold_circular = self.origami.oligos["scaffold"][0].circular
+
+        # 3. Determine interfacial coupling energies between consecutive segments of an edge
+        position_edge_ids = np.array(position_edge_ids, dtype=np.int64)
+        mean_positions = np.array(mean_positions, dtype=float)
+        is_pair = position_edge_ids[:-1] == position_edge_ids[1:]
+        dG_loop, dS_loop = utilities.positions_to_loop_dG(
+            scaffold_length,
+            mean_positions[:-1][is_pair],
+            mean_positions[1:][is_pair],
+            is_scaffold_circular,
+            temperature_kelvin,
+        )
+        pair_edge_ids = position_edge_ids[:-1][is_pair]
+        self.dG_inter = np.bincount(pair_edge_ids, dG_loop, minlength=self.num_edges)
+        self.dS_inter = np.bincount(pair_edge_ids, dS_loop, minlength=self.num_edges)
+
+        # 4. Get free energy due to concentration
+        dGconc, dSconc = utilities.conc_to_dG(temperature_kelvin)
+        self.dG_conc = np.full(self.num_edges, dGconc, dtype=float)
+        self.dS_conc = np.full(self.num_edges, dSconc, dtype=float)
+
+        # 5. Get total energies
+        self.dG_total = (
+            np.bincount(segment_edge_ids, segment_dG, minlength=self.num_edges)
+            + self.dG_inter
+            + self.dG_conc
+        )
+        self.dS_total = (
+            np.bincount(segment_edge_ids, segment_dS, minlength=self.num_edges)
+            + self.dS_inter
+            + self.dS_conc
+        )
+        self.dH_total = np.bincount(
+            segment_edge_ids, segment_dH, minlength=self.num_edges
+        )
+
+        # 6. Determine probabilities and log-probabilities
+        RT = utilities.R * temperature_kelvin
+        self.edge_prob = np.exp(-self.dG_total / RT) / (
+            1.0 + np.exp(-self.dG_total / RT)
+        )
+        self.edge_logprob = np.log(self.edge_prob)
+
+        # 7. Estimate Tf in °C (∆G = ∆H-T∆S, when ∆G is 0)
+        self.edge_Tf = self.dH_total / self.dS_total - 273.15
+
+        # Tm and length parameters, 0 for edges without dsDNA
+        self.edge_maxTm = np.full(self.num_edges, -np.inf)
+        np.maximum.at(self.edge_maxTm, segment_edge_ids, segment_Tm)
+        self.edge_maxTm[num_segments == 0] = 0
+
+        self.edge_maxseq = np.zeros(self.num_edges)
+        np.maximum.at(self.edge_maxseq, segment_edge_ids, segment_lengths)
+
+        self.dsDNA_length = np.bincount(
+            segment_edge_ids, segment_lengths, minlength=self.num_edges
+        )
+        self.edge_has14 = 1.0 * (
+            np.bincount(segment_edge_ids, segment_lengths >= 14, self.num_edges) > 0
+        )
+        self.edge_has16 = 1.0 * (
+            np.bincount(segment_edge_ids, segment_lengths >= 16, self.num_edges) > 0
+        )
+        self.edge_numTm = np.bincount(
+            segment_edge_ids, segment_Tm >= utilities.LOW_TM, self.num_edges
+        )
+        self.edge_hasTm = 1.0 * (self.edge_numTm > 0)
+
+        # Determine structure score
+        self.edge_structure = num_segments**2.0
+
+        # Edges without dsDNA are not valid
+        self.valid = num_segments > 0
+
+        # Segment arrays
+        if self.offset_rescoring:
+            self.segment_ptr = np.zeros(self.num_edges + 1, dtype=np.int64)
+            np.cumsum(num_segments, out=self.segment_ptr[1:])
+            self.segment_starts = np.array(table_starts, dtype=np.int64)
+            self.segment_lengths = np.array(table_lengths, dtype=np.int64)
+
+        # Set edge weights
+        self.edge_weight = np.array(
+            np.broadcast_to(self.autobreak.optimize(self), self.num_edges), dtype=float
+        )
+
+    def get_arrays(self):
+        """Get the table arrays for the design cache"""
+        arrays = {column: getattr(self, column) for column in self.EDGE_COLUMNS}
+        for column in self.CACHE_COLUMNS:
+            arrays[column] = getattr(self, column)
+
+        # Loop edges of the breaks, -1 if there is none
+        arrays["loop_edge_ids"] = np.array(
+            [
+                -1 if current_break.loop_edge_id is None else current_break.loop_edge_id
+                for current_break in self.breaks
+            ],
+            dtype=np.int64,
+        )
+
+        # Segment arrays
+        arrays["offset_rescoring"] = np.array(self.offset_rescoring)
+        if self.offset_rescoring:
+            arrays["segment_ptr"] = self.segment_ptr
+            arrays["segment_starts"] = self.segment_starts
+            arrays["segment_lengths"] = self.segment_lengths
+
+        return arrays
+
+    def set_arrays(self, arrays):
+        """Restore the table from the arrays of the design cache"""
+        for column in self.EDGE_COLUMNS + self.CACHE_COLUMNS:
+            setattr(self, column, arrays[column])
+        self.num_edges = len(self.from_break_ids)
+        self.active = np.ones(self.num_edges, dtype=bool)
+
+        # Loop edges of the breaks
+        for current_break, loop_edge_id in zip(self.breaks, arrays["loop_edge_ids"]):
+            current_break.loop_edge_id = None if loop_edge_id < 0 else int(loop_edge_id)
+
+        # Segment arrays
+        self.offset_rescoring = (
+            bool(arrays["offset_rescoring"]) and self.origami.thermo_table is not None
+        )
+        if self.offset_rescoring:
+            self.segment_ptr = arrays["segment_ptr"]
+            self.segment_starts = arrays["segment_starts"]
+            self.segment_lengths = arrays["segment_lengths"]
+
+        # Release the row lists
+        self.rows = None
+
+    def get_break_edge_ids(self, break_id):
+        """Return the ids of the edges leaving a break"""
+        return range(self.break_edge_starts[break_id], self.break_edge_ends[break_id])
+
+    def get_edge_id(self, from_break_id, to_break_id):
+        """Return the id of the edge between two breaks"""
+        edge_ids = self.get_break_edge_ids(from_break_id)
+        return edge_ids[
+            int(
+                np.flatnonzero(
+                    self.to_break_ids[edge_ids.start : edge_ids.stop] == to_break_id
+                )[0]
+            )
+        ]
+
+    def get_from_break(self, edge_id):
+        """Return the start break of an edge"""
+        return self.breaks[self.from_break_ids[edge_id]]
+
+    def get_to_break(self, edge_id):
+        """Return the final break of an edge"""
+        return self.breaks[self.to_break_ids[edge_id]]
+
+    def is_valid(self, edge_id):
+        """Determine if edge is valid"""
+        if not (self.valid[edge_id] and self.active[edge_id]):
+            return False
+
+        from_break = self.breaks[self.from_break_ids[edge_id]]
+        to_break = self.breaks[self.to_break_ids[edge_id]]
+        return not (
+            from_break.dont_break
+            or to_break.dont_break
+            or from_break.dont_break_temp
+            or to_break.dont_break_temp
+        )
+
+    def get_edge(self, edge_id):
+        """Return the view for an edge, create it if it doesn't exist"""
+        if edge_id not in self.edge_views:
+            self.edge_views[edge_id] = BreakEdgeView(self, edge_id)
+        return self.edge_views[edge_id]
+
+    def update_edges(self):
+        """Evaluate all edges for the current strand sequences"""
+        self.evaluate_edges()
+
+    def sum_segments(self, segment_values):
+        """Sum segment values for each edge, segments are along the last axis"""
+        cumsum = np.zeros(segment_values.shape[:-1] + (segment_values.shape[-1] + 1,))
+        np.cumsum(segment_values, axis=-1, out=cumsum[..., 1:])
+        return cumsum[..., self.segment_ptr[1:]] - cumsum[..., self.segment_ptr[:-1]]
+
+    def max_segments(self, segment_values, empty_value=0):
+        """Maximum segment value for each edge, segments are along the last axis"""
+        max_values = np.full(
+            segment_values.shape[:-1] + (self.num_edges,), empty_value, dtype=float
+        )
+        nonempty = self.segment_ptr[1:] > self.segment_ptr[:-1]
+        if np.any(nonempty):
+            max_values[..., nonempty] = np.maximum.reduceat(
+                segment_values, self.segment_ptr[:-1][nonempty], axis=-1
+            )
+        return max_values
+
+    def get_offset_params(self, offsets, temperature_kelvin=323.15):
+        """Get edge parameters for a list of sequence offsets, arrays are offsets x edges"""
+        offsets = np.asarray(offsets, dtype=np.int64).reshape(-1, 1)
+        shape = (len(offsets), self.num_edges)
+
+        # Segment energies for all offsets
+        (
+            segment_dG,
+            segment_dH,
+            segment_dS,
+            segment_Tm,
+        ) = self.origami.thermo_table.get_dG_dH_dS_Tm(
+            self.segment_starts.reshape(1, -1),
+            self.segment_lengths.reshape(1, -1),
+            offsets,
+            temperature_kelvin,
+        )
+
+        edge_params = BreakEdgeArrays()
+        edge_params.segment_dG = segment_dG
+        edge_params.segment_dH = segment_dH
+        edge_params.segment_dS = segment_dS
+        edge_params.segment_Tm = segment_Tm
+
+        # Offset independent parameters
+        edge_params.edge_length = np.broadcast_to(self.edge_length, shape)
+        edge_params.edge_maxseq = np.broadcast_to(self.edge_maxseq, shape)
+        edge_params.edge_has14 = np.broadcast_to(self.edge_has14, shape)
+        edge_params.edge_has16 = np.broadcast_to(self.edge_has16, shape)
+        edge_params.edge_structure = np.broadcast_to(self.edge_structure, shape)
+
+        # Total energies
+        edge_params.dG_total = (
+            self.sum_segments(segment_dG) + self.dG_inter + self.dG_conc
+        )
+        edge_params.dS_total = (
+            self.sum_segments(segment_dS) + self.dS_inter + self.dS_conc
+        )
+        edge_params.dH_total = self.sum_segments(segment_dH)
+
+        # Probabilities and folding temperature
+        RT = utilities.R * temperature_kelvin
+        edge_params.edge_prob = np.exp(-edge_params.dG_total / RT) / (
+            1.0 + np.exp(-edge_params.dG_total / RT)
+        )
+        edge_params.edge_logprob = np.log(edge_params.edge_prob)
+        edge_params.edge_Tf = edge_params.dH_total / edge_params.dS_total - 273.15
+
+        # Tm parameters
+        edge_params.edge_maxTm = self.max_segments(segment_Tm)
+        edge_params.edge_numTm = self.sum_segments(
+            1.0 * (segment_Tm >= utilities.LOW_TM)
+        )
+        edge_params.edge_hasTm = 1 * (edge_params.edge_numTm > 0)
+
+        return edge_params
+
+    def assign_offset_params(self, edge_params, edge_weights, row=0):
+        """Assign one offset row of edge parameters to the table columns"""
+        self.dG_total[:] = edge_params.dG_total[row]
+        self.dH_total[:] = edge_params.dH_total[row]
+        self.dS_total[:] = edge_params.dS_total[row]
+        self.edge_prob[:] = edge_params.edge_prob[row]
+        self.edge_logprob[:] = edge_params.edge_logprob[row]
+        self.edge_Tf[:] = edge_params.edge_Tf[row]
+        self.edge_maxTm[:] = edge_params.edge_maxTm[row]
+        self.edge_numTm[:] = edge_params.edge_numTm[row]
+        self.edge_hasTm[:] = edge_params.edge_hasTm[row]
+        self.edge_weight[:] = edge_weights[row]
+
+
+class BreakEdgeView:
+    def __init__(self, edge_table, edge_id):
+        """
+        Break edge view on a row of the break edge table
+        Edge parameters are read from the table columns, sequence details are
+        evaluated from the current strand sequences when the edge is exported
+        """
+        self.edge_table = edge_table
+        self.edge_id = edge_id
+        self.current_break = edge_table.get_from_break(edge_id)
+        self.next_break = edge_table.get_to_break(edge_id)
+
+    def __getattr__(self, name):
+        """Read edge parameters from the table columns"""
+        if name in BreakEdgeTable.EDGE_COLUMNS:
+            return getattr(self.edge_table, name)[self.edge_id]
+        raise AttributeError(name)
+
+    @property
+    def active(self):
+        """Edge state in the table"""
+        return self.edge_table.active[self.edge_id]
+
+    @active.setter
+    def active(self, value):
+        self.edge_table.active[self.edge_id] = value
+
+    def is_valid(self):
+        """Determine if edge is valid"""
+        return self.edge_table.is_valid(self.edge_id)
+
+    def get_details(self):
+        """Evaluate the full break edge for the current strand sequences"""
+        return self.edge_table.create_edge(
+            self.current_break, self.next_break, self.edge_length
+        )
+
+    def get_csv_row_object(self):
+        """Return csv row object"""
+        return self.get_details().get_csv_row_object()
+
+
+class BreakEdge:
+    def __init__(self):
+        """Break edge class"""
+        self.autobreak = None
+        self.origami = None
+        self.current_break = None
+        self.next_break = None
+        self.edge_weight = None
+        self.edge_length = None
+        self.edge_maxseq = None
+        self.edge_Tm = None
+
+        # state parameters
+        self.valid = True
+
+        # Length parameters
+        self.edge_has14 = None
+        self.edge_num14 = None
+
+        self.edge_has16 = None
+        self.edge_num16 = None
+
+        # Tm parameters
+        self.edge_hasTm = None
+        self.edge_numTm = None
+
+        # Loop parameter
+        self.isloop = False
+
+        # Output/plot parameters
+        self.csv_params = {}
+
+    def create_csv_params(self):
+        """
+        Create params dictionary from thermodynamic parameters
+
+        COLUMNS
+         1.  Oligo key
+         2.  Oligo Group key
+         3.  Break 1 key
+         4.  Break 1 type
+         5.  Break 1 location
+         6.  Break 2 key
+         7.  Break 2 type
          8.  Break 2 location
          9.  Length
         10.  Sequence
@@ -2143,25 +4129,13 @@ class BreakEdge:
         """Set edge weight"""
         self.edge_weight = self.origami.autobreak.optimize(self)
 
-    def is_valid(self):
-        """Determine if edge is valid"""
-        return (
-            self.valid
-            and self.active
-            and (
-                not self.current_break.dont_break
-                and not self.next_break.dont_break
-                and not self.current_break.dont_break_temp
-                and not self.next_break.dont_break_temp
-            )
-        )
-
     def make_connection(self, from_break, to_break):
         """Make the connection between two break nodes"""
 
         # Set the break nodes
         self.current_break = from_break
         self.next_break = to_break
+        self.isloop = from_break == to_break
 
         # Assign the edge weights
         self.update_connection()
@@ -2172,146 +4146,55 @@ class BreakEdge:
         # Get the temperature parameter for dG optimization
         temperature_kelvin = self.autobreak.optim_temperature_kelvin
 
-        # Initialize sequence and dna list
-        self.sequence_list = []
-        self.ssDNA_seq_list = []
-        self.dsDNA_seq_list = []
-
-        self.ssDNA_pos_list = []
-        self.dsDNA_pos_list = []
-
-        # Make the sequence list
-        self.sequence_list.append(self.current_break.sequence)
-
-        # Check if the breaks are in consecutive positions on the same sequence
-        if not (
-            self.current_break.sequence == self.next_break.sequence
-            and self.current_break.direction
-            * (self.next_break.idx - self.current_break.idx)
-            > 0
-        ):
-
-            # Get forward link
-            next_sequence = self.current_break.sequence.next_sequence
-
-            # Iterate over all the sequences
-            while next_sequence:
-                self.sequence_list.append(next_sequence)
-
-                # Stop if the sequence is same as the final sequence
-                if next_sequence == self.next_break.sequence:
-                    break
-
-                # Update next sequence
-                next_sequence = next_sequence.next_sequence
-
-        # Iterate over sequence list
-        if len(self.sequence_list) == 1:
-            start_point = self.current_break.break_point_adjusted + 1
-            final_point = self.next_break.break_point_adjusted + 1
-            dna_sequence = self.current_break.strand.dna[start_point:final_point]
-            position_list = self.current_break.strand.scaffoldPos[
-                start_point:final_point
-            ]
-
-            if len(position_list) > 0:
-                self.ssDNA_pos_list.append(position_list)
-            if len(dna_sequence) > 0:
-                self.ssDNA_seq_list.append(dna_sequence)
-        else:
-            # 1. Get the 5' sequence
-            start_point = self.current_break.break_point_adjusted + 1
-            final_point = self.current_break.sequence.strHigh + 1
-            dna_sequence = self.current_break.strand.dna[start_point:final_point]
-            position_list = self.current_break.strand.scaffoldPos[
-                start_point:final_point
-            ]
-
-            if len(position_list) > 0:
-                self.ssDNA_pos_list.append(position_list)
-            if len(dna_sequence) > 0:
-                self.ssDNA_seq_list.append(dna_sequence)
-
-            # 2. Get the sequences in between
-            for sequence in self.sequence_list[1:-1]:
-                self.ssDNA_pos_list.append(sequence.scaffoldPos)
-                self.ssDNA_seq_list.append(sequence.dna)
-
-            # 3. Get the 3' sequence
-            start_point = self.next_break.sequence.strLow
-            final_point = self.next_break.break_point_adjusted + 1
-            dna_sequence = self.next_break.strand.dna[start_point:final_point]
-            position_list = self.next_break.strand.scaffoldPos[start_point:final_point]
-
-            if len(position_list) > 0:
-                self.ssDNA_pos_list.append(position_list)
-            if len(dna_sequence) > 0:
-                self.ssDNA_seq_list.append(dna_sequence)
-
-        # Remove empty sequences
-        self.dsDNA_seq_list = [
-            dna.strip() for dna in self.ssDNA_seq_list if len(dna.strip()) > 0
-        ]
-        self.dsDNA_pos_list = [
-            list(filter(lambda x: x, pos_list)) for pos_list in self.ssDNA_pos_list
-        ]
-
-        # Replace all empty characters in ssDNA seq list with ?
-        self.ssDNA_seq_list = [dna.replace(" ", "?") for dna in self.ssDNA_seq_list]
-
-        # Remove empty lists from positions list
-        self.dsDNA_pos_list = list(filter(lambda x: len(x), self.dsDNA_pos_list))
+        # Get the ssDNA and dsDNA segments between the breaks
+        (
+            self.ssDNA_seq_list,
+            self.ssDNA_pos_list,
+            self.dsDNA_seq_list,
+            self.dsDNA_pos_list,
+        ) = self.current_break.get_segment_lists(self.next_break)
 
         # Determine mean values for the positions
         self.dsDNA_mean_pos_list = [np.round(np.mean(x)) for x in self.dsDNA_pos_list]
 
-        # Determine Tm
-        self.Tm_list = np.array(
-            [utilities.sequence_to_Tm(dna) for dna in self.dsDNA_seq_list]
-        )
-
-        # 1. Determine intrinsic free energies
-        self.dG_intrin_list = []
-        self.dH_intrin_list = []
-        self.dS_intrin_list = []
-
-        for dna in self.dsDNA_seq_list:
-            (dGintrin, dHintrin, dSintrin) = utilities.sequence_to_dG_dH_dS(
-                dna, temperature_kelvin
+        # Get the scaffold ranges of the dsDNA segments
+        self.set_dsDNA_scaffold_ranges()
+
+        # 1. Determine Tm and intrinsic free energies for all segments at once
+        if self.dsDNA_scaffold_starts is not None:
+            (
+                self.dG_intrin_list,
+                self.dH_intrin_list,
+                self.dS_intrin_list,
+                self.Tm_list,
+            ) = self.origami.thermo_table.get_dG_dH_dS_Tm(
+                self.dsDNA_scaffold_starts,
+                self.dsDNA_scaffold_lengths,
+                self.origami.sequence_offset,
+                temperature_kelvin,
+            )
+        else:
+            (
+                self.dG_intrin_list,
+                self.dH_intrin_list,
+                self.dS_intrin_list,
+                self.Tm_list,
+            ) = utilities.sequences_to_dG_dH_dS_Tm(
+                self.dsDNA_seq_list, temperature_kelvin
             )
-
-            # Add free energies to the lists
-            self.dG_intrin_list.append(dGintrin)
-            self.dH_intrin_list.append(dHintrin)
-            self.dS_intrin_list.append(dSintrin)
-
-        # Make the lists arrays
-        self.dG_intrin_list = np.array(self.dG_intrin_list)
-        self.dH_intrin_list = np.array(self.dH_intrin_list)
-        self.dS_intrin_list = np.array(self.dS_intrin_list)
 
         # Get scaffold parameters
         scaffold_length = self.origami.oligos["scaffold"][0].length
         is_scaffold_circular = self.origami.oligos["scaffold"][0].circular
 
-        # 2. Determine interfacial coupling energies
-        self.dG_inter_list = []
-        self.dS_inter_list = []
-
-        for i in range(len(self.dsDNA_mean_pos_list) - 1):
-            dGinter, dSinter = utilities.position_to_loop_dG(
-                scaffold_length,
-                self.dsDNA_mean_pos_list[i],
-                self.dsDNA_mean_pos_list[i + 1],
-                is_scaffold_circular,
-                temperature_kelvin,
-            )
-            self.dG_inter_list.append(dGinter)
-            self.dS_inter_list.append(dSinter)
-
-        # Make the lists arrays
-        self.dG_inter_list = np.array(self.dG_inter_list)
-        self.dS_inter_list = np.array(self.dS_inter_list)
+        # 2. Determine interfacial coupling energies from the loop energy table
+        self.dG_inter_list, self.dS_inter_list = utilities.positions_to_loop_dG(
+            scaffold_length,
+            self.dsDNA_mean_pos_list[:-1],
+            self.dsDNA_mean_pos_list[1:],
+            is_scaffold_circular,
+            temperature_kelvin,
+        )
 
         # 3. Get free energy due to concentration
         dGconc, dSconc = utilities.conc_to_dG(temperature_kelvin)
@@ -2345,6 +4228,7 @@ class BreakEdge:
         # Determine lengths
         self.ssDNA_length_list = np.array([len(dna) for dna in self.ssDNA_seq_list])
         self.dsDNA_length_list = np.array([len(dna) for dna in self.dsDNA_seq_list])
+        self.dsDNA_length = np.sum(self.dsDNA_length_list)
 
         # Determine the edge weights
         if len(self.Tm_list) > 0:
@@ -2365,7 +4249,7 @@ class BreakEdge:
         self.edge_has16 = int(self.edge_num16 > 0)
 
         # Tm parameters
-        self.edge_numTm = np.sum(self.Tm_list >= self.LOW_TM)
+        self.edge_numTm = np.sum(self.Tm_list >= utilities.LOW_TM)
         self.edge_hasTm = np.sum(self.edge_numTm > 0)
 
         # Determine structure score
@@ -2379,18 +4263,26 @@ class BreakEdge:
         if len(self.dsDNA_length_list) == 0:
             self.valid = False
 
-    def make_loop_edge(self):
-        """Make loop edge"""
-        if self.current_break == self.next_break:
-            self.isloop = True
-            self.current_break.loop_edge = self
+    def set_dsDNA_scaffold_ranges(self):
+        """Set 0-based scaffold start positions and lengths of the dsDNA segments"""
+        self.dsDNA_scaffold_starts = None
+        self.dsDNA_scaffold_lengths = None
+
+        # Check if the thermodynamic table is available
+        if self.origami.thermo_table is not None:
+            (
+                self.dsDNA_scaffold_starts,
+                self.dsDNA_scaffold_lengths,
+            ) = self.origami.thermo_table.get_segment_ranges(
+                self.dsDNA_seq_list, self.dsDNA_pos_list
+            )
 
 
 class BreakPath:
-    def __init__(self, break_node, break_edge=None, score=0):
+    def __init__(self, break_node, edge_id=None, score=0):
         """Break path object"""
         self.break_node = break_node
-        self.break_edge = break_edge
+        self.edge_id = edge_id
         self.score = score
 
 
@@ -2401,15 +4293,15 @@ class BreakNode:
         self.next_break = None
         self.previous_break = None
         self.neighbor_break = None
-        self.connected_breaks = None
-        self.break_edges = None
-        self.edge_nodes = None
         self.type = None
         self.sequence = None
         self.crossover = None
-        self.loop_edge = None
+        self.loop_edge_id = None
+
+        # Break id in the edge table
+        self.break_id = None
 
-        # Nucleotide parameters
+        # Keys of the nucleotides before and after the break
         self.current_nucleotide = None
         self.next_nucleotide = None
 
@@ -2426,11 +4318,9 @@ class BreakNode:
         # Graph parameter
         self.score = -utilities.INFINITY
         self.best_path_node = None
-        self.best_path_nodes = None
         self.shortest_paths = None
         self.k_potential_paths = None
         self.k_shortest_paths = None
-        self.traverse_path = None
         self.shortest_score = 0
         self.order_id = None
 
@@ -2441,12 +4331,12 @@ class BreakNode:
         next_dsDNA = True
 
         if self.current_nucleotide:
-            current_dsDNA = self.current_nucleotide.dsDNA
+            current_dsDNA = self.origami.is_dsDNA(*self.current_nucleotide[:2])
         else:
             current_dsDNA = False
 
         if self.next_nucleotide:
-            next_dsDNA = self.next_nucleotide.dsDNA
+            next_dsDNA = self.origami.is_dsDNA(*self.next_nucleotide[:2])
         else:
             next_dsDNA = False
 
@@ -2454,8 +4344,6 @@ class BreakNode:
 
     def reset_break_path(self):
         self.order_id = -1
-        self.traverse_path = []
-        self.best_path_nodes = []
         self.best_path_node = None
         self.score = -utilities.INFINITY
         self.visited = False
@@ -2476,8 +4364,10 @@ class BreakNode:
 
     def get_loop_edge(self):
         """Return loop edge"""
+        if self.loop_edge_id is None:
+            return None
 
-        return self.loop_edge
+        return self.origami.autobreak.edge_table.get_edge(self.loop_edge_id)
 
     def get_break_distance(self, other_break):
         """Break to break distance"""
@@ -2487,29 +4377,131 @@ class BreakNode:
         else:
             return distance
 
+    def get_segment_lists(self, next_break):
+        """
+        Return the ssDNA and dsDNA sequence and scaffold position lists between two breaks
+        Empty characters in the ssDNA sequences are replaced with ?
+        """
+        # Initialize sequence and dna list
+        sequence_list = []
+        ssDNA_seq_list = []
+        ssDNA_pos_list = []
+
+        # Make the sequence list
+        sequence_list.append(self.sequence)
+
+        # Check if the breaks are in consecutive positions on the same sequence
+        if not (
+            self.sequence == next_break.sequence
+            and self.direction * (next_break.idx - self.idx) > 0
+        ):
+
+            # Get forward link
+            next_sequence = self.sequence.next_sequence
+
+            # Iterate over all the sequences
+            while next_sequence:
+                sequence_list.append(next_sequence)
+
+                # Stop if the sequence is same as the final sequence
+                if next_sequence == next_break.sequence:
+                    break
+
+                # Update next sequence
+                next_sequence = next_sequence.next_sequence
+
+        # Iterate over sequence list
+        if len(sequence_list) == 1:
+            start_point = self.break_point_adjusted + 1
+            final_point = next_break.break_point_adjusted + 1
+            dna_sequence = self.strand.dna[start_point:final_point]
+            position_list = self.strand.scaffoldPos[start_point:final_point]
+
+            if len(position_list) > 0:
+                ssDNA_pos_list.append(position_list)
+            if len(dna_sequence) > 0:
+                ssDNA_seq_list.append(dna_sequence)
+        else:
+            # 1. Get the 5' sequence
+            start_point = self.break_point_adjusted + 1
+            final_point = self.sequence.strHigh + 1
+            dna_sequence = self.strand.dna[start_point:final_point]
+            position_list = self.strand.scaffoldPos[start_point:final_point]
+
+            if len(position_list) > 0:
+                ssDNA_pos_list.append(position_list)
+            if len(dna_sequence) > 0:
+                ssDNA_seq_list.append(dna_sequence)
+
+            # 2. Get the sequences in between
+            for sequence in sequence_list[1:-1]:
+                ssDNA_pos_list.append(sequence.scaffoldPos)
+                ssDNA_seq_list.append(sequence.dna)
+
+            # 3. Get the 3' sequence
+            start_point = next_break.sequence.strLow
+            final_point = next_break.break_point_adjusted + 1
+            dna_sequence = next_break.strand.dna[start_point:final_point]
+            position_list = next_break.strand.scaffoldPos[start_point:final_point]
+
+            if len(position_list) > 0:
+                ssDNA_pos_list.append(position_list)
+            if len(dna_sequence) > 0:
+                ssDNA_seq_list.append(dna_sequence)
+
+        # Remove empty sequences
+        dsDNA_seq_list = [dna.strip() for dna in ssDNA_seq_list if len(dna.strip()) > 0]
+        dsDNA_pos_list = [
+            list(filter(lambda x: x, pos_list)) for pos_list in ssDNA_pos_list
+        ]
+
+        # Replace all empty characters in ssDNA seq list with ?
+        ssDNA_seq_list = [dna.replace(" ", "?") for dna in ssDNA_seq_list]
+
+        # Remove empty lists from positions list
+        dsDNA_pos_list = list(filter(lambda x: len(x), dsDNA_pos_list))
+
+        return ssDNA_seq_list, ssDNA_pos_list, dsDNA_seq_list, dsDNA_pos_list
+
     def get_break_order_difference(self, other_break):
         """Return break to order id difference"""
         return other_break.order_id - self.order_id
 
     def get_valid_edge_nodes(self):
         """Get break nodes connected by edges"""
+        edge_table = self.origami.autobreak.edge_table
+
         # Get the connected break nodes
         return [
-            break_edge.next_break
-            for break_edge in self.break_edges
-            if not break_edge.next_break.dont_break
+            edge_table.get_to_break(edge_id)
+            for edge_id in edge_table.get_break_edge_ids(self.break_id)
+            if not edge_table.get_to_break(edge_id).dont_break
         ]
 
     def get_valid_edges(self):
-        """Get edges that lead to break nodes that can be broken"""
+        """Get ids of the edges that lead to break nodes that can be broken"""
+        edge_table = self.origami.autobreak.edge_table
 
         # Get the connected break nodes
-        return [break_edge for break_edge in self.break_edges if break_edge.is_valid()]
+        return [
+            edge_id
+            for edge_id in edge_table.get_break_edge_ids(self.break_id)
+            if edge_table.is_valid(edge_id)
+        ]
 
     def get_k_shortest_paths(self, final_break, k_num=10, k_select="best"):
-        """Get k-shortest path results"""
+        """
+        Get k-shortest path results
+
+        The first path is the shortest path. The next paths are taken from the
+        paths enumerated best first by generate_best_paths, duplicates are removed
+        by their break ids. For best selection a single new path is enough at each
+        step, for random selection one new path per edge of the last selected path
+        is added to the candidates, as many as the spur paths of the last path.
+        """
         # Initialize k-shortest paths
         self.k_shortest_paths = []
+        self.k_potential_paths = []
 
         # 1. Get the shortest paths
         shortest_path = self.get_shortest_path(final_break)
@@ -2520,60 +4512,34 @@ class BreakNode:
 
         # 2.Add best path to k-path list
         self.k_shortest_paths = [shortest_path]
-        self.k_potential_paths = []
         num_k_solutions = 1
 
         # Check the final score of the path
-        if shortest_path.score == 0:
+        if shortest_path.score == 0 or k_num <= 1:
             return self.k_shortest_paths
 
+        # Path keys for duplicate check
+        path_keys = {shortest_path.get_path_key()}
+
         # 3. Make the paths
+        path_generator = self.generate_best_paths(final_break)
         while num_k_solutions < k_num:
 
-            # Get the last best path
-            last_solution = self.k_shortest_paths[-1]
-
-            # Iterate through the edges
-            for i in range(len(last_solution.edges[:-1])):
-                # Inactive edge list
-                inactive_edges = []
-
-                for j in range(len(self.k_shortest_paths)):
-
-                    if last_solution.is_identical(self.k_shortest_paths[j], i):
-                        inactive_edges.append(last_solution.edges[i])
-
-                        # Make the edge inactive
-                        last_solution.edges[i].active = False
-
-                # Reset break paths and find solution
-                self.oligo.reset_break_paths()
-                self.oligo.reset_break_order_ids(self, final_break)
-
-                # Get sub solution
-                potential_solution = self.get_shortest_path(final_break)
-
-                # Make the edges active again
-                for edge in inactive_edges:
-                    edge.active = True
-
-                # If there is no solution continue
-                if potential_solution is None:
-                    continue
-
-                # Get the first solution in the list
-                new_solution = potential_solution
-
-                # Add potential solution if it doesnt exist in k-shortest paths
-                potential_solution_exists = False
-                for solution in self.k_shortest_paths:
-                    if solution.is_identical(new_solution):
-                        potential_solution_exists = True
-                        break
+            # Number of new paths added to potential paths
+            if k_select == "best":
+                num_new_paths = 1
+            else:
+                num_new_paths = max(len(self.k_shortest_paths[-1].edges) - 1, 1)
 
-                # Add new solution to potential paths
-                if not potential_solution_exists:
+            # Add the next new paths to potential paths
+            for new_solution in path_generator:
+                path_key = new_solution.get_path_key()
+                if path_key not in path_keys:
+                    path_keys.add(path_key)
                     self.k_potential_paths.append(new_solution)
+                    num_new_paths -= 1
+                    if num_new_paths <= 0:
+                        break
 
             # Check if the potential path list is empty, if empty quit
             if len(self.k_potential_paths) == 0:
@@ -2599,154 +4565,344 @@ class BreakNode:
 
         return self.k_shortest_paths
 
-    def get_shortest_path(self, final_break):
-        """Find the shortest path between current and final break points"""
-        # Initialize the set and stack
-        stack = [self]
+    def get_path_breaks(self, final_break):
+        """Get the breaks from current to final break in order, final break is the last item"""
+        path_breaks = [self]
+        current_break = self.next_break
+        while current_break and current_break != final_break:
+            path_breaks.append(current_break)
+            current_break = current_break.next_break
+        path_breaks.append(final_break)
+
+        return path_breaks
+
+    def get_neighbor_bits(self, path_breaks):
+        """Assign bits to breaks that are neighbors of other breaks on the path"""
+        path_break_set = set(path_breaks)
+        neighbor_bits = {}
+        for new_break in path_breaks:
+            if (
+                new_break.neighbor_break in path_break_set
+                and new_break.neighbor_break not in neighbor_bits
+            ):
+                neighbor_bits[new_break.neighbor_break] = len(neighbor_bits)
 
-        while stack:
-            # Pop the break node
-            new_break = stack.pop(0)
+        return neighbor_bits
 
-            # If current node is final break, quit
-            if final_break.visited and new_break == final_break:
-                break
+    def get_path_edges(self, final_break):
+        """
+        Get the breaks in path order and the valid edges from each position as
+        edge id and next position pairs, order ids have to be set for the path
+        """
+        edge_table = self.origami.autobreak.edge_table
 
-            # Get valid break edges
-            valid_break_edges = new_break.get_valid_edges()
+        # 1. Get the breaks in path order
+        path_breaks = self.get_path_breaks(final_break)
+        final_position = len(path_breaks) - 1
+
+        # 2. Get the valid edges from each position
+        path_edges = [[] for position in range(final_position)]
+        for position in range(final_position):
+            new_break = path_breaks[position]
+            for edge_id in new_break.get_valid_edges():
+                next_break = edge_table.get_to_break(edge_id)
 
-            # Update the scores for connected breaks
-            for break_edge in valid_break_edges:
                 # If id difference is in wrong direction and if it is a loop, discard the edge
-                if not new_break.is_break_edge_possible(break_edge.next_break):
+                if not new_break.is_break_edge_possible(next_break):
                     continue
 
-                # Determine the new score
-                if new_break.order_id == 0:
-                    new_score = break_edge.edge_weight
-                else:
-                    new_score = new_break.score + break_edge.edge_weight
-
-                # Update the score based on the existence of a neighbor crossover
-                if new_break.neighbor_break in new_break.best_path_nodes:
-                    new_score += -utilities.INFINITY * utilities.INFINITY
-
-                # Make new break Path object
-                new_break_path = BreakPath(new_break, break_edge, new_score)
-
-                # If new score is higher than the previous one, make a new list
-                if new_score > break_edge.next_break.score:
-                    break_edge.next_break.best_path_node = new_break_path
-                    break_edge.next_break.best_path_nodes = (
-                        new_break.best_path_nodes + [new_break]
-                    )
-                    break_edge.next_break.score = new_score
+                next_position = (
+                    final_position if next_break == final_break else next_break.order_id
+                )
+                path_edges[position].append((edge_id, next_position))
 
-                # Add next break to connected breaks list
-                if not break_edge.next_break.visited:
-                    stack.append(break_edge.next_break)
+        # Add the loop edge
+        if (
+            self == final_break
+            and self.loop_edge_id is not None
+            and edge_table.is_valid(self.loop_edge_id)
+        ):
+            path_edges[0].append((self.loop_edge_id, final_position))
 
-                # Make the next break visited
-                break_edge.next_break.visited = True
+        return path_breaks, path_edges
 
-        # Finally compare with the loop connection
-        if self == final_break and self.loop_edge and self.loop_edge.is_valid():
-            # Make a loop break path object
-            loop_break_path = BreakPath(
-                self, self.loop_edge, self.loop_edge.edge_weight
-            )
+    def get_best_score(self, final_break, edge_weights=None):
+        """
+        Best score from current to final break without neighbor penalties
+        Edge weights can be an edges x offsets array to bound several offsets
+        """
+        if edge_weights is None:
+            edge_weights = self.origami.autobreak.edge_table.edge_weight
+
+        path_breaks, path_edges = self.get_path_edges(final_break)
+        final_position = len(path_breaks) - 1
+
+        # Best scores from each position to the final break
+        best_scores = [-np.inf] * (final_position + 1)
+        best_scores[final_position] = 0
+        for position in range(final_position - 1, -1, -1):
+            for edge_id, next_position in path_edges[position]:
+                best_scores[position] = np.maximum(
+                    best_scores[position],
+                    edge_weights[edge_id] + best_scores[next_position],
+                )
 
-            if self.loop_edge.edge_weight > final_break.score:
-                final_break.best_path_node = loop_break_path
-                final_break.score = self.loop_edge.edge_weight
+        return best_scores[0]
 
-        # Return best path
-        final_break.shortest_path = final_break.traverse_best_path(self)
+    def generate_best_paths(self, final_break):
+        """
+        Generate paths from current to final break in decreasing score order
 
-        return final_break.shortest_path
+        Partial paths are expanded best first, ranked by the number of neighbor
+        penalties and then by their score plus the best score from their last
+        break to the final break. The best scores are computed once in reverse
+        break order and are upper bounds, since penalties only lower scores.
+        """
+        edge_weight = self.origami.autobreak.edge_table.edge_weight
+
+        # 1-2. Get the breaks in path order and the valid edges with their weights
+        path_breaks, path_edges = self.get_path_edges(final_break)
+        final_position = len(path_breaks) - 1
+        path_edges = [
+            [
+                (edge_id, next_position, edge_weight[edge_id])
+                for edge_id, next_position in position_edges
+            ]
+            for position_edges in path_edges
+        ]
 
-    def traverse_best_path(self, start_break):
+        # 3. Best scores from each position to the final break
+        best_scores = [-np.inf] * (final_position + 1)
+        best_scores[final_position] = 0
+        for position in range(final_position - 1, -1, -1):
+            for edge_id, next_position, edge_weight in path_edges[position]:
+                best_scores[position] = max(
+                    best_scores[position], edge_weight + best_scores[next_position]
+                )
 
-        # Initialize shortest path
-        self.shortest_path = None
+        # Check if the final break can be reached
+        if best_scores[0] == -np.inf:
+            return
 
-        # Check if the final break has a path node
-        if self.best_path_node is None:
-            return self.shortest_path
+        # 4. Expand the partial paths best first
+        neighbor_bits = self.get_neighbor_bits(path_breaks)
+
+        # Heap items: (num penalties, -bound, counter, position, score, weight, mask, path)
+        # Partial paths are linked tuples of (position, edge_id, score, parent path)
+        counter = itertools.count()
+        path_heap = [(0, -best_scores[0], next(counter), 0, 0, 0, 0, None)]
+        while path_heap:
+            (
+                num_penalties,
+                bound,
+                count,
+                position,
+                score,
+                weight,
+                path_mask,
+                path,
+            ) = heapq.heappop(path_heap)
+
+            # Make the solution for a complete path
+            if position == final_position:
+                yield self.create_path_solution(final_break, path_breaks, path)
+                continue
 
-        # Make the traverse path for starting node empty
-        self.traverse_path = []
+            new_break = path_breaks[position]
 
-        # Make final node break path object
-        final_break_path = BreakPath(self, None, self.score)
+            # Update the score based on the existence of a neighbor crossover
+            neighbor_break = new_break.neighbor_break
+            if (
+                neighbor_break in neighbor_bits
+                and path_mask >> neighbor_bits[neighbor_break] & 1
+            ):
+                score += -utilities.INFINITY * utilities.INFINITY
+                num_penalties += 1
 
-        # Initalize the traverse path for the initial node
-        self.best_path_node.break_node.traverse_path = self.traverse_path + [
-            final_break_path
-        ]
+            # Neighbor mask passed to the next breaks
+            if new_break in neighbor_bits:
+                path_mask |= 1 << neighbor_bits[new_break]
 
-        # Assign new break path
-        new_break_path = self.best_path_node
+            # Add the extended paths
+            for edge_id, next_position, edge_weight in path_edges[position]:
+                if best_scores[next_position] == -np.inf:
+                    continue
 
-        # Assign new break
-        new_break = new_break_path.break_node
+                new_score = score + edge_weight
+                new_weight = weight + edge_weight
+                heapq.heappush(
+                    path_heap,
+                    (
+                        num_penalties,
+                        -(new_weight + best_scores[next_position]),
+                        next(counter),
+                        next_position,
+                        new_score,
+                        new_weight,
+                        path_mask,
+                        (next_position, edge_id, new_score, path),
+                    ),
+                )
 
-        while new_break:
+    def create_path_solution(self, final_break, path_breaks, path):
+        """Make break solution from a linked partial path"""
+        break_nodes = []
+        edge_ids = []
+        path_scores = []
+        while path:
+            next_position, edge_id, score, path = path
+            edge_ids.append(edge_id)
+            path_scores.append(score)
+
+            # Get the break the edge starts from
+            if path:
+                break_nodes.append(path_breaks[path[0]])
+            else:
+                break_nodes.append(self)
 
-            if new_break == start_break:
-                new_break_solution = OligoBreakSolution()
-                new_break_solution.start_break = start_break
-                new_break_solution.final_break = self
-                new_break_solution.break_paths = new_break.traverse_path + [
-                    new_break_path
-                ]
-                new_break_solution.score = self.score
-                new_break_solution.origami = self.origami
+        return self.create_break_solution(
+            final_break, break_nodes[::-1], edge_ids[::-1], path_scores[::-1]
+        )
 
-                # Initialize the solution
-                new_break_solution.initialize()
+    def create_break_solution(self, final_break, break_nodes, edge_ids, path_scores):
+        """
+        Make break solution from the breaks and edges of a path
+        Path scores are the scores after each edge
+        """
+        # Break paths are ordered from final to current break
+        break_paths = [BreakPath(final_break, None, path_scores[-1])]
+        for i in range(len(edge_ids) - 1, -1, -1):
+            break_paths.append(BreakPath(break_nodes[i], edge_ids[i], path_scores[i]))
 
-                self.shortest_path = new_break_solution
-                break
+        new_break_solution = OligoBreakSolution()
+        new_break_solution.start_break = self
+        new_break_solution.final_break = final_break
+        new_break_solution.break_paths = break_paths
+        new_break_solution.score = path_scores[-1]
+        new_break_solution.origami = self.origami
 
-            # Get the new path nodes
-            new_path_node = new_break.best_path_node
+        # Initialize the solution
+        new_break_solution.initialize()
 
-            # Check if there is a path from new break in reverse direction
-            if new_path_node is None:
-                break
+        return new_break_solution
 
-            # Iterate through each node
-            new_path_node.break_node.traverse_path = new_break.traverse_path + [
-                new_break_path
-            ]
+    def get_shortest_path(self, final_break):
+        """
+        Find the shortest path between current and final break points
 
-            # Update new break path
-            new_break_path = new_path_node
+        Edges only lead to breaks with higher order ids, so the breaks are relaxed
+        once in order id order with the final break placed at the last position.
+        A break is relaxed only if it was reached by an edge from an earlier break.
+        """
+        edge_table = self.origami.autobreak.edge_table
 
-            # Update new break
-            new_break = new_path_node.break_node
+        # 1. Get the breaks in path order
+        path_breaks = self.get_path_breaks(final_break)
+        final_position = len(path_breaks) - 1
 
-        return self.shortest_path
+        # 2. Assign bits to breaks that are neighbors of other breaks on the path
+        neighbor_bits = self.get_neighbor_bits(path_breaks)
+
+        # Bit masks of the neighbor breaks on the best path to each position
+        path_masks = [0] * (final_position + 1)
+
+        # 3. Relax the edges in path order
+        for position in range(final_position):
+            new_break = path_breaks[position]
+
+            # Skip breaks that are not reached
+            if position > 0 and not new_break.visited:
+                continue
+
+            # Determine the base score
+            if position == 0:
+                base_score = 0
+            else:
+                base_score = new_break.score
+
+            # Update the score based on the existence of a neighbor crossover
+            neighbor_break = new_break.neighbor_break
+            if (
+                neighbor_break in neighbor_bits
+                and path_masks[position] >> neighbor_bits[neighbor_break] & 1
+            ):
+                base_score += -utilities.INFINITY * utilities.INFINITY
+
+            # Neighbor mask passed to the next breaks
+            next_mask = path_masks[position]
+            if new_break in neighbor_bits:
+                next_mask |= 1 << neighbor_bits[new_break]
+
+            # Update the scores for connected breaks
+            for edge_id in new_break.get_valid_edges():
+                next_break = edge_table.get_to_break(edge_id)
+
+                # If id difference is in wrong direction and if it is a loop, discard the edge
+                if not new_break.is_break_edge_possible(next_break):
+                    continue
+
+                # Determine the new score
+                new_score = base_score + edge_table.edge_weight[edge_id]
+
+                # If new score is higher than the previous one, update the parent
+                if new_score > next_break.score:
+                    next_position = (
+                        final_position
+                        if next_break == final_break
+                        else next_break.order_id
+                    )
+                    next_break.best_path_node = BreakPath(new_break, edge_id, new_score)
+                    next_break.score = new_score
+                    path_masks[next_position] = next_mask
+
+                # Make the next break visited
+                next_break.visited = True
+
+        # Finally compare with the loop connection
+        if (
+            self == final_break
+            and self.loop_edge_id is not None
+            and edge_table.is_valid(self.loop_edge_id)
+        ):
+            loop_edge_weight = edge_table.edge_weight[self.loop_edge_id]
+
+            # Make a loop break path object
+            loop_break_path = BreakPath(self, self.loop_edge_id, loop_edge_weight)
 
-    def get_connected_breaks(self):
-        """Return connected breaks"""
-        # Initialize connected breaks
-        self.connected_breaks = []
+            if loop_edge_weight > final_break.score:
+                final_break.best_path_node = loop_break_path
+                final_break.score = loop_edge_weight
 
-        # 1. Add the directly connected next break
-        if self.next_break:
-            self.connected_breaks.append(self.next_break)
+        # Return best path
+        final_break.shortest_path = final_break.traverse_best_path(self)
 
-        # 2. Add the directly connected previous break
-        if self.previous_break:
-            self.connected_breaks.append(self.previous_break)
+        return final_break.shortest_path
 
-        # 3. Add the neighbor break
-        if self.neighbor_break:
-            self.connected_breaks.append(self.neighbor_break)
+    def traverse_best_path(self, start_break):
+        """Make the break solution by following the best path nodes back to start break"""
+        # Initialize shortest path
+        self.shortest_path = None
+
+        # Collect the path from final to start break
+        break_nodes = []
+        edge_ids = []
+        path_scores = [self.score]
+
+        new_break_path = self.best_path_node
+        while new_break_path:
+            break_nodes.append(new_break_path.break_node)
+            edge_ids.append(new_break_path.edge_id)
 
-        return self.connected_breaks
+            if new_break_path.break_node == start_break:
+                self.shortest_path = start_break.create_break_solution(
+                    self, break_nodes[::-1], edge_ids[::-1], path_scores[::-1]
+                )
+                break
+
+            path_scores.append(new_break_path.break_node.score)
+            new_break_path = new_break_path.break_node.best_path_node
+
+        return self.shortest_path
 
     def break_cadnano(self):
         """Break the breaknode"""
@@ -2755,28 +4911,6 @@ class BreakNode:
         else:
             self.origami.split_cadnano_strand(self.vh, self.idx, self.direction)
 
-    def depth_first_search(self):
-        """Depth-first-search graph traverse algorithm to find connected components"""
-        # Initialize the set and stack
-        visited, stack = set(), [self]
-        while stack:
-            # Pop the break node
-            new_break = stack.pop()
-            if new_break not in visited:
-                # Add break to visited list
-                visited.add(new_break)
-
-                # Make the break visited
-                new_break.visited = True
-
-                # Get the connected breaks
-                connected_breaks = new_break.get_connected_breaks()
-
-                # Extend the group with new breaks
-                stack.extend(set(connected_breaks) - visited)
-
-        return list(visited)
-
 
 class DefaultArgs(argparse.Namespace):
     input = None  # Cadnano json file
@@ -2786,6 +4920,20 @@ class DefaultArgs(argparse.Namespace):
     func = "dG:50"  # Optimization function
     sequence = None  # Sequence file in txt"
     nsol = 10  # Number of solutions", default=10)
+    osol = 1  # Number of k-shortest path solutions per oligo
+    circular = "all"  # Start breaks for circular oligos (all, window)
+    groupsolver = "stepwise"  # Oligo group solver (stepwise, milp)
+    refinemoves = 0  # Annealing moves to refine group solutions, 0 disables
+    refineseconds = 0  # Time limit to refine group solutions in seconds, 0 disables
+    prescreen = 0  # Number of offsets kept after the readonly prescreen, 0 disables
+    resume = False  # Skip the offsets in the checkpoint of an earlier run
+    prune = 0  # Number of best offsets kept exact by bound pruning, 0 disables
+    prescreenmetric = "TotalScore"  # Prescreen metric (TotalScore, TotalNormScore)
+    jobs = 1  # Number of worker processes for oligo groups
+    cachesize = 4096  # Maximum number of cached oligo solution lists, 0 disables
+    designcache = None  # Design cache directory, None disables
+    designcachemb = 512  # Maximum size of the design cache in megabytes
+    fastread = False  # Read the input json without cadnano
     minlength = 21  # Minimum staple length", default=21)
     maxlength = 60  # Maximum staple length", default=60)
     dontbreak = 0  # Dont break oligos less than the length specified", default=0)
@@ -2818,6 +4966,9 @@ def parse_args_from_shell():
     parser.add_argument(
         "--nsol", type=int, required=True, help="Number of global solutions"
     )
+    parser.add_argument(
+        "--osol", type=int, default=1, help="Number of solutions per oligo"
+    )
     parser.add_argument(
         "--minlength", type=int, required=True, help="Minimum length for breaks"
     )
@@ -2835,6 +4986,89 @@ def parse_args_from_shell():
     parser.add_argument("--writeall", action="store_true", help="Write all results")
     parser.add_argument("--csv", action="store_true", help="CSV output")
     parser.add_argument("--sort", action="store_true", help="Sort oligos")
+    parser.add_argument(
+        "--jobs", type=int, default=1, help="Number of worker processes"
+    )
+    parser.add_argument(
+        "--cachesize",
+        type=int,
+        default=4096,
+        help="Maximum number of cached oligo solution lists (0 disables)",
+    )
+    parser.add_argument(
+        "--design-cache",
+        dest="designcache",
+        type=str,
+        default=None,
+        help="Directory to cache the break edges of prepared designs",
+    )
+    parser.add_argument(
+        "--design-cache-mb",
+        dest="designcachemb",
+        type=float,
+        default=512,
+        help="Maximum size of the design cache in megabytes",
+    )
+    parser.add_argument(
+        "--fast-read",
+        dest="fastread",
+        action="store_true",
+        help="Read the input json without cadnano until the design is modified",
+    )
+    parser.add_argument(
+        "--group-solver",
+        dest="groupsolver",
+        type=str,
+        default="stepwise",
+        choices=["stepwise", "milp"],
+        help="Oligo group solver",
+    )
+    parser.add_argument(
+        "--refine-moves",
+        dest="refinemoves",
+        type=int,
+        default=0,
+        help="Annealing moves to refine group solutions",
+    )
+    parser.add_argument(
+        "--refine-seconds",
+        dest="refineseconds",
+        type=float,
+        default=0,
+        help="Time limit to refine group solutions in seconds, sets the moves if --refine-moves is not given",
+    )
+    parser.add_argument(
+        "--prescreen",
+        type=int,
+        default=0,
+        help="Number of offsets kept after the readonly prescreen (0 disables)",
+    )
+    parser.add_argument(
+        "--prescreen-metric",
+        dest="prescreenmetric",
+        type=str,
+        default="TotalScore",
+        choices=["TotalScore", "TotalNormScore"],
+        help="Readonly metric used to prescreen offsets",
+    )
+    parser.add_argument(
+        "--prune",
+        type=int,
+        default=0,
+        help="Number of best offsets kept exact when pruning offsets by score bounds (0 disables)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip the offsets in the checkpoint of an earlier run",
+    )
+    parser.add_argument(
+        "--circular",
+        type=str,
+        default="all",
+        choices=["all", "window"],
+        help="Start breaks for circular oligos, window uses a single break window",
+    )
     parser.add_argument(
         "--npermute", type=int, default=1, help="Number of permutations"
     )
@@ -2886,6 +5120,7 @@ def run(is_notebook_session, args=None):
         "score": args.score,
         "func": args.func,
         "nsol": args.nsol,
+        "osol": args.osol,
         "minlength": args.minlength,
         "maxlength": args.maxlength,
         "dontb": args.dontbreak,
@@ -2896,6 +5131,19 @@ def run(is_notebook_session, args=None):
         "writeall": args.writeall,
         "csv": args.csv,
         "sort": args.sort,
+        "circular": args.circular,
+        "groupsolver": args.groupsolver,
+        "refinemoves": args.refinemoves,
+        "refineseconds": args.refineseconds,
+        "prescreen": args.prescreen,
+        "prescreenmetric": args.prescreenmetric,
+        "prune": args.prune,
+        "resume": args.resume,
+        "jobs": args.jobs,
+        "cachesize": args.cachesize,
+        "designcache": args.designcache,
+        "designcachemb": args.designcachemb,
+        "fastread": args.fastread,
     }
     print(args_dict)
 
@@ -2910,7 +5158,17 @@ def run(is_notebook_session, args=None):
     new_autobreak.origami = new_origami
 
     new_autobreak.set_break_rule(break_rule)
-    new_autobreak.set_solution_nums(1, global_solutions)
+    new_autobreak.set_solution_nums(args.osol, global_solutions)
+    new_autobreak.set_circular_solver(args.circular)
+    new_autobreak.set_group_solver(args.groupsolver)
+    new_autobreak.set_refine_moves(args.refinemoves, args.refineseconds)
+    new_autobreak.set_prescreen(args.prescreen, args.prescreenmetric)
+    new_autobreak.set_prune(args.prune)
+    new_autobreak.set_resume(args.resume)
+    new_autobreak.set_num_jobs(args.jobs)
+    new_autobreak.set_random_seed(random_seed)
+    new_autobreak.set_solution_cache_size(args.cachesize)
+    new_autobreak.set_design_cache(args.designcache, args.designcachemb)
     new_autobreak.set_optimization_func(optimization_func)
     new_autobreak.set_score_func(score_func)
     new_autobreak.set_permute_sequence(permute_sequence)
@@ -2923,7 +5181,7 @@ def run(is_notebook_session, args=None):
     new_autobreak.set_lower_bound(args.minlength)
     new_autobreak.set_upper_bound(args.maxlength)
     new_autobreak.set_readonly(read_only)
-    new_origami.initialize(input_filename)
+    new_origami.initialize(input_filename, args.fastread)
     new_origami.set_sequence_file(sequence_filename)
     new_origami.set_circularize(True)
     new_autobreak.define_output_files()
@@ -2937,6 +5195,7 @@ def run(is_notebook_session, args=None):
         new_autobreak.compare_complete_solutions()
         new_autobreak.write_results_summary()
         new_autobreak.set_best_sequence_offset()
+        new_origami.attach_cadnano_document()
     else:
         new_origami.prepare_origami()
         new_origami.cluster_oligo_groups()
@@ -2944,10 +5203,12 @@ def run(is_notebook_session, args=None):
         new_autobreak.initialize()
         new_autobreak.create_results_excel_file()
         new_autobreak.permute_scaffold_sequence_autobreak(npermute)
+        new_autobreak.report_solution_cache()
         new_autobreak.correct_complete_solution_offsets()
         new_autobreak.compare_complete_solutions()
         new_autobreak.write_results_summary()
         new_autobreak.write_best_result()
+        new_origami.attach_cadnano_document()
         new_autobreak.break_best_complete_solution()
         new_autobreak.set_best_sequence_offset()
 
@@ -0,0 +1,393 @@
+import json
+
+import numpy as np
+
+# Reads legacy cadnano2 json designs without cadnano for the analysis runs.
+# The classes mirror the part of the cadnano2.5 part, oligo and strand api
+# that Origami reads, cadnano is still needed to modify and write a design.
+
+COMPLEMENT_TABLE = str.maketrans("ATGCatgc", "TACGtacg")
+
+
+class Strand:
+    def __init__(self, part, vh, is_forward, idx_low, idx_high):
+        """Strand read from a legacy cadnano json file"""
+        self.part = part
+        self.vh = vh
+        self.is_forward = is_forward
+        self.idx_low = idx_low
+        self.idx_high = idx_high
+
+        self.strand5p = None  # Strand connected to the 5' end
+        self.strand3p = None  # Strand connected to the 3' end
+        self.parent_oligo = None
+        self.xover_rank = -1  # Install order of the crossover to the 5' end
+        self.applied_sequence = None  # Sequence applied through the oligo
+
+    def idNum(self):
+        """Virtual helix number"""
+        return self.vh
+
+    def isForward(self):
+        """Whether the strand runs in the increasing idx direction"""
+        return self.is_forward
+
+    def idxs(self):
+        """Low and high idx"""
+        return (self.idx_low, self.idx_high)
+
+    def idx5Prime(self):
+        """5' idx"""
+        return self.idx_low if self.is_forward else self.idx_high
+
+    def idx3Prime(self):
+        """3' idx"""
+        return self.idx_high if self.is_forward else self.idx_low
+
+    def length(self):
+        """Number of idx covered by the strand"""
+        return self.idx_high - self.idx_low + 1
+
+    def totalLength(self):
+        """Number of bases including inserts and skips"""
+        return self.length() + self.insertionLengthBetweenIdxs(
+            self.idx_low, self.idx_high
+        )
+
+    def oligo(self):
+        """Oligo of the strand"""
+        return self.parent_oligo
+
+    def connection5p(self):
+        """Strand connected to the 5' end"""
+        return self.strand5p
+
+    def connection3p(self):
+        """Strand connected to the 3' end"""
+        return self.strand3p
+
+    def setConnection3p(self, strand):
+        """Connect the 3' end to the 5' end of a strand"""
+        self.strand3p = strand
+        strand.strand5p = self
+
+        # Joined oligos continue as the oligo of the 5' strand
+        self.part.update_oligo(self.parent_oligo, strand.parent_oligo)
+
+    def generator3pStrand(self):
+        """Iterate from the strand to the 3' end of its oligo"""
+        current_strand = self
+        while current_strand:
+            yield current_strand
+
+            current_strand = current_strand.strand3p
+            if current_strand is self:
+                break
+
+    def getComplementStrands(self):
+        """Strands of the other strand set overlapping the strand"""
+        return [
+            strand
+            for strand in self.part.strand_lists[(not self.is_forward, self.vh)]
+            if strand.idx_low <= self.idx_high and strand.idx_high >= self.idx_low
+        ]
+
+    def hasInsertionAt(self, idx):
+        """Whether there is an insert or a skip at idx"""
+        return self.part.insertions[self.vh][idx] != 0
+
+    def insertionLengthBetweenIdxs(self, idx_low, idx_high):
+        """Total insert size of the helix between two idx, inclusive"""
+        return self.part.get_insertion_length(self.vh, idx_low, idx_high)
+
+    def get_idx_offset(self, idx):
+        """Number of bases from the 5' end to idx"""
+        if self.is_forward:
+            return (
+                idx
+                - self.idx_low
+                + self.part.get_insertion_length(self.vh, self.idx_low, idx - 1)
+            )
+        return (
+            self.idx_high
+            - idx
+            + self.part.get_insertion_length(self.vh, idx + 1, self.idx_high)
+        )
+
+    def get_sequence_chunk(self, idx):
+        """Applied sequence of the bases at idx"""
+        start = self.get_idx_offset(idx)
+        return self.applied_sequence[
+            start : start + 1 + self.part.insertions[self.vh][idx]
+        ]
+
+    def applySequence(self, sequence):
+        """Apply a sequence from the 5' end"""
+        self.applied_sequence = sequence
+
+    def sequence(self):
+        """Applied sequence or the complement of the paired strands"""
+        if self.applied_sequence is not None:
+            return self.applied_sequence
+
+        # Empty bases where there is no applied sequence to pair with
+        chunks = []
+        direction = 1 if self.is_forward else -1
+        for idx in range(self.idx5Prime(), self.idx3Prime() + direction, direction):
+            strand = self.part.getStrand(not self.is_forward, self.vh, idx)
+            if strand is None or strand.applied_sequence is None:
+                chunks.append(" " * (1 + self.part.insertions[self.vh][idx]))
+            else:
+                chunk = strand.get_sequence_chunk(idx)
+                chunks.append(chunk.translate(COMPLEMENT_TABLE)[::-1])
+
+        return "".join(chunks)
+
+    def merge(self, idx):
+        """Merge with the neighbor strand at the 5' or 3' end idx"""
+        direction = 1 if self.is_forward else -1
+        if idx == self.idx3Prime():
+            strand5p = self
+            strand3p = self.part.getStrand(self.is_forward, self.vh, idx + direction)
+        else:
+            strand5p = self.part.getStrand(self.is_forward, self.vh, idx - direction)
+            strand3p = self
+
+        if strand5p is None or strand3p is None:
+            return
+
+        self.part.merge_strands(strand5p, strand3p)
+
+
+class Oligo:
+    def __init__(self, strand5p):
+        """Oligo read from a legacy cadnano json file"""
+        self.strand_5p = strand5p  # 5' strand, the start strand if circular
+        self.color = None
+
+    def strand5p(self):
+        """5' strand"""
+        return self.strand_5p
+
+    def strand3p(self):
+        """3' strand"""
+        if self.isCircular():
+            return self.strand_5p.strand5p
+
+        for strand in self.strand_5p.generator3pStrand():
+            pass
+        return strand
+
+    def isCircular(self):
+        """Whether the oligo is circular"""
+        return self.strand_5p.strand5p is not None
+
+    def length(self):
+        """Number of bases including inserts and skips"""
+        return sum(
+            strand.totalLength() for strand in self.strand_5p.generator3pStrand()
+        )
+
+    def applySequence(self, sequence):
+        """Apply a sequence to the strands from the 5' end"""
+        start = 0
+        for strand in self.strand_5p.generator3pStrand():
+            strand.applySequence(sequence[start : start + strand.totalLength()])
+            start += strand.totalLength()
+
+    def applyColor(self, color):
+        """Keep oligo color"""
+        self.color = color
+
+
+class Part:
+    def __init__(self):
+        """Cadnano part read from a legacy cadnano json file"""
+        self.insertions = {}  # Insert and skip (-1) sizes of each helix
+        self.insertion_sums = {}  # Cumulative insert sizes, leading zero
+        self.strand_maps = {}  # Strand at each idx by (isForward, vh)
+        self.strand_lists = {}  # Strands sorted by idx by (isForward, vh)
+        self.oligo_list = []
+        self.sequence_offset = 0
+        self.num_xovers = 0
+
+    def oligos(self):
+        """Oligos of the part"""
+        return list(self.oligo_list)
+
+    def getStrand(self, is_forward, vh, idx):
+        """Strand at idx, None if there is no strand"""
+        strand_map = self.strand_maps.get((is_forward, vh))
+        if strand_map is None or idx < 0 or idx >= len(strand_map):
+            return None
+        return strand_map[idx]
+
+    def setSequenceOffset(self, offset):
+        """Keep sequence offset"""
+        self.sequence_offset = offset
+
+    def get_insertion_length(self, vh, idx_low, idx_high):
+        """Total insert size between two idx, inclusive"""
+        insertion_sums = self.insertion_sums[vh]
+        idx_low = max(idx_low, 0)
+        idx_high = min(idx_high, len(insertion_sums) - 2)
+        if idx_high < idx_low:
+            return 0
+        return int(insertion_sums[idx_high + 1] - insertion_sums[idx_low])
+
+    def add_helix(self, vh, loops, skips):
+        """Add the insert and skip sizes of a helix"""
+        self.insertions[vh] = [int(loop + skip) for loop, skip in zip(loops, skips)]
+        self.insertion_sums[vh] = np.concatenate(([0], np.cumsum(self.insertions[vh])))
+
+    def read_strands(self, vh, links, is_forward):
+        """Read the strands of a strand set from its [5'vh, 5'idx, 3'vh, 3'idx] links"""
+        strand_map = [None] * len(links)
+        strand_list = []
+
+        new_strand = None
+        for idx, link in enumerate(links):
+            if link == [-1, -1, -1, -1]:
+                new_strand = None
+                continue
+
+            # Consecutive idx belong to the same strand if they are linked
+            if new_strand is not None:
+                previous_link = links[idx - 1]
+                if is_forward:
+                    is_linked = previous_link[2:] == [vh, idx]
+                else:
+                    is_linked = link[2:] == [vh, idx - 1]
+
+                if is_linked:
+                    new_strand.idx_high = idx
+                    strand_map[idx] = new_strand
+                    continue
+
+            new_strand = Strand(self, vh, is_forward, idx, idx)
+            strand_list.append(new_strand)
+            strand_map[idx] = new_strand
+
+        self.strand_maps[(is_forward, vh)] = strand_map
+        self.strand_lists[(is_forward, vh)] = strand_list
+
+    def connect_strands(self, vh, links, is_forward):
+        """Connect the strand 3' ends to the strands they link to"""
+        for strand in self.strand_lists[(is_forward, vh)]:
+            idx3p = strand.idx3Prime()
+            vh3p, idx3p_next = links[idx3p][2:]
+            if vh3p == -1:
+                continue
+
+            # Strand sets alternate direction between even and odd helices
+            next_forward = is_forward if (vh3p - vh) % 2 == 0 else not is_forward
+            next_strand = self.getStrand(next_forward, vh3p, idx3p_next)
+            if next_strand is None:
+                continue
+
+            strand.strand3p = next_strand
+            next_strand.strand5p = strand
+            next_strand.xover_rank = self.num_xovers
+            self.num_xovers += 1
+
+    def build_oligos(self):
+        """Build the oligos from the connected strands"""
+        self.oligo_list = []
+        for strand_list in self.strand_lists.values():
+            for strand in strand_list:
+                if strand.parent_oligo is not None:
+                    continue
+
+                # Follow the strand to the 5' end
+                strand5p = strand
+                while strand5p.strand5p and strand5p.strand5p is not strand:
+                    strand5p = strand5p.strand5p
+
+                # Cadnano starts a circular oligo after its last installed crossover
+                if strand5p.strand5p is strand:
+                    strand5p = max(
+                        strand.generator3pStrand(), key=lambda x: x.xover_rank
+                    )
+
+                new_oligo = Oligo(strand5p)
+                for oligo_strand in strand5p.generator3pStrand():
+                    oligo_strand.parent_oligo = new_oligo
+                self.oligo_list.append(new_oligo)
+
+    def update_oligo(self, oligo, joined_oligo):
+        """Move the strands of a joined oligo to the oligo"""
+        if joined_oligo is not oligo:
+            self.oligo_list.remove(joined_oligo)
+
+        for strand in oligo.strand_5p.generator3pStrand():
+            strand.parent_oligo = oligo
+
+    def merge_strands(self, strand5p, strand3p):
+        """Replace two neighbor strands with a single strand"""
+        merged_strand = Strand(
+            self,
+            strand5p.vh,
+            strand5p.is_forward,
+            min(strand5p.idx_low, strand3p.idx_low),
+            max(strand5p.idx_high, strand3p.idx_high),
+        )
+        merged_strand.parent_oligo = strand5p.parent_oligo
+        merged_strand.xover_rank = strand5p.xover_rank
+
+        # Connect the outer ends, the merged strand may close the oligo
+        merged_strands = (strand5p, strand3p)
+        outer5p = strand5p.strand5p
+        outer3p = strand3p.strand3p
+        merged_strand.strand5p = merged_strand if outer5p in merged_strands else outer5p
+        merged_strand.strand3p = merged_strand if outer3p in merged_strands else outer3p
+        if merged_strand.strand5p is not merged_strand and outer5p is not None:
+            outer5p.strand3p = merged_strand
+        if merged_strand.strand3p is not merged_strand and outer3p is not None:
+            outer3p.strand5p = merged_strand
+
+        # Replace the strands in the strand set
+        key = (merged_strand.is_forward, merged_strand.vh)
+        strand_map = self.strand_maps[key]
+        for idx in range(merged_strand.idx_low, merged_strand.idx_high + 1):
+            strand_map[idx] = merged_strand
+
+        strand_list = [
+            strand for strand in self.strand_lists[key] if strand not in merged_strands
+        ]
+        strand_list.append(merged_strand)
+        self.strand_lists[key] = sorted(strand_list, key=lambda x: x.idx_low)
+
+        # The merged strand replaces the 5' strand of the oligo
+        oligo = strand5p.parent_oligo
+        if oligo.strand_5p in merged_strands:
+            oligo.strand_5p = merged_strand
+        self.update_oligo(oligo, strand3p.parent_oligo)
+
+
+def read_part(filename):
+    """Read a legacy cadnano2 json file into a part"""
+    with open(filename) as f:
+        design = json.load(f)
+
+    new_part = Part()
+
+    # 1. Read helix inserts and skips
+    for vstrand in design["vstrands"]:
+        new_part.add_helix(vstrand["num"], vstrand["loop"], vstrand["skip"])
+
+    # 2. Read strands, scaffold is forward on the even helices
+    for vstrand in design["vstrands"]:
+        vh = vstrand["num"]
+        new_part.read_strands(vh, vstrand["scaf"], vh % 2 == 0)
+        new_part.read_strands(vh, vstrand["stap"], vh % 2 == 1)
+
+    # 3. Connect strands in the order cadnano installs the crossovers
+    for vstrand in design["vstrands"]:
+        vh = vstrand["num"]
+        new_part.connect_strands(vh, vstrand["scaf"], vh % 2 == 0)
+        new_part.connect_strands(vh, vstrand["stap"], vh % 2 == 1)
+
+    # 4. Build oligos
+    new_part.build_oligos()
+
+    return new_part
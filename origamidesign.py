@@ -15,6 +15,7 @@ import matplotlib.colors
 import matplotlib.pyplot as plt
 
 # import autobreak_main
+import cadnanojson
 import scaffolds
 import utilities
 
@@ -27,15 +28,9 @@ class Sequence:
 
     def assign_scaffold_positions(self):
         """Assign scaffold positions"""
-        from autobreak_main import GroupBreaksolution
-
-        self.scaffoldPos = []
-        for idx in range(self.idx5p, self.idx3p + self.direction, self.direction):
-            # Get scaffold position
-            scaffold_positions = self.origami.get_scaffold_positions(self.idNum, idx)
-
-            # Add new positions to list
-            self.scaffoldPos.extend(scaffold_positions)
+        self.scaffoldPos = self.origami.get_scaffold_position_list(
+            self.idNum, self.idx5p, self.idx3p
+        )
 
 
 class OligoGroup:
@@ -60,6 +55,11 @@ class OligoGroup:
         """Sort oligos by length"""
         self.oligos.sort(key=lambda x: x.length, reverse=reverse)
 
+    def reset_oligo_order(self):
+        """Sort oligos by length, oligos with the same length are sorted by key"""
+        self.oligos.sort(key=lambda x: x.key)
+        self.sort_oligos_by_length(reverse=True)
+
     def reset_temp_neighbor_constraints(self):
         """Reset temporary neighbor constraints"""
         for oligo in self.oligos:
@@ -130,9 +130,12 @@ class OligoGroup:
         pick_method="random",
         shuffle_oligos=True,
         verbose=False,
+        sample_seeds=None,
     ):
-        """Create stepwise oligo solutions"""
-        from autobreak_main import GroupBreaksolution  # Deferred import
+        """
+        Create stepwise oligo solutions
+        With sample seeds every sample starts from the same oligo order with its own seed
+        """
         from fastprogress.fastprogress import master_bar, progress_bar
 
         # Initialize group solutions
@@ -148,52 +151,15 @@ class OligoGroup:
         mb.write(f"Processing {oligo_count} oligos per solution.")
 
         for i in mb:
-            # Reset temporary neighbor constraints
-            self.reset_temp_neighbor_constraints()
-
-            # Initialize group break solution
-            new_group_solution = GroupBreaksolution()
-            new_group_solution.break_solutions = {}
-            new_group_solution.origami = self.origami
-
-            # Shuffle oligos
-            if shuffle_oligos:
-                self.shuffle_oligos()
-
-            # Iterate over every oligo
-            # for oligo in tqdm(self.oligos, desc='Oligo loop', leave=False,
-            #                   dynamic_ncols=True, bar_format='{l_bar}{bar}',
-            #                   file=self.origami.tqdm_output_file):
-            # oligo_bar = progress_bar(range(len(self.oligos)), parent=mb)
-            for j in range(len(self.oligos)):
-                oligo = self.oligos[j]
-
-                # If oligo has dont break flag, skip
-                if oligo.dont_break:
-                    continue
-
-                # 1. Create shortest paths
-                oligo.generate_shortest_paths(num_oligo_solutions, verbose=verbose)
-
-                # 2. Remove penalized solutions
-                oligo.remove_penalized_solutions()
-
-                # 3. Pick a solution
-                chosen_solution = oligo.pick_break_solution(pick_method)
-
-                # 4. Assign solution
-                new_group_solution.break_solutions[oligo.key] = chosen_solution
-
-                # 5. Apply temporary neighbor constraints
-                if chosen_solution:
-                    chosen_solution.apply_temp_neighbor_constraints()
-
-            # Calculate the penalties for each group solution
-            new_group_solution.calculate_penalty()
-
-            # Print new group solution
-            if verbose:
-                new_group_solution.print_solution()
+            # Seed the sample
+            if sample_seeds is not None:
+                self.reset_oligo_order()
+                random.seed(sample_seeds[i])
+
+            # Create a group solution
+            new_group_solution = self.create_stepwise_group_solution(
+                num_oligo_solutions, pick_method, shuffle_oligos, verbose
+            )
 
             # Add solution to list
             self.group_solutions.append(new_group_solution)
@@ -212,6 +178,229 @@ class OligoGroup:
             score = new_group_solution.total_score
             mb.write(f"Finished solution {i}. Score: {score:.5f}")
 
+    def create_stepwise_group_solution(
+        self,
+        num_oligo_solutions=100,
+        pick_method="random",
+        shuffle_oligos=True,
+        verbose=False,
+    ):
+        """Create a group solution by breaking the oligos one after another"""
+        from autobreak_main import GroupBreaksolution  # Deferred import
+
+        # Reset temporary neighbor constraints
+        self.reset_temp_neighbor_constraints()
+
+        # Initialize group break solution
+        new_group_solution = GroupBreaksolution()
+        new_group_solution.break_solutions = {}
+        new_group_solution.origami = self.origami
+
+        # Shuffle oligos
+        if shuffle_oligos:
+            self.shuffle_oligos()
+
+        # Iterate over every oligo
+        # for oligo in tqdm(self.oligos, desc='Oligo loop', leave=False,
+        #                   dynamic_ncols=True, bar_format='{l_bar}{bar}',
+        #                   file=self.origami.tqdm_output_file):
+        # oligo_bar = progress_bar(range(len(self.oligos)), parent=mb)
+        for j in range(len(self.oligos)):
+            oligo = self.oligos[j]
+
+            # If oligo has dont break flag, skip
+            if oligo.dont_break:
+                continue
+
+            # 1. Create shortest paths
+            oligo.generate_shortest_paths(num_oligo_solutions, verbose=verbose)
+
+            # 2. Remove penalized solutions
+            oligo.remove_penalized_solutions()
+
+            # 3. Pick a solution
+            chosen_solution = oligo.pick_break_solution(pick_method)
+
+            # 4. Assign solution
+            new_group_solution.break_solutions[oligo.key] = chosen_solution
+
+            # 5. Apply temporary neighbor constraints
+            if chosen_solution:
+                chosen_solution.apply_temp_neighbor_constraints()
+
+        # Calculate the penalties for each group solution
+        new_group_solution.calculate_penalty()
+
+        # Print new group solution
+        if verbose:
+            new_group_solution.print_solution()
+
+        return new_group_solution
+
+    def create_milp_group_solution(self, num_oligo_solutions=100, verbose=False):
+        """
+        Create the group solution with the maximum total score by mixed-integer programming
+
+        Each oligo picks exactly one of its k-best paths. Two paths of different oligos
+        can't be picked together if one of them breaks the neighbor of a break in the
+        other. Returns None if there is no group solution without neighbor conflicts.
+        """
+        from autobreak_main import GroupBreaksolution  # Deferred import
+
+        try:
+            from scipy.optimize import Bounds, LinearConstraint, milp
+            from scipy.sparse import coo_matrix
+        except ImportError:
+            sys.exit("scipy is required for the milp group solver!")
+
+        # 1. Get the k-best paths of every oligo without temporary constraints
+        self.reset_temp_neighbor_constraints()
+        candidate_oligos = []
+        candidate_solutions = []
+        missing_oligos = []
+        for oligo in self.oligos:
+            # If oligo has dont break flag, skip
+            if oligo.dont_break:
+                continue
+
+            oligo.generate_shortest_paths(num_oligo_solutions, verbose=verbose)
+            oligo.remove_penalized_solutions()
+            break_solutions = [
+                break_solution
+                for break_solution in oligo.break_solutions
+                if break_solution.score > -utilities.INFINITY
+            ]
+
+            if len(break_solutions) == 0:
+                missing_oligos.append(oligo)
+                continue
+
+            for break_solution in break_solutions:
+                candidate_oligos.append(oligo)
+                candidate_solutions.append(break_solution)
+
+        num_candidates = len(candidate_solutions)
+
+        # 2. Index the candidate solutions by their break ids
+        break_candidates = {}
+        for i, break_solution in enumerate(candidate_solutions):
+            for break_id in set(
+                current_break.break_id for current_break in break_solution.breaks
+            ):
+                break_candidates.setdefault(break_id, []).append(i)
+
+        # 3. Count the neighbor conflicts between the candidates of different oligos
+        pair_conflicts = {}
+        for i, break_solution in enumerate(candidate_solutions):
+            for current_break in break_solution.breaks[:-1]:
+                neighbor_break = current_break.neighbor_break
+                if not neighbor_break:
+                    continue
+                for j in break_candidates.get(neighbor_break.break_id, []):
+                    if candidate_oligos[i] != candidate_oligos[j]:
+                        pair_key = (min(i, j), max(i, j))
+                        pair_conflicts[pair_key] = pair_conflicts.get(pair_key, 0) + 1
+
+        # Conflicts are counted from both sides and the group penalty is half of the
+        # total count. Pairs with a conflict counted from one side only, at the end of
+        # a linear oligo, are allowed once in the group solution.
+        hard_pairs = sorted(
+            pair_key for pair_key, count in pair_conflicts.items() if count > 1
+        )
+        soft_pairs = sorted(
+            pair_key for pair_key, count in pair_conflicts.items() if count == 1
+        )
+
+        # 4. Build the constraints
+        oligo_rows = {}
+        row_ids = []
+        column_ids = []
+        values = []
+
+        # One solution per oligo
+        for i, oligo in enumerate(candidate_oligos):
+            row_ids.append(oligo_rows.setdefault(oligo.key, len(oligo_rows)))
+            column_ids.append(i)
+            values.append(1)
+        num_rows = len(oligo_rows)
+
+        # No pairs with conflicts from both sides
+        for i, j in hard_pairs:
+            row_ids += [num_rows, num_rows]
+            column_ids += [i, j]
+            values += [1, 1]
+            num_rows += 1
+
+        # Pair variables set for the chosen pairs with one sided conflicts
+        for k, (i, j) in enumerate(soft_pairs):
+            row_ids += [num_rows, num_rows, num_rows]
+            column_ids += [i, j, num_candidates + k]
+            values += [1, 1, -1]
+            num_rows += 1
+
+        # At most one pair with one sided conflict
+        for k in range(len(soft_pairs)):
+            row_ids.append(num_rows)
+            column_ids.append(num_candidates + k)
+            values.append(1)
+        num_rows += 1
+
+        num_variables = num_candidates + len(soft_pairs)
+        lower_bounds = np.full(num_rows, -np.inf)
+        lower_bounds[: len(oligo_rows)] = 1
+        constraint_matrix = coo_matrix(
+            (values, (row_ids, column_ids)), shape=(num_rows, num_variables)
+        ).tocsr()
+
+        # 5. Solve for the maximum total score
+        costs = np.zeros(num_variables)
+        costs[:num_candidates] = [
+            -break_solution.score for break_solution in candidate_solutions
+        ]
+        integrality = np.zeros(num_variables)
+        integrality[:num_candidates] = 1
+
+        chosen_solutions = []
+        if num_candidates > 0:
+            result = milp(
+                costs,
+                constraints=LinearConstraint(
+                    constraint_matrix, lower_bounds, np.ones(num_rows)
+                ),
+                integrality=integrality,
+                bounds=Bounds(0, 1),
+            )
+
+            if result.x is None:
+                logging.warning(
+                    f"No group solution without neighbor conflicts for oligo group {self.key}: {result.message}"
+                )
+                return None
+
+            chosen_solutions = np.flatnonzero(result.x[:num_candidates] > 0.5)
+
+        # 6. Make the group solution
+        new_group_solution = GroupBreaksolution()
+        new_group_solution.break_solutions = {}
+        new_group_solution.origami = self.origami
+
+        for oligo in missing_oligos:
+            new_group_solution.break_solutions[oligo.key] = None
+
+        for i in chosen_solutions:
+            new_group_solution.break_solutions[candidate_oligos[i].key] = (
+                candidate_solutions[i]
+            )
+
+        # Calculate the penalties for the group solution
+        new_group_solution.calculate_penalty()
+
+        # Print new group solution
+        if verbose:
+            new_group_solution.print_solution()
+
+        return new_group_solution
+
     def sort_solutions(self, filter_incomplete=True):
         """Sort solutions based on the penalty score"""
         # 1. Filter incomplete solutions
@@ -244,19 +433,6 @@ class OligoGroup:
             group_solution.print_solution()
 
 
-class Nucleotide:
-    def __init__(self):
-        """Nucleotide class"""
-        self.vh = None
-        self.idx = None
-        self.direction = None
-        self.key = None
-        self.dsDNA = False
-
-        self.next_nucleotide = None
-        self.previous_nucleotide = None
-
-
 class Strand:
     def __init__(self):
         """Strand class"""
@@ -267,6 +443,10 @@ class Strand:
         self.length = None
         self.final_strand = False
 
+        # Insert/skip lengths
+        self.inserts = None  # Insert lengths from 5' to 3'
+        self.insert_sums = None  # Cumulative insert lengths from idxLow
+
         # Possible break locations
         self.fwd_breaks = None  # Fwd break locations along a strand
         self.rev_breaks = None  # Rev break locations along a strand
@@ -280,9 +460,26 @@ class Strand:
         """Get inserts between two idx values on a strand"""
         idx_low, idx_high = (idx_a, idx_b) if idx_b > idx_a else (idx_b, idx_a)
 
+        # Read the cumulative inserts if both idx are on the strand
+        if (
+            self.insert_sums is not None
+            and self.idxLow <= idx_low
+            and idx_high <= self.idxHigh
+        ):
+            return int(
+                self.insert_sums[idx_high - self.idxLow + 1]
+                - self.insert_sums[idx_low - self.idxLow]
+            )
+
         # Get insertion length between two idx
         return self.cadnano_strand.insertionLengthBetweenIdxs(idx_low, idx_high)
 
+    def build_insert_sums(self):
+        """Build the cumulative insert lengths from the low idx of the strand"""
+        low_inserts = self.inserts[:: self.direction]
+        self.insert_sums = np.zeros(len(low_inserts) + 1, dtype=int)
+        np.cumsum(low_inserts, out=self.insert_sums[1:])
+
     def apply_break_rule(self):
         # Get the break rule
         self.break_rule = self.origami.break_rule
@@ -630,6 +827,12 @@ class Oligo:
         # Get k-select parameter
         k_select = self.origami.autobreak.k_select
 
+        # Get circular oligo solver
+        circular_solver = self.origami.autobreak.circular_solver
+
+        # Set number of solutions
+        self.num_solutions_per_oligo = num_solutions
+
         # Show oligo being processed - use tdqm
         if verbose:
             logging.info(
@@ -640,20 +843,55 @@ class Oligo:
             self.break_solutions = []
             return
 
+        # Reuse the solutions found with the same temporary constraints
+        solution_cache = self.origami.autobreak.solution_cache
+        use_cache = self.origami.autobreak.use_solution_cache()
+        if use_cache:
+            cache_key = solution_cache.get_key(self, self.num_solutions_per_oligo)
+            cached_solutions = solution_cache.get_solutions(cache_key)
+            if cached_solutions is not None:
+                self.break_solutions = cached_solutions
+                return
+
         # Initialize break solutions
         self.break_solutions = []
 
         if self.circular:
-            for current_break in self.breaks:
-                if current_break.dont_break or current_break.dont_break_temp:
-                    continue
+            # Keys of the break sets found from the earlier start breaks
+            solution_keys = set()
+
+            # Check if there are neighbor breaks within the oligo
+            has_self_neighbors = any(
+                current_break.neighbor_break
+                and current_break.neighbor_break.oligo == self
+                for current_break in self.breaks
+            )
 
+            for current_break in self.get_circular_start_breaks():
                 self.reset_break_paths()
                 self.reset_break_order_ids(current_break, current_break)
                 shortest_k_paths = current_break.get_k_shortest_paths(
                     current_break, self.num_solutions_per_oligo, k_select
                 )
-                self.break_solutions += shortest_k_paths
+
+                # Neighbor penalties make the shortest path depend on the start break,
+                # in window mode also add the best path without neighbor penalties
+                if circular_solver == "window" and has_self_neighbors:
+                    best_path = next(
+                        current_break.generate_best_paths(current_break), None
+                    )
+                    if best_path and best_path.score > -utilities.INFINITY:
+                        shortest_k_paths.append(best_path)
+
+                # Add the solutions, in window mode skip the rotations of found solutions
+                for break_solution in shortest_k_paths:
+                    if circular_solver == "window":
+                        solution_key = break_solution.get_rotation_key()
+                        if solution_key in solution_keys:
+                            continue
+                        solution_keys.add(solution_key)
+
+                    self.break_solutions.append(break_solution)
 
                 if not shortest_k_paths:
                     logging.warning(
@@ -677,6 +915,86 @@ class Oligo:
         for break_solution in self.break_solutions:
             break_solution.calculate_self_penalty()
 
+        # Add the solutions to the cache
+        if use_cache:
+            solution_cache.add_solutions(cache_key, self.break_solutions)
+
+    def get_circular_start_breaks(self):
+        """
+        Get the start breaks for the shortest path search of a circular oligo
+
+        Consecutive breaks of a solution are at most UPPER_BOUND apart, so every
+        solution has a break in any window of UPPER_BOUND bases. In window mode
+        only the breaks in the window with the fewest breakable breaks are used.
+        """
+        start_breaks = [
+            current_break
+            for current_break in self.breaks
+            if not current_break.dont_break and not current_break.dont_break_temp
+        ]
+
+        # Get upper bound
+        upper_bound = self.origami.autobreak.UPPER_BOUND
+
+        if (
+            self.origami.autobreak.circular_solver == "all"
+            or len(start_breaks) == 0
+            or self.length <= upper_bound
+        ):
+            return start_breaks
+
+        # Number of breakable breaks in the window starting at each break
+        distances = np.array(
+            [current_break.distance for current_break in start_breaks], dtype=int
+        )
+        distances = np.sort(distances)
+        num_breaks = len(distances)
+        window_ends = np.searchsorted(
+            np.hstack((distances, distances + self.length)),
+            distances + upper_bound,
+            side="left",
+        )
+        window_counts = window_ends - np.arange(num_breaks)
+
+        # Get the breaks in the smallest window
+        window_start = distances[np.argmin(window_counts)]
+        return [
+            current_break
+            for current_break in start_breaks
+            if (current_break.distance - window_start) % self.length < upper_bound
+        ]
+
+    def get_score_bound(self, edge_weights=None):
+        """
+        Get an upper bound for the scores of the oligo solutions from the best
+        paths without neighbor penalties, -inf if there is no path
+        """
+        # Temporary constraints only remove paths, restore them after the bound
+        temp_constraints = [
+            current_break.dont_break_temp for current_break in self.breaks
+        ]
+        self.reset_temp_neighbor_constraints()
+
+        if not self.circular:
+            self.reset_break_order_ids(self.start_break, self.final_break)
+            score_bound = self.start_break.get_best_score(
+                self.final_break, edge_weights
+            )
+        else:
+            # Every circular solution has a break among the start breaks
+            score_bound = -np.inf
+            for current_break in self.get_circular_start_breaks():
+                self.reset_break_order_ids(current_break, current_break)
+                score_bound = np.maximum(
+                    score_bound,
+                    current_break.get_best_score(current_break, edge_weights),
+                )
+
+        for current_break, dont_break_temp in zip(self.breaks, temp_constraints):
+            current_break.dont_break_temp = dont_break_temp
+
+        return score_bound
+
     def reset_break_paths(self):
         for current_break in self.breaks:
             current_break.reset_break_path()
@@ -699,9 +1017,10 @@ class Origami:
         """Origami class"""
 
         self.json_input = None
+        self.doc = None
+        self.part = None
         self.oligos = {"scaffold": [], "staple": []}
         self.oligo_map = {}
-        self.break_edge_map = {}
         self.oligo_groups = None
 
         self.cadnano_oligos = None
@@ -710,6 +1029,19 @@ class Origami:
         self.idnums = None
         self.scaffold_sequence = None
         self.reverse_scaffold = False
+        self.thermo_table = None
+
+        # Scaffold positions, helix offset arrays into the flat position arrays
+        self.scaffold_position_ptr = {}
+        self.scaffold_positions = None
+        self.scaffold_positions_rev = None
+
+        # Occupancy arrays by helix, rows are the reverse and forward strands
+        self.occupancy_oligos = []
+        self.occupancy_strands = []
+        self.strand_id_map = {}
+        self.oligo_id_map = {}
+        self.dsDNA_map = {}
 
         # Structure parameter
         self.num_crossovers = 0
@@ -723,6 +1055,7 @@ class Origami:
         self.corrected_offset = 0
         self.sequence_start_pos = None
         self.current_start_pos = None
+        self.scaffold_connected = False
 
         # tqdm output file
         self.tqdm_output_file = None
@@ -782,7 +1115,6 @@ class Origami:
         """Circularize scaffold"""
 
         strand5p = self.scaffolds[0].strand5p()
-        strand3p = self.scaffolds[0].strand3p()
 
         # Set sequence start position before circularizing
         if self.sequence_start_pos is None:
@@ -790,20 +1122,14 @@ class Origami:
 
         # Connect strand5p and strand3p
         if self.circularize and not self.scaffolds[0].isCircular():
-            if (
-                strand5p.idNum() == strand3p.idNum()
-                and abs(strand5p.idx5Prime() - strand3p.idx3Prime()) == 1
-            ):
-                strand3p.merge(strand3p.idx3Prime())
-            else:
-                strand3p.setConnection3p(strand5p)
+            self.connect_scaffold_ends()
+            self.scaffold_connected = True
 
             # Read cadnano oligos again
             self.get_oligos()
 
         # Get the new start position for the scaffold
         strand5p = self.scaffolds[0].strand5p()
-        strand3p = self.scaffolds[0].strand3p()
 
         # Get current start position
         self.current_start_pos = (strand5p.idNum(), strand5p.idx5Prime())
@@ -811,6 +1137,19 @@ class Origami:
         # Set circularize oligo False so that this function is executed only once
         self.circularize = False
 
+    def connect_scaffold_ends(self):
+        """Connect the 3' end of the scaffold to its 5' end"""
+        strand5p = self.scaffolds[0].strand5p()
+        strand3p = self.scaffolds[0].strand3p()
+
+        if (
+            strand5p.idNum() == strand3p.idNum()
+            and abs(strand5p.idx5Prime() - strand3p.idx3Prime()) == 1
+        ):
+            strand3p.merge(strand3p.idx3Prime())
+        else:
+            strand3p.setConnection3p(strand5p)
+
     def determine_num_crossovers(self):
         """Determine total number of crossovers"""
         self.num_crossovers = 0
@@ -826,20 +1165,10 @@ class Origami:
 
             # Iterate over each strand
             while current_strand:
-                direction = current_strand.direction
-                vh = current_strand.vh
-                idx5p = current_strand.idx5p
-                idx3p = current_strand.idx3p
-
                 # Keep the positions
-                current_strand.scaffoldPos = []
-
-                for idx in range(idx5p, idx3p + direction, direction):
-                    # Get scaffold position
-                    scaffold_positions = self.get_scaffold_positions(vh, idx)
-
-                    # Add new positions to list
-                    current_strand.scaffoldPos.extend(scaffold_positions)
+                current_strand.scaffoldPos = self.get_scaffold_position_list(
+                    current_strand.vh, current_strand.idx5p, current_strand.idx3p
+                )
 
                 # Update current strand
                 current_strand = current_strand.next_strand
@@ -900,40 +1229,97 @@ class Origami:
 
     def get_scaffold_positions(self, vh, idx):
         """Get scaffold position"""
-        # Make the key
-        key = (vh, idx)
+        return self.get_scaffold_position_list(vh, idx, idx)
 
-        if key in self.key2scaffold:
-            if self.key2scaffold[key] == -1:
-                return []
-            else:
-                return self.key2scaffold[key]
-        else:
-            return [None]
+    def get_scaffold_position_list(self, vh, idx5p, idx3p):
+        """
+        Get the scaffold positions from idx5p to idx3p on a helix, None where
+        there is no scaffold
+        """
+        idx_low, idx_high = (idx5p, idx3p) if idx3p >= idx5p else (idx3p, idx5p)
+        if vh not in self.scaffold_position_ptr:
+            return [None] * (idx_high - idx_low + 1)
+
+        # idx outside the helix range of the map have no scaffold
+        position_ptr = self.scaffold_position_ptr[vh]
+        helix_length = len(position_ptr) - 1
+        num_below = max(0, min(idx_high + 1, 0) - idx_low)
+        num_above = max(0, idx_high + 1 - max(idx_low, helix_length))
+
+        # Read the positions in idx order, reversed for reverse strands
+        first_idx = max(idx_low, 0)
+        last_idx = min(idx_high, helix_length - 1)
+        scaffold_positions = (
+            self.scaffold_positions if idx3p >= idx5p else self.scaffold_positions_rev
+        )
+        position_list = [None] * num_below
+        if first_idx <= last_idx:
+            position_list += [
+                position if position >= 0 else None
+                for position in scaffold_positions[
+                    position_ptr[first_idx] : position_ptr[last_idx + 1]
+                ].tolist()
+            ]
+        position_list += [None] * num_above
+
+        if idx3p < idx5p:
+            position_list.reverse()
+
+        return position_list
+
+    def get_strand_id(self, vh, idx, direction):
+        """Get the id of the strand at vh, idx, direction, -1 if there is none"""
+        if (
+            vh not in self.strand_id_map
+            or not 0 <= idx < self.strand_id_map[vh].shape[1]
+        ):
+            return -1
+        return self.strand_id_map[vh][int(direction > 0), idx]
+
+    def get_staple_strand(self, key):
+        """Get the staple strand at a nucleotide key"""
+        strand_id = self.get_strand_id(*key)
+        if strand_id < 0:
+            return None
+
+        # Check the type of the oligo at the key
+        vh, idx, direction = key
+        oligo_id = self.oligo_id_map[vh][int(direction > 0), idx]
+        if self.occupancy_oligos[oligo_id].type != "staple":
+            return None
+
+        return self.occupancy_strands[strand_id]
 
     def get_current_nucleotide(self, key):
-        """Get nucleotide from nucleotide map"""
-        if key in self.nucleotide_map:
-            return self.nucleotide_map[key]
+        """Get the key of a staple nucleotide, None if there is no staple"""
+        if self.get_staple_strand(key):
+            return key
         else:
             return None
 
     def get_next_nucleotide(self, key):
-        """Get next nucleotide"""
-        if key in self.nucleotide_map:
-            return self.nucleotide_map[key].next_nucleotide
-        else:
+        """Get the key of the next nucleotide on the staple"""
+        current_strand = self.get_staple_strand(key)
+        if current_strand is None:
+            return None
+
+        # Next idx on the same strand
+        vh, idx, direction = key
+        if idx != current_strand.idx3p:
+            return (vh, idx + direction, direction)
+
+        # 5' end of the next strand
+        next_strand = current_strand.next_strand
+        if next_strand is None:
             return None
 
+        return (next_strand.vh, next_strand.idx5p, next_strand.direction)
+
     def is_dsDNA(self, vh, idx):
         """Check if it is dsDNA"""
-        forward_strand = self.get_cadnano_strand(vh, idx, True)
-        reverse_strand = self.get_cadnano_strand(vh, idx, False)
-
-        if forward_strand and reverse_strand:
-            return True
-        else:
+        if vh not in self.dsDNA_map or not 0 <= idx < len(self.dsDNA_map[vh]):
             return False
+        return bool(self.dsDNA_map[vh][idx])
 
     def set_dont_break_very_long_staples(self, value=False):
         """Set break very long staples"""
@@ -999,15 +1385,15 @@ class Origami:
         # Read sequence file
         self.read_sequence()
 
+        # Build thermodynamic tables for the scaffold sequence
+        self.build_thermo_table()
+
         # Read scaffolds
         self.read_scaffolds()
 
         # Read scaffolds and staples
         self.read_staples()
 
-        # Build scaffold map
-        self.build_scaffold_map()
-
         # Apply sequence
         self.apply_sequence(self.sequence_offset)
 
@@ -1032,8 +1418,8 @@ class Origami:
         # Link crossovers
         self.link_crossovers()
 
-        # Build nucleotide map
-        self.build_nucleotide_map()
+        # Build occupancy maps
+        self.build_occupancy_maps()
 
         # Generate dsDNA sequences
         self.generate_dsDNA_sequences()
@@ -1083,20 +1469,40 @@ class Origami:
         if strand5p is not None and strand3p is not None:
             self.part.removeXover(strand5p, strand3p)
 
-    def initialize(self, input_filename):
+    def initialize(self, input_filename, fast_read=False):
+        # Assign cadnano input file
+        self.json_input = input_filename
+
+        # Read the json file directly, cadnano is read when the design is modified
+        if fast_read:
+            self.part = cadnanojson.read_part(self.json_input)
+        else:
+            self.read_cadnano_document()
+
+    def read_cadnano_document(self):
+        """Read the input file with cadnano"""
         # Initialize cadnano
         app = cadnano.app()
         self.doc = app.document = Document()
 
-        # Assign cadnano input file
-        self.json_input = input_filename
-
         # Read cadnano input file
         self.doc.readFile(self.json_input)
 
         # Assign part
         self.part = self.doc.activePart()
 
+    def attach_cadnano_document(self):
+        """Read cadnano document for a design read with the fast reader"""
+        if self.doc is not None:
+            return
+
+        self.read_cadnano_document()
+
+        # Connect the scaffold ends as on the fast reader part
+        if self.scaffold_connected:
+            self.get_oligos()
+            self.connect_scaffold_ends()
+
     def split_scaffold(self):
         """Split scaffold at the starting position - (direction)"""
 
@@ -1193,9 +1599,13 @@ class Origami:
             new_strand.distance = previous_strand.distance + previous_strand.totalLength
             new_strand.origami = self
 
-            # Prepare the insert/skip list
+            # Prepare the insert/skip list of the strand
             new_strand.inserts = []
-            for idx in range(idx5p, idx3p + direction, direction):
+            for idx in range(
+                new_strand.idx5p,
+                new_strand.idx3p + new_strand.direction,
+                new_strand.direction,
+            ):
                 # Initialize insert size
                 insert_size = 0
                 if strand.hasInsertionAt(idx):
@@ -1203,7 +1613,10 @@ class Origami:
                 new_strand.inserts.append(insert_size)
 
             # Make a numpy array
-            new_strand.inserts = np.array(new_strand.inserts)
+            new_strand.inserts = np.array(new_strand.inserts, dtype=int)
+
+            # Cumulative inserts for the insert queries
+            new_strand.build_insert_sums()
 
             # Make the strand connection
             previous_strand.next_strand = new_strand
@@ -1680,50 +2093,52 @@ class Origami:
         """Determine long range contacts"""
         self.long_range_breaks = []
 
-    def build_nucleotide_map(self):
-        """Make nucleotide map"""
-        # Initialize nucleotide map
-        self.nucleotide_map = {}
-
-        for oligo in self.oligos["staple"]:
-
-            # Make a dummy nucleotide
-            previous_nucleotide = Nucleotide()
-            oligo.null_nucleotide = previous_nucleotide
+    def build_occupancy_maps(self):
+        """
+        Make the occupancy arrays of the helices. Strand and oligo ids index
+        occupancy_strands and occupancy_oligos, -1 marks empty positions
+        """
+        self.occupancy_oligos = self.oligos["scaffold"] + self.oligos["staple"]
+        self.occupancy_strands = []
+        strand_oligo_ids = []
 
-            # Get current strand
+        for oligo_id, oligo in enumerate(self.occupancy_oligos):
             current_strand = oligo.null_strand.next_strand
-
             while current_strand:
-                idx5p = current_strand.idx5p
-                idx3p = current_strand.idx3p
-                direction = current_strand.direction
-                for idx in range(idx5p, idx3p + direction, direction):
-                    # Make a new nucleotide
-                    new_nucleotide = Nucleotide()
-                    new_nucleotide.vh = current_strand.vh
-                    new_nucleotide.idx = idx
-                    new_nucleotide.direction = direction
-                    new_nucleotide.key = (
-                        new_nucleotide.vh,
-                        new_nucleotide.idx,
-                        new_nucleotide.direction,
-                    )
-                    new_nucleotide.dsDNA = self.is_dsDNA(
-                        new_nucleotide.vh, new_nucleotide.idx
-                    )
-                    # Assign new nucleotide
-                    self.nucleotide_map[new_nucleotide.key] = new_nucleotide
+                self.occupancy_strands.append(current_strand)
+                strand_oligo_ids.append(oligo_id)
+                current_strand = current_strand.next_strand
 
-                    # Make the links
-                    previous_nucleotide.next_nucleotide = new_nucleotide
-                    new_nucleotide.previous_nucleotide = previous_nucleotide
+        # Helix lengths from the highest idx on each helix
+        helix_lengths = {}
+        for current_strand in self.occupancy_strands:
+            helix_lengths[current_strand.vh] = max(
+                helix_lengths.get(current_strand.vh, 0), current_strand.idxHigh + 1
+            )
 
-                    # Update previous nucleotide
-                    previous_nucleotide = new_nucleotide
+        self.strand_id_map = {
+            vh: np.full((2, length), -1, dtype=int)
+            for vh, length in helix_lengths.items()
+        }
+        self.oligo_id_map = {
+            vh: np.full((2, length), -1, dtype=int)
+            for vh, length in helix_lengths.items()
+        }
+
+        # Fill the idx range of each strand
+        for strand_id, current_strand in enumerate(self.occupancy_strands):
+            row = int(current_strand.forward)
+            idx_range = slice(current_strand.idxLow, current_strand.idxHigh + 1)
+            self.strand_id_map[current_strand.vh][row, idx_range] = strand_id
+            self.oligo_id_map[current_strand.vh][row, idx_range] = strand_oligo_ids[
+                strand_id
+            ]
 
-                # Update current strand
-                current_strand = current_strand.next_strand
+        # dsDNA where both directions have a strand
+        self.dsDNA_map = {
+            vh: np.all(strand_ids >= 0, axis=0)
+            for vh, strand_ids in self.strand_id_map.items()
+        }
 
     def generate_break_points(self):
         """Generate break points"""
@@ -1917,6 +2332,10 @@ class Origami:
             # Add breaks to origami list
             self.breaks += oligo.breaks
 
+        # Assign break ids used by the edge table
+        for break_id, current_break in enumerate(self.breaks):
+            current_break.break_id = break_id
+
     def disable_staple_crossovers(self):
         """Disable all crossover break nodes"""
         for key in self.crossovers:
@@ -1972,55 +2391,82 @@ class Origami:
                 else:
                     current_break.type = "break"
 
+    def get_oligo_group_ids(self, group_oligos):
+        """
+        Group ids of the breaks and oligos from a union-find over integer ids,
+        breaks are connected to their oligo and to their next and neighbor breaks
+        """
+        num_breaks = len(self.breaks)
+
+        # 1. Node ids, breaks in list order followed by oligos
+        break_positions = [0] * num_breaks
+        for position, current_break in enumerate(self.breaks):
+            break_positions[current_break.break_id] = position
+
+        oligo_ids = {
+            oligo.key: num_breaks + oligo_id
+            for oligo_id, oligo in enumerate(group_oligos)
+        }
+
+        # 2. Edge lists
+        sources = []
+        targets = []
+        for position, current_break in enumerate(self.breaks):
+            sources.append(position)
+            targets.append(oligo_ids[current_break.oligo.key])
+
+            if current_break.next_break:
+                sources.append(position)
+                targets.append(break_positions[current_break.next_break.break_id])
+
+            if current_break.neighbor_break:
+                sources.append(position)
+                targets.append(break_positions[current_break.neighbor_break.break_id])
+
+        # 3. Label the groups, numbered in the order of their first break
+        group_ids = utilities.get_connected_components(
+            num_breaks + len(group_oligos), sources, targets
+        )
+
+        return group_ids[:num_breaks], group_ids[num_breaks:]
+
     def cluster_oligo_groups(self):
         """Cluster oligos based on break connectivity"""
         # Initialize oligo groups
         self.oligo_groups = []
 
-        # Group key
-        group_key = 0
-
         # Sort breaks by key
         self.sort_breaks_by_key()
 
-        for current_break in self.breaks:
-            if not current_break.visited:
-                # Create new oligo group
-                new_oligo_group = OligoGroup()
-
-                # Perform depth first search starting from current break
-                visited_breaks = current_break.depth_first_search()
-
-                # Get the oligos for the visited breaks
-                visited_oligos = set([new_break.oligo for new_break in visited_breaks])
-
-                # For all visited breaks make the oligo group assignment
-                for new_break in visited_breaks:
-                    new_break.oligo_group = new_oligo_group
-
-                # For all visited oligos make the oligo group assignment
-                for new_oligo in visited_oligos:
-                    new_oligo.oligo_group = new_oligo_group
-
-                # Assign breaks and oligos to oligo group
-                new_oligo_group.breaks = list(visited_breaks)
-                new_oligo_group.oligos = list(visited_oligos)
+        # Oligos with breaks sorted by key
+        group_oligos = sorted(
+            [oligo for oligo in self.oligos["staple"] if oligo.breaks],
+            key=lambda x: x.key,
+        )
 
-                # Sort group breaks and oligos by key
-                new_oligo_group.breaks.sort(key=lambda x: x.key)
-                new_oligo_group.oligos.sort(key=lambda x: x.key)
+        # Get the group ids of breaks and oligos
+        break_group_ids, oligo_group_ids = self.get_oligo_group_ids(group_oligos)
+        num_groups = int(break_group_ids.max()) + 1 if len(break_group_ids) else 0
 
-                # Assign group key
-                new_oligo_group.key = group_key
+        for group_key in range(num_groups):
+            # Create new oligo group
+            new_oligo_group = OligoGroup()
+            new_oligo_group.key = group_key
+            new_oligo_group.origami = self
+            new_oligo_group.breaks = []
+            new_oligo_group.oligos = []
 
-                # Assign origami to oligo group
-                new_oligo_group.origami = self
+            # Add oligo group to the list
+            self.oligo_groups.append(new_oligo_group)
 
-                # Update oligo group key
-                group_key += 1
+        # Assign breaks and oligos to the groups, both are in key order
+        for current_break, group_id in zip(self.breaks, break_group_ids.tolist()):
+            current_break.oligo_group = self.oligo_groups[group_id]
+            current_break.oligo_group.breaks.append(current_break)
 
-                # Add oligo group to the list
-                self.oligo_groups.append(new_oligo_group)
+        for oligo, group_id in zip(group_oligos, oligo_group_ids.tolist()):
+            oligo.oligo_group = self.oligo_groups[group_id]
+            oligo.oligo_group.oligos.append(oligo)
 
     def read_staple(self, staple):
         """Read staple from 5' to 3'"""
@@ -2048,46 +2494,82 @@ class Origami:
         self.read_oligo(scaffold, oligo_type="scaffold")
 
     def build_scaffold_map(self):
-        """Build scaffold map"""
-        # Initialize scaffold maps
-        self.scaffold2key = {}
-        self.key2scaffold = {}
-
+        """
+        Build scaffold map. Each helix has an offset array into the flat scaffold
+        position arrays, an idx has one position per base including inserts and
+        none for a skip. Positions of an idx are in decreasing order, increasing
+        in the reversed array, and -1 where there is no scaffold.
+        """
         # Get the first scaffold
         scaffold = self.oligos["scaffold"][0]
 
-        # Position counter
-        position = 0
-
-        # Assign current strand
+        # Helix, idx and inserts of the scaffold bases in scaffold order
+        scaffold_vhs = []
+        scaffold_idxs = []
+        scaffold_inserts = []
         current_strand = scaffold.null_strand.next_strand
-
         while current_strand:
-            # Get the position parameters
-            idx5p = current_strand.idx5p
-            idx3p = current_strand.idx3p
-            direction = current_strand.direction
-            vh = current_strand.vh
-
-            for idx in range(idx5p, idx3p + direction, direction):
-                key = (vh, idx)
-                num_inserts = current_strand.get_inserts(idx, idx)
-                position += num_inserts + 1
-
-                # Assign the values
-                if position not in self.scaffold2key:
-                    self.scaffold2key[position] = key
-
-                if num_inserts == -1:
-                    self.key2scaffold[key] = -1
-                else:
-                    self.key2scaffold[key] = list(
-                        range(position - num_inserts, position + 1)
-                    )[::-1]
+            scaffold_vhs.append(np.full(current_strand.length, current_strand.vh))
+            scaffold_idxs.append(
+                np.arange(
+                    current_strand.idx5p,
+                    current_strand.idx3p + current_strand.direction,
+                    current_strand.direction,
+                )
+            )
+            scaffold_inserts.append(current_strand.inserts)
 
             # Update current strand
             current_strand = current_strand.next_strand
 
+        scaffold_vhs = np.concatenate(scaffold_vhs)
+        scaffold_idxs = np.concatenate(scaffold_idxs)
+        scaffold_counts = np.concatenate(scaffold_inserts) + 1
+
+        # Last scaffold position of each idx
+        last_positions = np.cumsum(scaffold_counts)
+
+        self.scaffold_position_ptr = {}
+        positions_list = []
+        reversed_positions_list = []
+        num_positions = 0
+        for vh in np.unique(scaffold_vhs).tolist():
+            on_helix = scaffold_vhs == vh
+            helix_idxs = scaffold_idxs[on_helix]
+            helix_length = helix_idxs.max() + 1
+
+            # Position counts and last positions by idx, one empty position off the scaffold
+            position_counts = np.ones(helix_length, dtype=int)
+            position_counts[helix_idxs] = scaffold_counts[on_helix]
+            helix_last_positions = np.full(helix_length, -1, dtype=int)
+            helix_last_positions[helix_idxs] = last_positions[on_helix]
+
+            position_ptr = np.zeros(helix_length + 1, dtype=int)
+            np.cumsum(position_counts, out=position_ptr[1:])
+
+            # Steps from the last position within each idx
+            steps = np.arange(position_ptr[-1]) - np.repeat(
+                position_ptr[:-1], position_counts
+            )
+            repeated_last = np.repeat(helix_last_positions, position_counts)
+            repeated_counts = np.repeat(position_counts, position_counts)
+            positions_list.append(
+                np.where(repeated_last >= 0, repeated_last - steps, -1)
+            )
+            reversed_positions_list.append(
+                np.where(
+                    repeated_last >= 0,
+                    repeated_last - (repeated_counts - 1 - steps),
+                    -1,
+                )
+            )
+
+            self.scaffold_position_ptr[vh] = position_ptr + num_positions
+            num_positions += position_ptr[-1]
+
+        self.scaffold_positions = np.concatenate(positions_list)
+        self.scaffold_positions_rev = np.concatenate(reversed_positions_list)
+
     def get_oligos(self):
         """Get oligos"""
         self.cadnano_oligos = self.part.oligos()
@@ -2176,6 +2658,10 @@ class Origami:
 
         return self.scaffold_sequence
 
+    def build_thermo_table(self):
+        """Build cumulative thermodynamic tables for the scaffold sequence"""
+        self.thermo_table = utilities.ScaffoldThermoTable(self.scaffold_sequence)
+
     def apply_sequence(self, offset=0):
         """Apply sequence to scaffold"""
         self.sequence_offset = offset
@@ -0,0 +1,172 @@
+import contextlib
+import io
+import json
+import os
+import sys
+
+import pytest
+
+# The modules live at the top of the repository
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def write_design(
+    filename,
+    num_helices=4,
+    helix_length=126,
+    skip_step=48,
+    circular=False,
+    insert_step=None,
+):
+    """
+    Write a legacy cadnano json design on a honeycomb lattice with a single scaffold
+    running through all helices and two helix staples crossing over between helix pairs.
+    A circular design has a circular scaffold and a circular staple on the first helices
+    """
+    vstrands = [
+        {
+            "num": num,
+            "row": 0,
+            "col": num,
+            "scaf": [[-1, -1, -1, -1] for _ in range(helix_length)],
+            "stap": [[-1, -1, -1, -1] for _ in range(helix_length)],
+            "loop": [0] * helix_length,
+            "skip": [0] * helix_length,
+            "scafLoop": [],
+            "stapLoop": [],
+            "stap_colors": [],
+        }
+        for num in range(num_helices)
+    ]
+
+    def add_path(strand_type, path, is_circular=False):
+        for i, (num, idx) in enumerate(path):
+            prev_num, prev_idx = path[i - 1] if i > 0 or is_circular else (-1, -1)
+            next_num, next_idx = path[(i + 1) % len(path)]
+            if i + 1 == len(path) and not is_circular:
+                next_num, next_idx = -1, -1
+            vstrands[num][strand_type][idx] = [prev_num, prev_idx, next_num, next_idx]
+
+    # Scaffold goes forward on even and reverse on odd helices
+    scaffold_path = []
+    for num in range(num_helices):
+        if num % 2 == 0:
+            scaffold_path += [(num, idx) for idx in range(5, helix_length - 5)]
+        else:
+            scaffold_path += [(num, idx) for idx in range(helix_length - 6, 4, -1)]
+    add_path("scaf", scaffold_path, circular)
+
+    # Staples run opposite to the scaffold, staple pairs make double crossovers
+    for num in range(0, num_helices - 1, 2):
+        for i, start in enumerate(range(5, helix_length - 26, 21)):
+            end = start + 20
+            if i % 2 == 0:
+                staple_path = [(num + 1, idx) for idx in range(start, end + 1)] + [
+                    (num, idx) for idx in range(end, start - 1, -1)
+                ]
+            else:
+                staple_path = [(num, idx) for idx in range(end, start - 1, -1)] + [
+                    (num + 1, idx) for idx in range(start, end + 1)
+                ]
+            add_path("stap", staple_path)
+
+    # Circular staple after the last staple on the first helices
+    if circular:
+        start = helix_length - 14
+        end = helix_length - 6
+        add_path(
+            "stap",
+            [(0, idx) for idx in range(end, start - 1, -1)]
+            + [(1, idx) for idx in range(start, end + 1)],
+            True,
+        )
+
+    # Skips
+    for vstrand in vstrands:
+        for idx in range(7, helix_length, skip_step):
+            vstrand["skip"][idx] = -1
+
+    # Inserts of one and two bases
+    if insert_step:
+        for vstrand in vstrands:
+            for i, idx in enumerate(range(20, helix_length, insert_step)):
+                vstrand["loop"][idx] = 1 + i % 2
+
+    with open(filename, "w") as design_file:
+        json.dump({"name": "test", "vstrands": vstrands}, design_file)
+
+
+@pytest.fixture
+def design_file(tmp_path):
+    """Path of a small cadnano json design"""
+    filename = str(tmp_path / "design.json")
+    write_design(filename)
+    return filename
+
+
+@pytest.fixture
+def insert_design_file(tmp_path):
+    """Path of a small cadnano json design with inserts and skips"""
+    filename = str(tmp_path / "insert_design.json")
+    write_design(filename, skip_step=24, insert_step=17)
+    return filename
+
+
+@pytest.fixture
+def circular_design_file(tmp_path):
+    """Path of a small cadnano json design with circular oligos"""
+    filename = str(tmp_path / "circular_design.json")
+    write_design(filename, circular=True)
+    return filename
+
+
+def prepare_autobreak(filename, lower_bound=6, upper_bound=60):
+    """AutoBreak with a prepared origami read from a design file with the json reader"""
+    pytest.importorskip("cadnano")
+    pytest.importorskip("cn2svg")
+    import autobreak_main
+    import origamidesign
+    import utilities
+
+    new_autobreak = autobreak_main.AutoBreak()
+    new_origami = origamidesign.Origami()
+    new_autobreak.origami = new_origami
+    new_origami.autobreak = new_autobreak
+
+    new_autobreak.set_break_rule(utilities.parse_break_rule("xstap.all3"))
+    new_autobreak.LOWER_BOUND = lower_bound
+    new_autobreak.UPPER_BOUND = upper_bound
+    new_autobreak.set_optimization_func(
+        utilities.parse_optim_function("dG:50.14:1.Tm:45.structure:1")
+    )
+    new_autobreak.set_score_func(["sum"])
+    new_autobreak.set_temperature_parameter()
+
+    new_origami.initialize(filename, True)
+    new_origami.set_circularize(True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        new_origami.prepare_origami()
+        new_origami.cluster_oligo_groups()
+
+    return new_autobreak
+
+
+@pytest.fixture
+def prepared_autobreak(design_file):
+    """AutoBreak with a prepared origami read with the json reader"""
+    return prepare_autobreak(design_file)
+
+
+@pytest.fixture
+def insert_origami(insert_design_file):
+    """Prepared origami of the design with inserts and skips"""
+    return prepare_autobreak(insert_design_file).origami
+
+
+@pytest.fixture
+def circular_autobreak(circular_design_file):
+    """
+    AutoBreak with a prepared circular design, the upper bound is shorter than
+    the circular staple so its start breaks can be limited to a window
+    """
+    return prepare_autobreak(circular_design_file, lower_bound=3, upper_bound=8)
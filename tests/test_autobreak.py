@@ -0,0 +1,604 @@
+import contextlib
+import io
+import itertools
+import os
+import random
+
+import numpy as np
+import pytest
+
+
+def get_group_solution_keys(new_autobreak):
+    """Path keys of the oligo solutions in the group solutions of each oligo group"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        new_autobreak.solution_cache.clear()
+        new_autobreak.create_stepwise_group_solutions()
+
+    return [
+        [
+            sorted(
+                (oligo_key, break_solution.get_path_key() if break_solution else None)
+                for oligo_key, break_solution in group_solution.break_solutions.items()
+            )
+            for group_solution in oligo_group.group_solutions
+        ]
+        for oligo_group in new_autobreak.origami.oligo_groups
+    ]
+
+
+def test_group_solutions_independent_of_jobs(prepared_autobreak):
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+    prepared_autobreak.set_solution_nums(3, 4)
+    prepared_autobreak.set_pick_method("random")
+    prepared_autobreak.set_random_seed(5)
+
+    prepared_autobreak.set_num_jobs(1)
+    serial_keys = get_group_solution_keys(prepared_autobreak)
+
+    prepared_autobreak.set_num_jobs(2)
+    parallel_keys = get_group_solution_keys(prepared_autobreak)
+
+    assert serial_keys == parallel_keys
+    assert any(len(group_keys) > 1 for group_keys in serial_keys)
+
+
+def get_sweep_solutions(new_autobreak, offsets, num_jobs, prune_num=0):
+    """Total scores and path keys of the complete solutions of an offset sweep"""
+    new_autobreak.complete_solutions = {}
+    new_autobreak.get_permutation_offsets = lambda nitr: list(offsets)
+    new_autobreak.set_num_jobs(num_jobs)
+    new_autobreak.set_prune(prune_num)
+    with contextlib.redirect_stdout(io.StringIO()):
+        new_autobreak.permute_scaffold_sequence_autobreak(len(offsets))
+
+    return {
+        offset: (
+            complete_solution.total_score,
+            sorted(
+                (oligo_key, break_solution.get_path_key() if break_solution else None)
+                for group_solution in complete_solution.group_solutions.values()
+                for oligo_key, break_solution in group_solution.break_solutions.items()
+            ),
+        )
+        for offset, complete_solution in new_autobreak.complete_solutions.items()
+    }
+
+
+@pytest.mark.parametrize("prune_num", [0, 2])
+def test_offset_sweep_independent_of_jobs(prepared_autobreak, prune_num):
+    prepared_autobreak.set_write_all_results(False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+    prepared_autobreak.set_solution_nums(3, 4)
+    prepared_autobreak.set_pick_method("random")
+    prepared_autobreak.set_random_seed(5)
+
+    offsets = list(range(0, 120, 10))
+    serial_solutions = get_sweep_solutions(prepared_autobreak, offsets, 1, prune_num)
+    parallel_solutions = get_sweep_solutions(prepared_autobreak, offsets, 2, prune_num)
+    if prune_num == 0:
+        assert serial_solutions == parallel_solutions
+        assert sorted(serial_solutions) == offsets
+        return
+
+    # Workers prune against their own best scores, so they may solve more
+    # offsets, but the solved offsets and the best offsets agree
+    for offset in set(serial_solutions) & set(parallel_solutions):
+        assert serial_solutions[offset] == parallel_solutions[offset]
+
+    def get_best_offsets(solutions):
+        return sorted(solutions, key=lambda offset: -solutions[offset][0])[:prune_num]
+
+    assert get_best_offsets(serial_solutions) == get_best_offsets(parallel_solutions)
+
+
+def test_milp_group_solution_matches_exhaustive_search(prepared_autobreak):
+    pytest.importorskip("scipy")
+    import autobreak_main
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+    num_oligo_solutions = 8
+
+    for oligo_group in prepared_autobreak.origami.oligo_groups:
+        milp_solution = oligo_group.create_milp_group_solution(num_oligo_solutions)
+
+        # Candidate solutions of the oligos as in the milp solver
+        oligo_group.reset_temp_neighbor_constraints()
+        oligo_candidates = {}
+        for oligo in oligo_group.oligos:
+            if oligo.dont_break:
+                continue
+            oligo.generate_shortest_paths(num_oligo_solutions)
+            oligo.remove_penalized_solutions()
+            oligo_candidates[oligo.key] = oligo.break_solutions
+
+        # Best group solution without neighbor penalties over all combinations
+        best_score = None
+        for break_solutions in itertools.product(*oligo_candidates.values()):
+            group_solution = autobreak_main.GroupBreaksolution()
+            group_solution.origami = prepared_autobreak.origami
+            group_solution.break_solutions = dict(
+                zip(oligo_candidates.keys(), break_solutions)
+            )
+            group_solution.calculate_penalty()
+            if group_solution.total_penalty == 0 and (
+                best_score is None or group_solution.total_score > best_score
+            ):
+                best_score = group_solution.total_score
+
+        if best_score is None:
+            assert milp_solution is None
+            continue
+
+        assert milp_solution.total_penalty == 0
+        assert np.isclose(milp_solution.total_score, best_score)
+
+
+def get_reference_penalty(group_solution):
+    """Group penalty and bad breaks from the break lists of the oligo solutions"""
+    break_solutions = group_solution.break_solutions
+    total_penalty = 0
+    bad_lists = {}
+    for key, break_solution in break_solutions.items():
+        bad_lists[key] = []
+        for current_break in break_solution.breaks[:-1]:
+            neighbor_break = current_break.neighbor_break
+            if (
+                neighbor_break
+                and break_solutions.get(neighbor_break.oligo.key)
+                and neighbor_break in break_solutions[neighbor_break.oligo.key].breaks
+            ):
+                bad_lists[key].append(current_break)
+                total_penalty += 1
+
+    return int(total_penalty / 2), bad_lists
+
+
+def test_penalties_match_break_lists(prepared_autobreak):
+    import autobreak_main
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+    origami = prepared_autobreak.origami
+    num_penalized = 0
+
+    for oligo_group in origami.oligo_groups:
+        oligo_group.reset_temp_neighbor_constraints()
+        oligo_candidates = {}
+        for oligo in oligo_group.oligos:
+            if oligo.dont_break:
+                continue
+            oligo.generate_shortest_paths(8)
+            oligo_candidates[oligo.key] = oligo.break_solutions
+
+            # Self penalties and path comparisons of the oligo solutions
+            for break_solution in oligo.break_solutions:
+                self_penalty = sum(
+                    1
+                    for current_break in break_solution.breaks[:-1]
+                    if current_break.neighbor_break in break_solution.breaks
+                )
+                assert break_solution.self_penalty == int(self_penalty / 2)
+                max_index = len(break_solution.breaks) - 1
+                for other_solution in oligo.break_solutions:
+                    assert break_solution.is_identical(other_solution) == (
+                        break_solution.breaks[:max_index]
+                        == other_solution.breaks[:max_index]
+                    )
+
+        for break_solutions in itertools.product(*oligo_candidates.values()):
+            group_solution = autobreak_main.GroupBreaksolution()
+            group_solution.origami = origami
+            group_solution.break_solutions = dict(
+                zip(oligo_candidates.keys(), break_solutions)
+            )
+            group_solution.calculate_penalty()
+
+            total_penalty, bad_lists = get_reference_penalty(group_solution)
+            assert group_solution.total_penalty == total_penalty
+            for key, break_solution in group_solution.break_solutions.items():
+                assert break_solution.bad_list == bad_lists[key]
+            num_penalized += total_penalty > 0
+
+    assert num_penalized > 0
+
+
+def test_checkpoint_round_trip(prepared_autobreak, tmp_path):
+    prepared_autobreak.set_write_all_results(False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+        prepared_autobreak.solve_offset(0)
+    complete_solution = prepared_autobreak.complete_solutions[0]
+
+    # Write the checkpoint of the offset
+    prepared_autobreak.checkpoint_file = str(tmp_path / "checkpoint.jsonl")
+    prepared_autobreak.load_checkpoint()
+    prepared_autobreak.write_checkpoint(0)
+
+    # Resume from the checkpoint
+    prepared_autobreak.complete_solutions = {}
+    prepared_autobreak.set_resume(True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        completed_offsets = prepared_autobreak.load_checkpoint()
+    assert completed_offsets == {0}
+
+    resumed_solution = prepared_autobreak.complete_solutions[0]
+    assert np.isclose(resumed_solution.total_score, complete_solution.total_score)
+    for group_key, group_solution in complete_solution.group_solutions.items():
+        resumed_group_solution = resumed_solution.group_solutions[group_key]
+        for oligo_key, break_solution in group_solution.break_solutions.items():
+            assert (
+                resumed_group_solution.break_solutions[oligo_key].get_path_key()
+                == break_solution.get_path_key()
+            )
+
+
+def get_offset_random_states(new_autobreak, offsets):
+    """First random draw and oligo orders that autobreak runs with at each offset"""
+    random_states = []
+
+    def run_autobreak():
+        random_states.append(
+            (
+                random.random(),
+                [
+                    [oligo.key for oligo in oligo_group.oligos]
+                    for oligo_group in new_autobreak.origami.oligo_groups
+                ],
+            )
+        )
+
+        # Leave the oligo order changed for the next offset
+        for oligo_group in new_autobreak.origami.oligo_groups:
+            oligo_group.shuffle_oligos()
+
+    new_autobreak.run_autobreak = run_autobreak
+    with contextlib.redirect_stdout(io.StringIO()):
+        for offset in offsets:
+            new_autobreak.solve_offset(offset)
+
+    return dict(zip(offsets, random_states))
+
+
+def test_offset_seeds_independent_of_order(prepared_autobreak):
+    prepared_autobreak.set_write_all_results(False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+    prepared_autobreak.set_random_seed(5)
+
+    offsets = [0, 7, 31]
+    forward_states = get_offset_random_states(prepared_autobreak, offsets)
+    reverse_states = get_offset_random_states(prepared_autobreak, offsets[::-1])
+
+    assert sorted(forward_states) == offsets
+    assert forward_states == reverse_states
+    assert len({state[0] for state in forward_states.values()}) == len(offsets)
+
+
+def test_score_bound_keeps_temp_constraints(prepared_autobreak):
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+
+    for oligo_group in prepared_autobreak.origami.oligo_groups:
+        for oligo in oligo_group.oligos:
+            if oligo.dont_break:
+                continue
+
+            # Constrain every other break, the bound must leave them in place
+            temp_constraints = [index % 2 == 0 for index in range(len(oligo.breaks))]
+            for current_break, dont_break_temp in zip(oligo.breaks, temp_constraints):
+                current_break.dont_break_temp = dont_break_temp
+            oligo.get_score_bound()
+
+            assert [
+                current_break.dont_break_temp for current_break in oligo.breaks
+            ] == temp_constraints
+
+
+def test_design_cache_round_trip(prepared_autobreak, tmp_path):
+    prepared_autobreak.set_design_cache(str(tmp_path))
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+    arrays = prepared_autobreak.edge_table.get_arrays()
+    edge_weight = prepared_autobreak.edge_table.edge_weight
+    assert len(list(tmp_path.glob("*.npz"))) == 1
+
+    # Initialize again from the cache
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        prepared_autobreak.initialize()
+    assert "from the design cache" in output.getvalue()
+
+    cached_arrays = prepared_autobreak.edge_table.get_arrays()
+    assert sorted(cached_arrays) == sorted(arrays)
+    for name, array in arrays.items():
+        np.testing.assert_array_equal(cached_arrays[name], array)
+    np.testing.assert_allclose(prepared_autobreak.edge_table.edge_weight, edge_weight)
+
+
+def test_design_cache_evicts_least_recently_used(tmp_path):
+    pytest.importorskip("cadnano")
+    pytest.importorskip("cn2svg")
+    import autobreak_main
+
+    design_cache = autobreak_main.DesignCache(str(tmp_path), max_megabytes=1)
+    arrays = {"values": np.zeros(50000)}
+    design_cache.save("old", arrays)
+    design_cache.save("new", arrays)
+    os.utime(tmp_path / "old.npz", (1000, 1000))
+    os.utime(tmp_path / "new.npz", (2000, 2000))
+    assert design_cache.load("old") is not None
+
+    # Loading marks the file as used, the other file is removed
+    design_cache.save("last", arrays)
+    assert sorted(path.stem for path in tmp_path.glob("*.npz")) == ["last", "old"]
+
+
+def test_checkpoint_resume_with_changed_args(prepared_autobreak, tmp_path):
+    prepared_autobreak.args_dict = {"minlength": 6, "seed": 0}
+    prepared_autobreak.checkpoint_file = str(tmp_path / "checkpoint.jsonl")
+    prepared_autobreak.load_checkpoint()
+    prepared_autobreak.write_checkpoint(0)
+
+    # Resume with a different minimum length
+    prepared_autobreak.args_dict = {"minlength": 8, "seed": 0}
+    prepared_autobreak.set_resume(True)
+    with pytest.raises(SystemExit, match="different arguments"):
+        prepared_autobreak.load_checkpoint()
+    assert prepared_autobreak.complete_solutions == {}
+
+
+def get_group_refiners(new_autobreak, num_oligo_solutions=8):
+    """Refiners for the best score group solutions of the oligo groups"""
+    import autobreak_main
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        new_autobreak.initialize()
+        new_autobreak.create_stepwise_group_solutions()
+        new_autobreak.sort_group_solutions()
+
+    group_refiners = []
+    for oligo_group in new_autobreak.origami.oligo_groups:
+        if not oligo_group.best_score_solution:
+            continue
+        group_refiner = autobreak_main.GroupSolutionRefiner()
+        group_refiner.initialize(
+            oligo_group, oligo_group.best_score_solution, num_oligo_solutions
+        )
+        group_refiners.append((oligo_group.best_score_solution, group_refiner))
+
+    return group_refiners
+
+
+def test_refiner_counts_match_group_penalty(prepared_autobreak):
+    random.seed(3)
+    num_conflicts = 0
+    for _, group_refiner in get_group_refiners(prepared_autobreak):
+        candidates = group_refiner.candidates
+        for _ in range(200):
+            # Move a random oligo to a random candidate as in the refinement
+            i = random.randrange(len(candidates))
+            old_j = group_refiner.chosen[i]
+            new_j = random.randrange(len(candidates[i]))
+            group_refiner.remove_candidate(i, old_j)
+            group_refiner.conflict_count += group_refiner.get_conflict_count(
+                i, new_j
+            ) - group_refiner.get_conflict_count(i, old_j)
+            group_refiner.add_candidate(i, new_j)
+            group_refiner.chosen[i] = new_j
+            group_refiner.total_score += (
+                candidates[i][new_j].score - candidates[i][old_j].score
+            )
+
+            group_solution = group_refiner.create_group_solution(group_refiner.chosen)
+            assert int(group_refiner.conflict_count / 2) == group_solution.total_penalty
+            assert np.isclose(
+                group_refiner.total_score,
+                sum(candidates[i][j].score for i, j in enumerate(group_refiner.chosen)),
+            )
+            num_conflicts += group_refiner.conflict_count > 0
+
+    assert num_conflicts > 0
+
+
+def test_refine_is_reproducible_and_keeps_penalty(prepared_autobreak):
+    refined_keys = []
+    for _ in range(2):
+        random.seed(3)
+        group_keys = []
+        for start_solution, group_refiner in get_group_refiners(prepared_autobreak):
+            start_penalty = start_solution.total_penalty
+            start_score = start_solution.total_score
+            refined_solution = group_refiner.refine(500)
+            if refined_solution is None:
+                continue
+
+            assert refined_solution.total_penalty <= start_penalty
+            assert refined_solution.total_score >= start_score - 1e-9
+            group_keys.append(
+                sorted(
+                    (oligo_key, break_solution.get_path_key())
+                    for oligo_key, break_solution in refined_solution.break_solutions.items()
+                )
+            )
+        refined_keys.append(group_keys)
+
+    assert refined_keys[0] == refined_keys[1]
+    assert refined_keys[0]
+
+
+def test_readonly_score_frame_matches_serial_scan(prepared_autobreak):
+    prepared_autobreak.set_readonly(True)
+    offsets = [0, 5, 17, 40, 101]
+    score_frame, best_offset = prepared_autobreak.get_readonly_score_frame(offsets)
+    assert score_frame is not None
+
+    # Score the offsets one at a time as the serial readonly scan
+    with contextlib.redirect_stdout(io.StringIO()):
+        for offset in offsets:
+            prepared_autobreak.shift_scaffold_sequence(offset)
+            prepared_autobreak.determine_readonly_scores()
+    complete_solutions = prepared_autobreak.complete_solutions
+
+    totals = score_frame["Total"]
+    for offset in offsets:
+        complete_solution = complete_solutions[offset]
+        assert np.isclose(
+            totals.loc[offset, "TotalScore"], complete_solution.total_score
+        )
+        assert np.isclose(
+            totals.loc[offset, "TotalNormScore"], complete_solution.total_norm_score
+        )
+        assert np.isclose(totals.loc[offset, "TotalProb"], complete_solution.total_prob)
+        assert np.isclose(
+            totals.loc[offset, "TotalDsDNALength"], complete_solution.total_dsDNA_length
+        )
+
+    assert best_offset == max(
+        offsets, key=lambda offset: complete_solutions[offset].total_score
+    )
+
+
+def test_readonly_total_prob_matches_total_score(prepared_autobreak):
+    import autobreak_main
+    import utilities
+
+    # With the folding probability as the only score the total probability of a
+    # complete solution is the exponent of its total score
+    prepared_autobreak.set_optimization_func(utilities.parse_optim_function("dG:50"))
+    prepared_autobreak.set_temperature_parameter()
+    score_frame, best_offset = prepared_autobreak.get_readonly_score_frame([0, 5, 17])
+    totals = score_frame["Total"]
+
+    for offset in [0, 5, 17]:
+        complete_solution = autobreak_main.CompleteBreakSolution()
+        complete_solution.group_solutions = {}
+        for column, oligo_score in score_frame["EdgeWeight"].loc[offset].items():
+            group_solution = autobreak_main.GroupBreaksolution()
+            group_solution.total_score = oligo_score
+            group_solution.total_penalty = 0
+            group_solution.total_dsDNA_length = 1
+            group_solution.complete = True
+            complete_solution.group_solutions[column] = group_solution
+        complete_solution.calculate_total_score()
+
+        assert np.isclose(
+            totals.loc[offset, "TotalScore"], complete_solution.total_score
+        )
+        assert np.isclose(totals.loc[offset, "TotalProb"], complete_solution.total_prob)
+
+
+@pytest.mark.parametrize("prescreen_metric", ["TotalScore", "TotalNormScore"])
+def test_prescreen_keeps_best_offsets_in_sweep_order(
+    prepared_autobreak, prescreen_metric
+):
+    offsets = [40, 0, 17, 5, 101, 60, 88]
+    score_frame, _ = prepared_autobreak.get_readonly_score_frame(offsets)
+    metric = score_frame[("Total", prescreen_metric)]
+
+    prepared_autobreak.set_prescreen(3, prescreen_metric)
+    with contextlib.redirect_stdout(io.StringIO()):
+        prescreened_offsets = prepared_autobreak.prescreen_offsets(offsets)
+
+    best_offsets = set(metric.sort_values(ascending=False).index[:3])
+    assert prescreened_offsets == [
+        offset for offset in offsets if offset in best_offsets
+    ]
+
+
+def test_prescreen_without_score_frame(prepared_autobreak):
+    offsets = [40, 0, 17, 5]
+    score_frame, _ = prepared_autobreak.get_readonly_score_frame(offsets)
+
+    # Without the thermo table the offsets are scored one at a time
+    thermo_table = prepared_autobreak.origami.thermo_table
+    prepared_autobreak.origami.thermo_table = None
+    with contextlib.redirect_stdout(io.StringIO()):
+        total_scores, total_norm_scores = prepared_autobreak.get_readonly_offset_scores(
+            offsets
+        )
+    prepared_autobreak.origami.thermo_table = thermo_table
+
+    assert np.allclose(total_scores, score_frame[("Total", "TotalScore")])
+    assert np.allclose(total_norm_scores, score_frame[("Total", "TotalNormScore")])
+
+    # The sequence of the last offset is applied but the edges are not updated,
+    # so the sequence has to be shifted again before export
+    assert prepared_autobreak.sequence_stale
+    assert prepared_autobreak.origami.sequence_offset == offsets[-1]
+    shifted_offsets = []
+    prepared_autobreak.shift_scaffold_sequence = shifted_offsets.append
+    prepared_autobreak.refresh_scaffold_sequence(offsets[-1])
+    assert shifted_offsets == [offsets[-1]]
+
+
+def get_oligo_paths(new_autobreak, num_solutions=4):
+    """Path keys and scores of the oligo solutions with every third break constrained"""
+    oligo_paths = {}
+    for oligo in new_autobreak.origami.oligos["staple"]:
+        for index, current_break in enumerate(oligo.breaks):
+            current_break.dont_break_temp = index % 3 == 1
+        oligo.generate_shortest_paths(num_solutions)
+        oligo_paths[oligo.key] = [
+            (break_solution.get_path_key(), break_solution.score)
+            for break_solution in oligo.break_solutions
+        ]
+
+    return oligo_paths
+
+
+def test_solution_cache_hits_match_path_search(prepared_autobreak):
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+    solution_cache = prepared_autobreak.solution_cache
+
+    # Fresh searches without the cache
+    prepared_autobreak.set_solution_cache_size(0)
+    searched_paths = get_oligo_paths(prepared_autobreak)
+
+    # Searches filling the cache, then cache hits
+    prepared_autobreak.set_solution_cache_size(4096)
+    solution_cache.clear()
+    assert get_oligo_paths(prepared_autobreak) == searched_paths
+    num_hits = solution_cache.num_hits
+    assert get_oligo_paths(prepared_autobreak) == searched_paths
+    assert solution_cache.num_hits - num_hits == sum(
+        not oligo.dont_break for oligo in prepared_autobreak.origami.oligos["staple"]
+    )
+
+
+def get_offset_solution_scores(new_autobreak, offsets):
+    """Path keys and scores of the complete solutions after solving the offsets"""
+    new_autobreak.complete_solutions = {}
+    with contextlib.redirect_stdout(io.StringIO()):
+        for offset in offsets:
+            new_autobreak.solve_offset(offset)
+
+    return {
+        offset: sorted(
+            (oligo_key, break_solution.get_path_key(), break_solution.score)
+            for group_solution in complete_solution.group_solutions.values()
+            for oligo_key, break_solution in group_solution.break_solutions.items()
+            if break_solution
+        )
+        for offset, complete_solution in new_autobreak.complete_solutions.items()
+    }
+
+
+def test_solution_cache_cleared_for_new_edge_weights(prepared_autobreak):
+    prepared_autobreak.set_write_all_results(False)
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+
+    # Solve an offset after the cache is filled at another offset
+    prepared_autobreak.set_solution_cache_size(4096)
+    cached_solutions = get_offset_solution_scores(prepared_autobreak, [0, 37])
+
+    # Solve the offset without the cache
+    prepared_autobreak.set_solution_cache_size(0)
+    searched_solutions = get_offset_solution_scores(prepared_autobreak, [37])
+
+    assert cached_solutions[37] == searched_solutions[37]
+    assert cached_solutions[0] != cached_solutions[37]
@@ -0,0 +1,49 @@
+import contextlib
+import io
+
+import numpy as np
+
+
+def test_edge_table_matches_break_edges(prepared_autobreak):
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+    edge_table = prepared_autobreak.edge_table
+    assert edge_table.num_edges > 0
+
+    # Compare a sample of the edges, every edge builds its own BreakEdge
+    for edge_id in range(0, edge_table.num_edges, 7):
+        break_edge = edge_table.create_edge(
+            edge_table.get_from_break(edge_id),
+            edge_table.get_to_break(edge_id),
+            edge_table.edge_length[edge_id],
+        )
+        for column in edge_table.EDGE_COLUMNS:
+            assert np.isclose(
+                getattr(edge_table, column)[edge_id], getattr(break_edge, column)
+            ), column
+        assert np.isclose(
+            edge_table.dG_inter[edge_id], np.sum(break_edge.dG_inter_list)
+        )
+
+
+def test_offset_rescoring_matches_edge_update(prepared_autobreak):
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+    edge_table = prepared_autobreak.edge_table
+    origami = prepared_autobreak.origami
+    assert edge_table.offset_rescoring
+
+    # Rescore from the scaffold ranges
+    offset = 17
+    edge_params = edge_table.get_offset_params([offset])
+    edge_weights = prepared_autobreak.optimize(edge_params)
+
+    # Evaluate the edges from the shifted strand sequences
+    origami.apply_sequence(offset)
+    origami.assign_strands_dna()
+    origami.update_sequences_dna()
+    edge_table.update_edges()
+
+    assert np.allclose(edge_params.dG_total[0], edge_table.dG_total)
+    assert np.allclose(edge_params.edge_maxTm[0], edge_table.edge_maxTm)
+    assert np.allclose(edge_weights[0], edge_table.edge_weight)
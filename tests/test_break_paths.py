@@ -0,0 +1,196 @@
+import contextlib
+import io
+import random
+
+import numpy as np
+import pytest
+
+
+def get_exhaustive_paths(oligo):
+    """
+    Penalty counts and scores of all paths from the start to the final break of an
+    oligo, a break is penalized if its neighbor break is earlier on the path
+    """
+    oligo.reset_break_paths()
+    oligo.reset_break_order_ids(oligo.start_break, oligo.final_break)
+    path_breaks, path_edges = oligo.start_break.get_path_edges(oligo.final_break)
+    final_position = len(path_breaks) - 1
+    edge_weight = oligo.origami.autobreak.edge_table.edge_weight
+
+    paths = []
+
+    def extend_path(position, visited_breaks, num_penalties, score):
+        if position == final_position:
+            paths.append((num_penalties, score))
+            return
+
+        current_break = path_breaks[position]
+        if position > 0 and current_break.neighbor_break in visited_breaks:
+            num_penalties += 1
+
+        for edge_id, next_position in path_edges[position]:
+            extend_path(
+                next_position,
+                visited_breaks | {current_break},
+                num_penalties,
+                score + edge_weight[edge_id],
+            )
+
+    extend_path(0, frozenset(), 0, 0)
+
+    # Best paths first
+    return sorted(paths, key=lambda x: (x[0], -x[1]))
+
+
+@pytest.fixture
+def linear_oligos(prepared_autobreak):
+    """Linear staple oligos of the prepared design with an initialized edge table"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        prepared_autobreak.initialize()
+    oligos = [
+        oligo
+        for oligo in prepared_autobreak.origami.oligos["staple"]
+        if not oligo.circular and not oligo.dont_break
+    ]
+    assert len(oligos) > 0
+    return oligos
+
+
+def test_shortest_path_matches_exhaustive_search(linear_oligos):
+    for oligo in linear_oligos:
+        paths = get_exhaustive_paths(oligo)
+
+        oligo.reset_break_paths()
+        oligo.reset_break_order_ids(oligo.start_break, oligo.final_break)
+        shortest_path = oligo.start_break.get_shortest_path(oligo.final_break)
+
+        if not paths:
+            assert shortest_path is None
+            continue
+
+        # Without neighbor penalties the shortest path is exact
+        num_penalties, score = paths[0]
+        if num_penalties == 0:
+            assert np.isclose(shortest_path.score, score)
+
+
+def test_k_shortest_paths_match_exhaustive_search(linear_oligos):
+    k_num = 20
+    for oligo in linear_oligos:
+        paths = get_exhaustive_paths(oligo)
+
+        oligo.reset_break_paths()
+        oligo.reset_break_order_ids(oligo.start_break, oligo.final_break)
+        k_shortest_paths = oligo.start_break.get_k_shortest_paths(
+            oligo.final_break, k_num, "best"
+        )
+
+        # Paths are unique and have the best scores in order
+        assert len(k_shortest_paths) == min(k_num, len(paths))
+        assert len({path.get_path_key() for path in k_shortest_paths}) == len(
+            k_shortest_paths
+        )
+        assert np.allclose(
+            [path.score for path in k_shortest_paths],
+            [score for num_penalties, score in paths[:k_num]],
+        )
+
+
+def test_random_k_select_samples_candidates(linear_oligos):
+    k_num = 5
+    oligo = linear_oligos[0]
+    paths = get_exhaustive_paths(oligo)
+
+    # Random selection picks from more candidates than it keeps
+    path_scores = set()
+    for seed in range(10):
+        random.seed(seed)
+        oligo.reset_break_paths()
+        oligo.reset_break_order_ids(oligo.start_break, oligo.final_break)
+        k_shortest_paths = oligo.start_break.get_k_shortest_paths(
+            oligo.final_break, k_num, "random"
+        )
+        assert len(k_shortest_paths) == k_num
+        assert np.isclose(k_shortest_paths[0].score, paths[0][1])
+        path_scores.add(tuple(path.score for path in k_shortest_paths))
+
+    assert len(path_scores) > 1
+
+
+def get_exhaustive_circular_score(oligo):
+    """
+    Best score of the cycles through the breakable breaks of a circular oligo that
+    go around the oligo once, without neighbor penalties
+    """
+    edge_table = oligo.origami.autobreak.edge_table
+    breakable_breaks = [
+        current_break
+        for current_break in oligo.breaks
+        if not current_break.dont_break and not current_break.dont_break_temp
+    ]
+
+    best_score = -np.inf
+
+    def extend_cycle(current_break, start_break, distance, score):
+        nonlocal best_score
+        for edge_id in edge_table.get_break_edge_ids(current_break.break_id):
+            if not edge_table.is_valid(edge_id):
+                continue
+            next_break = edge_table.get_to_break(edge_id)
+            next_distance = distance + edge_table.edge_length[edge_id]
+            next_score = score + edge_table.edge_weight[edge_id]
+            if next_break == start_break and next_distance == oligo.length:
+                best_score = max(best_score, next_score)
+            elif next_break in breakable_breaks and next_distance < oligo.length:
+                extend_cycle(next_break, start_break, next_distance, next_score)
+
+    for start_break in breakable_breaks:
+        extend_cycle(start_break, start_break, 0, 0)
+
+    return best_score
+
+
+def test_circular_window_matches_all_start_breaks(circular_autobreak):
+    with contextlib.redirect_stdout(io.StringIO()):
+        circular_autobreak.initialize()
+    circular_oligos = [
+        oligo
+        for oligo in circular_autobreak.origami.oligos["staple"]
+        if oligo.circular and not oligo.dont_break
+    ]
+    assert len(circular_oligos) > 0
+
+    for oligo in circular_oligos:
+        best_score = get_exhaustive_circular_score(oligo)
+        assert best_score > -np.inf
+
+        start_breaks = {}
+        best_scores = {}
+        path_scores = {}
+        for circular_solver in ("all", "window"):
+            circular_autobreak.set_circular_solver(circular_solver)
+            start_breaks[circular_solver] = oligo.get_circular_start_breaks()
+
+            # Score bound and best path from the start breaks
+            assert np.isclose(oligo.get_score_bound(), best_score)
+            best_scores[circular_solver] = -np.inf
+            for start_break in start_breaks[circular_solver]:
+                oligo.reset_break_order_ids(start_break, start_break)
+                best_scores[circular_solver] = max(
+                    best_scores[circular_solver],
+                    start_break.get_best_score(start_break),
+                )
+
+            # Best solution without self penalties from the path search
+            oligo.generate_shortest_paths(4)
+            path_scores[circular_solver] = max(
+                break_solution.score
+                for break_solution in oligo.break_solutions
+                if break_solution.self_penalty == 0
+            )
+
+        # The window limits the start breaks
+        assert len(start_breaks["window"]) < len(start_breaks["all"])
+        assert np.isclose(best_scores["all"], best_score)
+        assert np.isclose(best_scores["window"], best_score)
+        assert np.isclose(path_scores["window"], path_scores["all"])
@@ -0,0 +1,124 @@
+import json
+import os
+
+import pytest
+
+import cadnanojson
+
+# Small circular scaffold design with inserts and skips and its expected oligos
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+CIRCULAR_DESIGN_FILE = os.path.join(DATA_DIR, "circular_design.json")
+CIRCULAR_DESIGN_OLIGOS_FILE = os.path.join(DATA_DIR, "circular_design_oligos.json")
+
+
+def get_oligo_ends(part):
+    """5' strand ends, length and circularity of the part oligos"""
+    oligo_ends = []
+    for oligo in part.oligos():
+        strand5p = oligo.strand5p()
+        oligo_ends.append(
+            (
+                strand5p.idNum(),
+                strand5p.isForward(),
+                strand5p.idx5Prime(),
+                oligo.length(),
+                oligo.isCircular(),
+            )
+        )
+    return sorted(oligo_ends)
+
+
+def get_oligo_strands(part):
+    """5' starts, lengths, circularity and strands from 5' to 3' of the part oligos"""
+    oligo_strands = []
+    for oligo in part.oligos():
+        strand5p = oligo.strand5p()
+        oligo_strands.append(
+            {
+                "start": [strand5p.idNum(), strand5p.idx5Prime()],
+                "length": oligo.length(),
+                "circular": oligo.isCircular(),
+                "strands": [
+                    [strand.idNum(), strand.isForward(), *strand.idxs()]
+                    for strand in strand5p.generator3pStrand()
+                ],
+            }
+        )
+    return sorted(oligo_strands, key=lambda x: x["start"])
+
+
+def test_read_part_oligos(design_file):
+    part = cadnanojson.read_part(design_file)
+    oligos = part.oligos()
+
+    # One scaffold and five staples on each of the two helix pairs
+    assert len(oligos) == 11
+    assert not any(oligo.isCircular() for oligo in oligos)
+
+    # Scaffold runs forward from the first helix, skips at idx 7, 55 and 103
+    scaffold = max(oligos, key=lambda x: x.length())
+    assert scaffold.strand5p().idNum() == 0
+    assert scaffold.strand5p().idx5Prime() == 5
+    assert scaffold.length() == 4 * (116 - 3)
+
+    # Staples cover 21 idx on each helix
+    for oligo in oligos:
+        if oligo is scaffold:
+            continue
+        strands = list(oligo.strand5p().generator3pStrand())
+        assert len(strands) == 2
+        assert [strand.length() for strand in strands] == [21, 21]
+        assert oligo.length() == sum(strand.totalLength() for strand in strands)
+
+
+def test_circular_oligo_starts_after_last_crossover(circular_design_file):
+    part = cadnanojson.read_part(circular_design_file)
+    circular_oligos = [oligo for oligo in part.oligos() if oligo.isCircular()]
+    assert len(circular_oligos) == 2
+
+    # The 5' strand of a circular oligo is the strand with the last installed crossover
+    for oligo in circular_oligos:
+        strands = list(oligo.strand5p().generator3pStrand())
+        assert oligo.strand5p() is max(strands, key=lambda x: x.xover_rank)
+
+    # Crossovers back to the first helix are installed last
+    assert sorted(
+        (oligo.strand5p().idNum(), oligo.strand5p().idx5Prime())
+        for oligo in circular_oligos
+    ) == [(0, 5), (0, 120)]
+
+
+@pytest.mark.parametrize("circular", [False, True])
+def test_read_part_matches_cadnano(design_file, circular_design_file, circular):
+    pytest.importorskip("cadnano")
+    import origamidesign
+
+    filename = circular_design_file if circular else design_file
+
+    cadnano_origami = origamidesign.Origami()
+    cadnano_origami.initialize(filename)
+
+    json_origami = origamidesign.Origami()
+    json_origami.initialize(filename, True)
+
+    assert get_oligo_ends(json_origami.part) == get_oligo_ends(cadnano_origami.part)
+
+
+def test_read_part_matches_expected_oligos():
+    part = cadnanojson.read_part(CIRCULAR_DESIGN_FILE)
+    with open(CIRCULAR_DESIGN_OLIGOS_FILE) as f:
+        expected_oligos = json.load(f)
+
+    assert get_oligo_strands(part) == expected_oligos
+
+
+def test_cadnano_matches_expected_oligos():
+    pytest.importorskip("cadnano")
+    import origamidesign
+
+    cadnano_origami = origamidesign.Origami()
+    cadnano_origami.initialize(CIRCULAR_DESIGN_FILE)
+    with open(CIRCULAR_DESIGN_OLIGOS_FILE) as f:
+        expected_oligos = json.load(f)
+
+    assert get_oligo_strands(cadnano_origami.part) == expected_oligos
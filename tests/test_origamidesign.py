@@ -0,0 +1,217 @@
+import collections
+
+
+def test_oligo_groups_match_break_search(prepared_autobreak):
+    origami = prepared_autobreak.origami
+    assert len(origami.oligo_groups) > 0
+
+    # Breaks are connected to the breaks of their oligo and to their next and neighbor breaks
+    neighbors = collections.defaultdict(list)
+    for current_break in origami.breaks:
+        connected_breaks = list(current_break.oligo.breaks)
+        if current_break.next_break:
+            connected_breaks.append(current_break.next_break)
+        if current_break.neighbor_break:
+            connected_breaks.append(current_break.neighbor_break)
+        for connected_break in connected_breaks:
+            neighbors[current_break].append(connected_break)
+            neighbors[connected_break].append(current_break)
+
+    # Groups from a breadth-first search in break order
+    break_groups = []
+    visited = set()
+    for current_break in origami.breaks:
+        if current_break in visited:
+            continue
+        visited.add(current_break)
+        group_breaks = [current_break]
+        queue = collections.deque([current_break])
+        while queue:
+            for next_break in neighbors[queue.popleft()]:
+                if next_break not in visited:
+                    visited.add(next_break)
+                    group_breaks.append(next_break)
+                    queue.append(next_break)
+        break_groups.append(group_breaks)
+
+    assert len(origami.oligo_groups) == len(break_groups)
+    for oligo_group, group_breaks in zip(origami.oligo_groups, break_groups):
+        assert set(oligo_group.breaks) == set(group_breaks)
+        assert set(oligo_group.oligos) == {
+            current_break.oligo for current_break in group_breaks
+        }
+        assert all(
+            current_break.oligo_group is oligo_group for current_break in group_breaks
+        )
+
+
+def get_origami_strands(origami):
+    """Strands of the scaffold and staple oligos"""
+    strands = []
+    for oligo in origami.oligos["scaffold"] + origami.oligos["staple"]:
+        current_strand = oligo.null_strand.next_strand
+        while current_strand:
+            strands.append(current_strand)
+            current_strand = current_strand.next_strand
+
+    return strands
+
+
+def test_strand_inserts_match_cadnano_strands(insert_origami):
+    strands = get_origami_strands(insert_origami)
+    num_inserts = 0
+    num_skips = 0
+    for current_strand in strands:
+        cadnano_strand = current_strand.cadnano_strand
+
+        # Ranges on the strand in both orders and ranges past the strand ends
+        idx_pairs = [
+            (idx_a, idx_b)
+            for idx_a in range(current_strand.idxLow, current_strand.idxHigh + 1)
+            for idx_b in range(current_strand.idxLow, current_strand.idxHigh + 1)
+        ]
+        idx_pairs += [
+            (current_strand.idxLow - 3, current_strand.idxHigh),
+            (current_strand.idxLow, current_strand.idxHigh + 3),
+        ]
+        for idx_a, idx_b in idx_pairs:
+            inserts = cadnano_strand.insertionLengthBetweenIdxs(
+                min(idx_a, idx_b), max(idx_a, idx_b)
+            )
+            assert current_strand.get_inserts(idx_a, idx_b) == inserts
+
+        # Inserts from 5' to 3'
+        assert current_strand.inserts.tolist() == [
+            cadnano_strand.insertionLengthBetweenIdxs(idx, idx)
+            for idx in range(
+                current_strand.idx5p,
+                current_strand.idx3p + current_strand.direction,
+                current_strand.direction,
+            )
+        ]
+        num_inserts += sum(insert > 0 for insert in current_strand.inserts)
+        num_skips += sum(insert < 0 for insert in current_strand.inserts)
+
+    assert num_inserts > 0 and num_skips > 0
+
+
+def get_reference_nucleotides(origami):
+    """Next nucleotide keys of the staple nucleotides in oligo order, as the nucleotide map"""
+    next_nucleotides = {}
+    for oligo in origami.oligos["staple"]:
+        previous_key = None
+        current_strand = oligo.null_strand.next_strand
+        while current_strand:
+            direction = current_strand.direction
+            for idx in range(
+                current_strand.idx5p, current_strand.idx3p + direction, direction
+            ):
+                key = (current_strand.vh, idx, direction)
+                next_nucleotides[key] = None
+                if previous_key:
+                    next_nucleotides[previous_key] = key
+                previous_key = key
+            current_strand = current_strand.next_strand
+
+    return next_nucleotides
+
+
+def test_occupancy_maps_match_strand_lookups(insert_origami):
+    strands = get_origami_strands(insert_origami)
+    next_nucleotides = get_reference_nucleotides(insert_origami)
+
+    # Strands at each nucleotide key
+    strand_keys = {}
+    for current_strand in strands:
+        for idx in range(current_strand.idxLow, current_strand.idxHigh + 1):
+            strand_keys[(current_strand.vh, idx, current_strand.direction)] = (
+                current_strand
+            )
+
+    num_dsDNA = 0
+    for vh in range(-1, max(strand.vh for strand in strands) + 2):
+        for idx in range(-2, 130):
+            # dsDNA where cadnano has strands in both directions
+            is_dsDNA = bool(
+                insert_origami.get_cadnano_strand(vh, idx, 1)
+                and insert_origami.get_cadnano_strand(vh, idx, -1)
+            )
+            assert insert_origami.is_dsDNA(vh, idx) == is_dsDNA
+            num_dsDNA += is_dsDNA
+
+            for direction in (1, -1):
+                key = (vh, idx, direction)
+                current_strand = strand_keys.get(key)
+                strand_id = insert_origami.get_strand_id(*key)
+                if current_strand is None:
+                    assert strand_id == -1
+                else:
+                    assert insert_origami.occupancy_strands[strand_id] is current_strand
+
+                # Staple nucleotides and their next nucleotides
+                if key in next_nucleotides:
+                    assert insert_origami.get_staple_strand(key) is current_strand
+                    assert insert_origami.get_current_nucleotide(key) == key
+                else:
+                    assert insert_origami.get_staple_strand(key) is None
+                    assert insert_origami.get_current_nucleotide(key) is None
+                assert insert_origami.get_next_nucleotide(key) == next_nucleotides.get(
+                    key
+                )
+
+    assert num_dsDNA > 0
+
+
+def get_reference_scaffold_map(origami):
+    """Scaffold positions of each helix idx, as the scaffold dict map"""
+    key2scaffold = {}
+    position = 0
+    current_strand = origami.oligos["scaffold"][0].null_strand.next_strand
+    while current_strand:
+        direction = current_strand.direction
+        for idx in range(
+            current_strand.idx5p, current_strand.idx3p + direction, direction
+        ):
+            num_inserts = current_strand.cadnano_strand.insertionLengthBetweenIdxs(
+                idx, idx
+            )
+            position += num_inserts + 1
+            key2scaffold[(current_strand.vh, idx)] = list(
+                range(position - num_inserts, position + 1)
+            )[::-1]
+        current_strand = current_strand.next_strand
+
+    return key2scaffold
+
+
+def test_scaffold_position_lists_match_scaffold_map(insert_origami):
+    key2scaffold = get_reference_scaffold_map(insert_origami)
+
+    def get_reference_positions(vh, idx5p, idx3p):
+        direction = 1 if idx3p >= idx5p else -1
+        positions = []
+        for idx in range(idx5p, idx3p + direction, direction):
+            positions.extend(key2scaffold.get((vh, idx), [None]))
+        return positions
+
+    # Strand ranges in both directions and ranges past the helix ends
+    idx_ranges = [
+        (current_strand.vh, current_strand.idx5p, current_strand.idx3p)
+        for current_strand in get_origami_strands(insert_origami)
+    ]
+    for vh in range(-1, 5):
+        idx_ranges += [(vh, -3, 130), (vh, 130, -3), (vh, 10, 10), (vh, 125, 126)]
+
+    for vh, idx5p, idx3p in idx_ranges:
+        assert insert_origami.get_scaffold_position_list(
+            vh, idx5p, idx3p
+        ) == get_reference_positions(vh, idx5p, idx3p)
+
+    # Single idx, a skip has no position and an insert has several
+    position_counts = collections.Counter()
+    for vh, idx in key2scaffold:
+        scaffold_positions = insert_origami.get_scaffold_positions(vh, idx)
+        assert scaffold_positions == key2scaffold[(vh, idx)]
+        position_counts[len(scaffold_positions)] += 1
+
+    assert position_counts[0] > 0 and position_counts[3] > 0
@@ -0,0 +1,110 @@
+import collections
+import random
+
+import numpy as np
+
+import utilities
+
+
+def random_sequences(num_sequences, min_length=1, max_length=60, seed=0):
+    """Random DNA sequences"""
+    rng = random.Random(seed)
+    return [
+        "".join(rng.choice("ACGT") for _ in range(rng.randint(min_length, max_length)))
+        for _ in range(num_sequences)
+    ]
+
+
+def test_batch_thermodynamics_match_scalar():
+    sequences = random_sequences(200)
+
+    dG, dH, dS, Tm = utilities.sequences_to_dG_dH_dS_Tm(sequences)
+
+    for i, sequence in enumerate(sequences):
+        scalar_dG, scalar_dH, scalar_dS = utilities.sequence_to_dG_dH_dS(sequence)
+        assert np.isclose(dG[i], scalar_dG)
+        assert np.isclose(dH[i], scalar_dH)
+        assert np.isclose(dS[i], scalar_dS)
+        assert np.isclose(Tm[i], utilities.sequence_to_Tm(sequence))
+
+
+def test_scaffold_thermo_table_matches_scalar():
+    scaffold_sequence = random_sequences(1, 300, 300, seed=1)[0]
+    thermo_table = utilities.ScaffoldThermoTable(scaffold_sequence)
+
+    rng = random.Random(2)
+    for offset in (0, 17, 299):
+        shifted_sequence = scaffold_sequence[offset:] + scaffold_sequence[:offset]
+
+        # Ranges wrapping around the end of the scaffold included
+        starts = np.array([rng.randrange(300) for _ in range(100)])
+        lengths = np.array([rng.randint(1, 60) for _ in range(100)])
+        dG, dH, dS, Tm = thermo_table.get_dG_dH_dS_Tm(starts, lengths, offset)
+
+        for i, (start, length) in enumerate(zip(starts, lengths)):
+            segment = (2 * shifted_sequence)[start : start + length]
+            scalar_dG, scalar_dH, scalar_dS = utilities.sequence_to_dG_dH_dS(segment)
+            assert np.isclose(dG[i], scalar_dG)
+            assert np.isclose(dH[i], scalar_dH)
+            assert np.isclose(dS[i], scalar_dS)
+            assert np.isclose(Tm[i], utilities.sequence_to_Tm(segment))
+
+
+def test_loop_energy_table_matches_scalar():
+    rng = random.Random(3)
+    scaffold_length = 301
+    for scaffold_circular in (True, False):
+        # Pairs on both sides of the scaffold end, so circular distances wrap
+        starts = [rng.randrange(scaffold_length) for _ in range(200)]
+        ends = [rng.randrange(scaffold_length) for _ in range(200)]
+        starts += [5, 290, 0, 300, 150]
+        ends += [290, 5, 300, 0, 1]
+        starts, ends = zip(
+            *[(start, end) for start, end in zip(starts, ends) if start != end]
+        )
+
+        dGloop, dSloop = utilities.positions_to_loop_dG(
+            scaffold_length, starts, ends, scaffold_circular, 330.15
+        )
+        for i, (start, end) in enumerate(zip(starts, ends)):
+            scalar_dGloop, scalar_dSloop = utilities.position_to_loop_dG(
+                scaffold_length, start, end, scaffold_circular, 330.15
+            )
+            assert np.isclose(dGloop[i], scalar_dGloop)
+            assert np.isclose(dSloop[i], scalar_dSloop)
+
+
+def get_reference_components(num_nodes, sources, targets):
+    """Connected components from a breadth-first search, numbered by smallest node"""
+    neighbors = [[] for _ in range(num_nodes)]
+    for source, target in zip(sources, targets):
+        neighbors[source].append(target)
+        neighbors[target].append(source)
+
+    labels = [-1] * num_nodes
+    num_components = 0
+    for node in range(num_nodes):
+        if labels[node] >= 0:
+            continue
+        labels[node] = num_components
+        queue = collections.deque([node])
+        while queue:
+            current_node = queue.popleft()
+            for next_node in neighbors[current_node]:
+                if labels[next_node] < 0:
+                    labels[next_node] = num_components
+                    queue.append(next_node)
+        num_components += 1
+
+    return labels
+
+
+def test_connected_components_match_search():
+    rng = random.Random(0)
+    for num_nodes in [0, 1, 10, 100, 500]:
+        num_edges = rng.randint(0, num_nodes)
+        sources = [rng.randrange(num_nodes) for _ in range(num_edges)]
+        targets = [rng.randrange(num_nodes) for _ in range(num_edges)]
+
+        labels = utilities.get_connected_components(num_nodes, sources, targets)
+        assert labels.tolist() == get_reference_components(num_nodes, sources, targets)
@@ -16,6 +16,9 @@ STAP_CONC = 100.0e-9  # 100.0 nM (Typical folding reaction)
 Mg_CONC = 12.5e-3  #  12.5 mM (Assumed in Dunn et al 2015)
 TRIS_CONC = 40.0e-3  #  40.0 mM (Assumed in Dunn et al 2015)
 
+# Segments at or above this melting temperature [°C] count for the Tm scores
+LOW_TM = 60
+
 # Sequence enthalpy/entropy values at 37°C and 1 M NaCl from SantaLucia & Hicks 2004
 # https://doi.org/10.1146/annurev.biophys.32.110601.141800
 SantaLucia2004Table1 = {
@@ -120,6 +123,14 @@ def get_Tm_SantaLucia2004(dH, dS, scaf_conc=SCAF_CONC, stap_conc=STAP_CONC):
 # Predicting Stability of DNA Duplexes in Solutions Containing Magnesium and Monovalent Cations
 # http://pubs.acs.org/doi/abs/10.1021/bi702363u
 def get_Tm_Mg_Owczarzy2008(sequence, seq_length, Tm_1M_NaCl, Mg_conc=Mg_CONC):
+    # Fraction of G or C in sequence
+    fGC = 1.0 * sum([nucleotide in ["G", "C"] for nucleotide in sequence]) / seq_length
+
+    return get_Tm_Mg_Owczarzy2008_fGC(fGC, seq_length, Tm_1M_NaCl, Mg_conc)
+
+
+# Owczarzy 2008 Equation 16 for a known GC fraction, works on scalars and numpy arrays
+def get_Tm_Mg_Owczarzy2008_fGC(fGC, seq_length, Tm_1M_NaCl, Mg_conc=Mg_CONC):
     # Empirical values from Table 2, units [1/°K]
     a = 3.92e-5
     b = -9.11e-6
@@ -129,8 +140,6 @@ def get_Tm_Mg_Owczarzy2008(sequence, seq_length, Tm_1M_NaCl, Mg_conc=Mg_CONC):
     f = 5.25e-4
     g = 8.31e-5
 
-    # Fraction of G or C in sequence
-    fGC = 1.0 * sum([nucleotide in ["G", "C"] for nucleotide in sequence]) / seq_length
     ln_Mg = np.log(Mg_conc)
 
     Tm_Mg_inv = (
@@ -165,9 +174,9 @@ def get_min_scaffold_distance(
     forward_distance = (end_index - start_index) % scaffold_length
     reverse_distance = scaffold_length - forward_distance
     if is_scaffold_circular:
-        return min(forward_distance, reverse_distance)
+        return np.minimum(forward_distance, reverse_distance)
     else:
-        return abs(end_index - start_index)
+        return np.abs(end_index - start_index)
 
 
 # Given a ssDNA length, calculate the end-to-end distance in [nm^2]
@@ -232,9 +241,10 @@ def position_to_loop_dG(
         # Get the free energies
         dGloop, dSloop = distance_to_loop_dG(distance_square, temperature_kelvin)
 
-        logging.debug(
-            f"position_to_loop_dG: scaffold_length={scaffold_length}, start_index={start_index}, end_index={end_index}, base_distance={base_distance}, distance_square={distance_square}, temperature={temperature_kelvin}, dGloop={dGloop}, dSloop={dSloop}"
-        )
+        if logging.getLogger().isEnabledFor(logging.DEBUG):
+            logging.debug(
+                f"position_to_loop_dG: scaffold_length={scaffold_length}, start_index={start_index}, end_index={end_index}, base_distance={base_distance}, distance_square={distance_square}, temperature={temperature_kelvin}, dGloop={dGloop}, dSloop={dSloop}"
+            )
 
         return dGloop, dSloop
     except Exception as e:
@@ -242,6 +252,78 @@ def position_to_loop_dG(
         return 0, 0
 
 
+class LoopEnergyTable:
+    def __init__(
+        self, scaffold_length, temperature_kelvin=323.15, scaffold_circular=True
+    ):
+        """
+        Loop-closure free energy and entropy indexed by base distance
+
+        Base distances between two scaffold positions are integers bounded by
+        half the scaffold length (circular) or the scaffold length (linear),
+        so the loop energies are computed once for every possible distance
+        """
+        self.scaffold_length = scaffold_length
+        self.temperature_kelvin = temperature_kelvin
+        self.scaffold_circular = scaffold_circular
+
+        # Maximum base distance
+        if scaffold_circular:
+            max_distance = scaffold_length // 2
+        else:
+            max_distance = scaffold_length
+
+        # Loop energies for every base distance, zero distance gives nan as in
+        # position_to_loop_dG for numpy positions
+        base_distances = np.arange(max_distance + 1, dtype=float)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            distance_square = end_to_end_distance(base_distances)
+            self.dGloop, self.dSloop = distance_to_loop_dG(
+                distance_square, temperature_kelvin
+            )
+
+    def get_loop_dG(self, start_positions, end_positions):
+        """Get loop free energies and entropies for arrays of start and end positions"""
+        base_distances = get_min_scaffold_distance(
+            self.scaffold_length,
+            np.asarray(start_positions, dtype=float),
+            np.asarray(end_positions, dtype=float),
+            self.scaffold_circular,
+        )
+        base_indexes = base_distances.astype(np.int64)
+        return self.dGloop[base_indexes], self.dSloop[base_indexes]
+
+
+# Loop energy tables for (scaffold length, temperature, circularity)
+LOOP_ENERGY_TABLES = {}
+
+
+def get_loop_energy_table(
+    scaffold_length, temperature_kelvin=323.15, scaffold_circular=True
+):
+    """Return loop energy table, build it if it doesn't exist"""
+    key = (scaffold_length, temperature_kelvin, scaffold_circular)
+    if key not in LOOP_ENERGY_TABLES:
+        LOOP_ENERGY_TABLES[key] = LoopEnergyTable(
+            scaffold_length, temperature_kelvin, scaffold_circular
+        )
+    return LOOP_ENERGY_TABLES[key]
+
+
+# Vectorized position_to_loop_dG for arrays of start and end positions
+def positions_to_loop_dG(
+    scaffold_length,
+    start_positions,
+    end_positions,
+    scaffold_circular=True,
+    temperature_kelvin=323.15,
+):
+    loop_energy_table = get_loop_energy_table(
+        scaffold_length, temperature_kelvin, scaffold_circular
+    )
+    return loop_energy_table.get_loop_dG(start_positions, end_positions)
+
+
 # Calculate melting temperature [°C] for given sequence
 def sequence_to_Tm(sequence):
     seq_length = len(sequence)
@@ -364,6 +446,342 @@ def sequence_to_dG_dH_dS(sequence, temperature_kelvin=323.15):
     return (dGtotal, dHtotal, dStotal)
 
 
+# BATCH THERMODYNAMICS
+
+# Nucleotide codes used by the batch functions, anything else is coded as invalid
+NUCLEOTIDE_CODES = {"A": 0, "C": 1, "G": 2, "T": 3}
+INVALID_CODE = 4
+NUM_CODES = 5
+
+# ASCII to nucleotide code lookup
+ASCII_TO_CODE = np.full(256, INVALID_CODE, dtype=np.uint8)
+for nucleotide, code in NUCLEOTIDE_CODES.items():
+    ASCII_TO_CODE[ord(nucleotide)] = code
+
+
+def make_NN_code_table(NN_table):
+    """Make dinucleotide lookup array indexed by NUM_CODES*code1 + code2"""
+    values = np.zeros(NUM_CODES * NUM_CODES)
+    for nucleotide1, code1 in NUCLEOTIDE_CODES.items():
+        for nucleotide2, code2 in NUCLEOTIDE_CODES.items():
+            values[NUM_CODES * code1 + code2] = NN_table[nucleotide1 + nucleotide2]
+    return values
+
+
+# Nearest-neighbor values indexed by dinucleotide code
+NN_dH_CODES = make_NN_code_table(SantaLucia2004Table1["dH"])
+NN_dS_CODES = make_NN_code_table(SantaLucia2004Table1["dS"])
+
+# Dinucleotides with an invalid nucleotide
+NN_INVALID_CODES = np.zeros(NUM_CODES * NUM_CODES, dtype=bool)
+NN_INVALID_CODES[NUM_CODES * INVALID_CODE :] = True
+NN_INVALID_CODES[INVALID_CODE::NUM_CODES] = True
+
+# Nucleotide flags indexed by code
+IS_AT_CODE = np.array([True, False, False, True, False])
+IS_GC_CODE = np.array([False, True, True, False, False])
+
+
+def encode_sequence(sequence):
+    """Encode a DNA sequence as a uint8 array of nucleotide codes"""
+    return ASCII_TO_CODE[
+        np.frombuffer(sequence.encode("ascii", errors="replace"), dtype=np.uint8)
+    ]
+
+
+def encode_sequences(sequences):
+    """
+    Encode a list of sequences into a single code buffer
+
+    Returns the code buffer, and the start and length of each sequence in the buffer
+    """
+    lengths = np.array([len(sequence) for sequence in sequences], dtype=np.int64)
+    starts = np.zeros(len(lengths), dtype=np.int64)
+    np.cumsum(lengths[:-1], out=starts[1:])
+    codes = encode_sequence("".join(sequences))
+    return codes, starts, lengths
+
+
+def get_NN_cumsums(codes):
+    """
+    Cumulative nearest-neighbor ∆H, ∆S and invalid dinucleotide counts over a code buffer
+    Dinucleotides of a segment [start, start+length) are summed by cumsum[end] - cumsum[start]
+    with end = start+length-1
+    """
+    # Dinucleotide codes over the buffer, pair i is (codes[i], codes[i+1])
+    codes = np.asarray(codes, dtype=np.int64)
+    pairs = NUM_CODES * codes[:-1] + codes[1:]
+
+    dH_cumsum = np.zeros(max(len(codes), 1))
+    dS_cumsum = np.zeros(max(len(codes), 1))
+    invalid_cumsum = np.zeros(max(len(codes), 1), dtype=np.int64)
+    np.cumsum(NN_dH_CODES[pairs], out=dH_cumsum[1:])
+    np.cumsum(NN_dS_CODES[pairs], out=dS_cumsum[1:])
+    np.cumsum(NN_INVALID_CODES[pairs], out=invalid_cumsum[1:])
+
+    return dH_cumsum, dS_cumsum, invalid_cumsum
+
+
+def get_GC_cumsum(codes):
+    """Cumulative count of 'G' or 'C' nucleotides over a code buffer"""
+    gc_cumsum = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(IS_GC_CODE[codes], out=gc_cumsum[1:])
+    return gc_cumsum
+
+
+def get_dH_dS_SantaLucia2004_segments(codes, starts, lengths, NN_cumsums=None):
+    """
+    Calculate ∆H and ∆S for sequence segments of a code buffer,
+    per SantaLucia 2004 Equation 1 and Table 1
+
+    Segments with invalid dinucleotides get zero values as in get_dH_SantaLucia2004
+    """
+    starts, lengths = np.broadcast_arrays(
+        np.asarray(starts, dtype=np.int64), np.asarray(lengths, dtype=np.int64)
+    )
+    dH = np.zeros(starts.shape)
+    dS = np.zeros(starts.shape)
+
+    # Empty segments have no thermodynamic parameters
+    nonempty = lengths > 0
+    if not np.any(nonempty):
+        return dH, dS
+
+    seg_starts = starts[nonempty]
+    seg_lengths = lengths[nonempty]
+    seg_ends = seg_starts + seg_lengths - 1
+
+    # Sum the dinucleotides of each segment
+    if NN_cumsums is None:
+        NN_cumsums = get_NN_cumsums(codes)
+    dH_cumsum, dS_cumsum, invalid_cumsum = NN_cumsums
+
+    sum_dH = dH_cumsum[seg_ends] - dH_cumsum[seg_starts]
+    sum_dS = dS_cumsum[seg_ends] - dS_cumsum[seg_starts]
+    num_invalid = invalid_cumsum[seg_ends] - invalid_cumsum[seg_starts]
+
+    # Terminal AT penalties
+    end_AT = IS_AT_CODE[codes[seg_starts]].astype(int) + (
+        (seg_lengths > 1) & IS_AT_CODE[codes[seg_ends]]
+    )
+
+    NN_dH_table = SantaLucia2004Table1["dH"]
+    NN_dS_table = SantaLucia2004Table1["dS"]
+    seg_dH = (
+        NN_dH_table["Initiation"] + sum_dH + end_AT * NN_dH_table["Terminal-AT-Penalty"]
+    )
+    seg_dS = (
+        NN_dS_table["Initiation"] + sum_dS + end_AT * NN_dS_table["Terminal-AT-Penalty"]
+    )
+
+    # Invalid sequences
+    seg_dH[num_invalid > 0] = 0
+    seg_dS[num_invalid > 0] = 0
+
+    dH[nonempty] = seg_dH
+    dS[nonempty] = seg_dS
+    return dH, dS
+
+
+def count_GC_segments(codes, starts, lengths, gc_cumsum=None):
+    """Count the number of 'G' or 'C' nucleotides in segments of a code buffer"""
+    if gc_cumsum is None:
+        gc_cumsum = get_GC_cumsum(codes)
+    starts = np.asarray(starts, dtype=np.int64)
+    return gc_cumsum[starts + np.asarray(lengths, dtype=np.int64)] - gc_cumsum[starts]
+
+
+def dH_dS_to_Tm(dH, dS, num_GC, lengths):
+    """
+    Calculate melting temperatures [°C] from ∆H, ∆S and GC counts
+    Array version of sequence_to_Tm, empty segments get nan
+    """
+    lengths = np.asarray(lengths)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        Tm_1M_NaCl = get_Tm_SantaLucia2004(np.asarray(dH), np.asarray(dS))
+        fGC = 1.0 * np.asarray(num_GC) / lengths
+        Tm_Mg = get_Tm_Mg_Owczarzy2008_fGC(fGC, lengths, Tm_1M_NaCl)
+
+    # Perform Owczarzy Mg++ correction only for oligomers
+    Tm = np.where(lengths > 1, Tm_Mg, Tm_1M_NaCl)
+    Tm = np.where(lengths == 0, np.nan, Tm)
+    return Tm
+
+
+def dH_dS_to_dG(dH, dS, lengths, temperature_kelvin=323.15):
+    """
+    Apply Dunn2015 salt correction and calculate ∆G at temperature
+    Array version of sequence_to_dG_dH_dS, empty segments get zero values
+    """
+    lengths = np.asarray(lengths)
+    dStotal = (np.asarray(dS) + get_salt_corrected_dS_Dunn2015(lengths)) / 1000.0
+    dGtotal = np.asarray(dH) - temperature_kelvin * dStotal
+
+    # Empty sequences
+    empty = lengths == 0
+    dGtotal = np.where(empty, 0.0, dGtotal)
+    dHtotal = np.where(empty, 0.0, dH)
+    dStotal = np.where(empty, 0.0, dStotal)
+
+    return dGtotal, dHtotal, dStotal
+
+
+def segments_to_dG_dH_dS_Tm(codes, starts, lengths, temperature_kelvin=323.15):
+    """Calculate ∆G, ∆H, ∆S and Tm for all segments of a code buffer"""
+    dH, dS = get_dH_dS_SantaLucia2004_segments(codes, starts, lengths)
+    num_GC = count_GC_segments(codes, starts, lengths)
+
+    dGtotal, dHtotal, dStotal = dH_dS_to_dG(dH, dS, lengths, temperature_kelvin)
+    Tm = dH_dS_to_Tm(dH, dS, num_GC, lengths)
+
+    return dGtotal, dHtotal, dStotal, Tm
+
+
+def sequences_to_dG_dH_dS_Tm(sequences, temperature_kelvin=323.15):
+    """
+    Batch version of sequence_to_dG_dH_dS and sequence_to_Tm
+
+    Returns ∆G, ∆H, ∆S and Tm arrays for a list of sequences
+    """
+    codes, starts, lengths = encode_sequences(sequences)
+    return segments_to_dG_dH_dS_Tm(codes, starts, lengths, temperature_kelvin)
+
+
+def sequences_to_Tm(sequences):
+    """Batch version of sequence_to_Tm"""
+    codes, starts, lengths = encode_sequences(sequences)
+    dH, dS = get_dH_dS_SantaLucia2004_segments(codes, starts, lengths)
+    num_GC = count_GC_segments(codes, starts, lengths)
+    return dH_dS_to_Tm(dH, dS, num_GC, lengths)
+
+
+def sequences_to_dG_dH_dS(sequences, temperature_kelvin=323.15):
+    """Batch version of sequence_to_dG_dH_dS"""
+    codes, starts, lengths = encode_sequences(sequences)
+    dH, dS = get_dH_dS_SantaLucia2004_segments(codes, starts, lengths)
+    return dH_dS_to_dG(dH, dS, lengths, temperature_kelvin)
+
+
+class ScaffoldThermoTable:
+    def __init__(self, scaffold_sequence):
+        """
+        Cumulative nearest-neighbor tables over a scaffold sequence
+
+        Staple segments are reverse complements of contiguous scaffold ranges and
+        share their nearest-neighbor ∆H/∆S, terminal-AT and GC values, so any segment
+        is scored from its scaffold range in constant time. The sequence is stored
+        twice so that a range stays contiguous for every sequence offset.
+        """
+        self.scaffold_sequence = scaffold_sequence.upper()
+        self.sequence_length = len(self.scaffold_sequence)
+
+        # Code buffer and cumulative tables
+        self.codes = encode_sequence(2 * self.scaffold_sequence)
+        self.NN_cumsums = get_NN_cumsums(self.codes)
+        self.gc_cumsum = get_GC_cumsum(self.codes)
+
+    def get_table_starts(self, scaffold_starts, offset=0):
+        """
+        Convert 0-based scaffold positions to table indexes for a sequence offset
+        Scaffold position p is assigned sequence[(p + offset) % sequence_length]
+        """
+        return (np.asarray(scaffold_starts, dtype=np.int64) + offset) % max(
+            self.sequence_length, 1
+        )
+
+    def get_segment_ranges(self, sequences, position_lists):
+        """
+        Get 0-based scaffold starts and lengths of dsDNA segments from their scaffold positions
+        Ranges are only returned if every segment maps to a contiguous scaffold range,
+        otherwise the segments are scored from their sequences and None is returned
+        """
+        if len(position_lists) != len(sequences):
+            return None, None
+
+        scaffold_starts = []
+        scaffold_lengths = []
+        for pos_list, dna in zip(position_lists, sequences):
+            pos_min = min(pos_list)
+            pos_max = max(pos_list)
+
+            # Segment has to be a complete contiguous scaffold range
+            if (
+                pos_max - pos_min + 1 != len(pos_list)
+                or len(pos_list) != len(dna)
+                or pos_max > self.sequence_length
+            ):
+                return None, None
+
+            scaffold_starts.append(pos_min - 1)
+            scaffold_lengths.append(len(dna))
+
+        return (
+            np.array(scaffold_starts, dtype=np.int64),
+            np.array(scaffold_lengths, dtype=np.int64),
+        )
+
+    def get_dH_dS(self, scaffold_starts, lengths, offset=0):
+        """Get SantaLucia ∆H and ∆S for scaffold ranges"""
+        starts = self.get_table_starts(scaffold_starts, offset)
+        return get_dH_dS_SantaLucia2004_segments(
+            self.codes, starts, lengths, self.NN_cumsums
+        )
+
+    def get_dG_dH_dS_Tm(
+        self, scaffold_starts, lengths, offset=0, temperature_kelvin=323.15
+    ):
+        """Get salt-corrected ∆G, ∆H, ∆S and Owczarzy Tm for scaffold ranges"""
+        starts = self.get_table_starts(scaffold_starts, offset)
+        dH, dS = get_dH_dS_SantaLucia2004_segments(
+            self.codes, starts, lengths, self.NN_cumsums
+        )
+        num_GC = count_GC_segments(self.codes, starts, lengths, self.gc_cumsum)
+
+        dGtotal, dHtotal, dStotal = dH_dS_to_dG(dH, dS, lengths, temperature_kelvin)
+        Tm = dH_dS_to_Tm(dH, dS, num_GC, lengths)
+
+        return dGtotal, dHtotal, dStotal, Tm
+
+
+# GRAPH FUNCTIONS
+
+
+def get_connected_components(num_nodes, sources, targets):
+    """
+    Label the connected components of a graph given by its edge lists
+    with a union-find, components are numbered in the order of their
+    smallest node
+    """
+    parents = list(range(num_nodes))
+
+    for source, target in zip(sources, targets):
+        # Find the roots with path halving
+        while parents[source] != source:
+            parents[source] = parents[parents[source]]
+            source = parents[source]
+        while parents[target] != target:
+            parents[target] = parents[parents[target]]
+            target = parents[target]
+
+        # The smaller root is kept, so every parent precedes its child
+        if source < target:
+            parents[target] = source
+        elif target < source:
+            parents[source] = target
+
+    # A single pass in node order resolves the roots and numbers the components
+    labels = np.empty(num_nodes, dtype=int)
+    num_components = 0
+    for node in range(num_nodes):
+        if parents[node] == node:
+            labels[node] = num_components
+            num_components += 1
+        else:
+            labels[node] = labels[parents[node]]
+
+    return labels
+
+
 # SEQUENCE GENERATORS
 
 